@@ -0,0 +1,491 @@
+"""
+Headless simulation runner
+
+Runs the networks of the engine demos, along with the limb or muscle bodies they
+drive, with no window. Nothing is drawn unless a renderer is attached, so the
+simulation runs as fast as possible and reports its steps per second, and it can
+run on a machine without a display. pygame is only imported by PygameRenderer
+and pymunk only by MuscleBody.
+
+Circuits
+--------
+twitch
+    The sensory, motor and self-exciting inhibitor neurons of twitchresponsetest
+cpg
+    The chain of left and right excitory, inhibitory and motor neurons of
+    slithertesttolimb, or of slithertestwithmuscles when driving a muscle body
+
+Bodies
+------
+limb
+    A chain of Limbs rotated by the motor neurons, as in slithertesttolimb
+muscle
+    A pymunk worm whose muscles follow the motor neurons, as in
+    slithertestwithmuscles
+
+Usage
+-----
+    python headless.py --circuit cpg --body limb --steps 100000
+    python headless.py --circuit cpg --body muscle --controls 1 0 --profile
+    python headless.py --circuit twitch --render --realtime
+"""
+
+import argparse
+import time
+import sys,os
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import Neuron
+from AML.neuralnet import circuits
+from AML.neuralnet.timemodule import Scheduler
+from AML.neuralnet.profiling import Profiler
+from AML.physics.limb import Limb
+from AML.mathlib.math2d import Vector2
+
+# The neural timestep of slithertesttolimb and twitchresponsetest, and that of
+# slithertestwithmuscles
+DT = 0.07
+MUSCLE_DT = 0.075
+# The segments and neuron parameters of slithertestwithmuscles
+MUSCLE_CPG = {'n': 4, 'refract': 0.5, 'fire': 6}
+
+
+class Circuit:
+    """
+    The neurons of a demo network together with its external inputs and the
+    motor neurons that drive a body
+
+    Attributes
+    ----------
+    neurons : list
+        The neurons, in the order they are stepped
+    controls : list
+        The external input synapses, whose values drive the circuit
+    lefts : list
+        The motor neurons of the left side of each segment
+    rights : list
+        The motor neurons of the right side of each segment
+    layout : dict
+        The screen position of each neuron, used only for rendering
+    """
+
+    def __init__(self, neurons, controls, lefts = None, rights = None, layout = None):
+        self.neurons = neurons
+        self.controls = controls
+        self.lefts = lefts if lefts is not None else []
+        self.rights = rights if rights is not None else []
+        self.layout = layout if layout is not None else {}
+
+    def step(self, curr_time, deltatime = None):
+        """
+        Advances every neuron to curr_time one after another, as the demo loops do
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        deltatime : float, optional
+            Unused. Accepted so that step can be a Scheduler task.
+        """
+
+        for neuron in self.neurons:
+            neuron.update_inputs(curr_time)
+            neuron.update_outputs()
+
+    def __repr__(self):
+        return ("Circuit(" + "Neurons:" + str(len(self.neurons)) +
+                ", " + "Controls:" + str(len(self.controls)) +
+                ", " + "Segments:" + str(len(self.lefts)) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
+
+
+def build_twitch(init_time = 0):
+    """
+    Builds the twitch response circuit of twitchresponsetest
+
+    Parameters
+    ----------
+    init_time : float, optional
+        The starting time of the neurons
+
+    Returns
+    -------
+    Circuit
+        The circuit, with the motor neuron as its only left motor neuron
+    """
+
+    layout = {}
+    def make(x, y):
+        neuron = Neuron(0.1, init_time)
+        layout[neuron] = (x, y)
+        return neuron
+
+    sensory, motor, inhibitor, control = circuits.build_twitch(make)
+    return Circuit([sensory, inhibitor, motor], [control], [motor], [], layout)
+
+def build_cpg(n = 5, refract = 2, fire = 2, init_time = 0, scale = 0.6):
+    """
+    Builds the central pattern generator of the slither demos, by default with
+    the segments and neuron parameters of slithertesttolimb
+
+    Parameters
+    ----------
+    n : int, optional
+        The number of segments
+    refract : float, optional
+        The refractory period of every neuron
+    fire : float, optional
+        The firing time of every neuron
+    init_time : float, optional
+        The starting time of the neurons
+    scale : float, optional
+        The scale of the layout
+
+    Returns
+    -------
+    Circuit
+        The circuit
+    """
+
+    layout = {}
+    def make(x, y):
+        neuron = Neuron(0.1, init_time, refract=refract, fire=fire)
+        layout[neuron] = (x*scale, y*scale)
+        return neuron
+
+    (excitory_lefts, inhibitory_lefts, motor_lefts, excitory_rights, inhibitory_rights,
+     motor_rights, controls) = circuits.build_cpg(n, make)
+    neurons = (excitory_lefts + inhibitory_lefts + motor_lefts +
+               excitory_rights + inhibitory_rights + motor_rights)
+    return Circuit(neurons, list(controls), motor_lefts, motor_rights, layout)
+
+CIRCUITS = {'twitch': build_twitch, 'cpg': build_cpg}
+
+
+class LimbBody:
+    """
+    A chain of Limbs, one per segment of a circuit, where every motor neuron
+    rotates its segment about the joint it shares with the previous segment
+
+    Attributes
+    ----------
+    circuit : Circuit
+        The circuit whose motor neurons drive the limbs
+    limbs : list
+        The limbs, from head to tail
+    rotate_const : float
+        The rotation in degrees of a segment whose motor neuron is fully active
+    before_neural : bool
+        Whether the body steps before the circuit on a tick. slithertesttolimb
+        rotates its limbs after updating its neurons.
+    """
+
+    before_neural = False
+
+    def __init__(self, circuit, rotate_const = 4):
+        self.circuit = circuit
+        self.rotate_const = rotate_const
+        limbs = [Limb(Vector2(300,400),Vector2(350,450),3)]
+        for i in range(len(circuit.lefts)-1):
+            prev_node = limbs[-1].get_node(1)
+            prev_pos = prev_node.pos
+            limbs.append(Limb(prev_node,prev_pos + 50,3))
+            limbs[-2].add_child(limbs[-1], False)
+        self.limbs = limbs
+
+    def step(self, curr_time, deltatime = None):
+        limbs = self.limbs
+        lefts = self.circuit.lefts
+        rights = self.circuit.rights
+        for i in range(1, len(limbs)):
+            joint = limbs[i].get_shared_joint(limbs[i-1])
+            limbs[i].rotate_about(self.rotate_const*lefts[i].curr, joint)
+            if i < len(rights):
+                limbs[i].rotate_about(-self.rotate_const*rights[i].curr, joint)
+
+    def segments(self):
+        """
+        Returns the end points of every limb, for rendering
+
+        Returns
+        -------
+        list
+            A pair of (x, y) points per limb
+        """
+
+        return [((l.get_node(0).pos.get_x(), l.get_node(0).pos.get_y()),
+                 (l.get_node(1).pos.get_x(), l.get_node(1).pos.get_y())) for l in self.limbs]
+
+
+class MuscleBody:
+    """
+    A pymunk worm with a left and right muscle per segment of a circuit. A
+    muscle contracts while its motor neuron's output is at least 0.5.
+
+    Attributes
+    ----------
+    circuit : Circuit
+        The circuit whose motor neurons drive the muscles
+    space : pymunk.Space
+        The simulated space
+    bodies : list
+        The bodies of the worm
+    muscles : list
+        The muscles, left then right for every segment
+    physics_dt : float
+        The time in s that the space advances by per step
+    before_neural : bool
+        Whether the body steps before the circuit on a tick.
+        slithertestwithmuscles sets its muscles before updating its neurons.
+    """
+
+    before_neural = True
+
+    def __init__(self, circuit, size = (1280, 720), physics_dt = 1.0/60, force = 1000):
+        import pymunk
+        from AML.physics.muscle import build_worm
+
+        if len(circuit.lefts) != len(circuit.rights):
+            raise ValueError("A muscle body needs a left and right motor neuron per segment")
+        self.circuit = circuit
+        self.physics_dt = physics_dt
+        self.space = pymunk.Space()
+        self.space.gravity = 0, 0
+        # Viscosity of the space
+        self.space.damping = 0.2
+        self.bodies, self.shapes, self.muscles = build_worm(
+            self.space, size, 2*len(circuit.lefts) + 1, force=force)
+
+    def step(self, curr_time, deltatime = None):
+        lefts = self.circuit.lefts
+        rights = self.circuit.rights
+        muscles = self.muscles
+        for i in range(len(lefts)):
+            if lefts[i].curr >= 0.5:
+                muscles[2*i].contract()
+            else:
+                muscles[2*i].relax()
+            if rights[i].curr >= 0.5:
+                muscles[2*i+1].contract()
+            else:
+                muscles[2*i+1].relax()
+        for muscle in muscles:
+            muscle._update()
+        self.space.step(self.physics_dt)
+
+    def segments(self):
+        """
+        Returns the end points of every muscle, for rendering
+
+        Returns
+        -------
+        list
+            A pair of (x, y) points per muscle
+        """
+
+        return [tuple((v.x, v.y) for v in muscle.endpoints()) for muscle in self.muscles]
+
+BODIES = {'limb': LimbBody, 'muscle': MuscleBody}
+
+
+class HeadlessRunner:
+    """
+    Steps a circuit, an optional body and an optional renderer on a Scheduler
+    with no display, back to back unless paced against real time
+
+    Every tick sets the controls, then steps the circuit and the body every
+    body_every ticks in the order of the demo the body comes from, so a body
+    running every tick sees the same motor output as in the demo loops.
+
+    Attributes
+    ----------
+    circuit : Circuit
+        The circuit being simulated
+    body : LimbBody or MuscleBody
+        The body driven by the circuit, or None
+    scheduler : Scheduler
+        The scheduler running the drive, body, neural and render tasks
+    profiler : Profiler
+        Times every task. Disabled unless set.
+
+    Methods
+    -------
+    attach_renderer(renderer, every)
+        Adds a renderer task
+    run(steps, realtime)
+        Runs steps ticks and returns the steps per second
+    stop()
+        Makes run return after the current tick
+    """
+
+    def __init__(self, circuit, dt = DT, body = None, body_every = 1, drive = None):
+        """
+        Parameters
+        ----------
+        circuit : Circuit
+            The circuit to simulate
+        dt : float, optional
+            The neural timestep
+        body : LimbBody or MuscleBody, optional
+            The body driven by the circuit
+        body_every : int, optional
+            The number of neural ticks per body step
+        drive : callable, optional
+            Called as drive(curr_time, deltatime) at the start of every tick to
+            set the values of the circuit's controls
+        """
+
+        self.circuit = circuit
+        self.body = body
+        self.scheduler = Scheduler(dt)
+        if drive is not None:
+            self.scheduler.add(drive, 1, 'drive')
+        if body is not None and body.before_neural:
+            self.scheduler.add(body.step, body_every, 'body')
+        self.scheduler.add(circuit.step, 1, 'neural')
+        if body is not None and not body.before_neural:
+            self.scheduler.add(body.step, body_every, 'body')
+
+    @property
+    def profiler(self):
+        return self.scheduler.profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        self.scheduler.profiler = profiler
+
+    def attach_renderer(self, renderer, every = 1):
+        """
+        Adds a renderer that draws the simulation every `every` ticks
+
+        Parameters
+        ----------
+        renderer : callable
+            Called as renderer(curr_time, deltatime) after the neural step
+        every : int, optional
+            The number of ticks between frames
+        """
+
+        self.scheduler.add(renderer, every, 'render')
+
+    def stop(self):
+        self.scheduler.stop()
+
+    def run(self, steps = None, realtime = False):
+        """
+        Runs the simulation and measures its speed
+
+        Parameters
+        ----------
+        steps : int, optional
+            The number of ticks to run. Runs until stop() if not given.
+        realtime : bool, optional
+            Whether to pace the ticks against real time
+
+        Returns
+        -------
+        dict
+            The steps run, the simulated time, the wall-clock seconds and the
+            steps per second
+        """
+
+        scheduler = self.scheduler
+        start = scheduler.ticks
+        start_time = scheduler.clock.get_time()
+        duration = None if steps is None else steps*scheduler.dt
+        t0 = time.perf_counter()
+        scheduler.run(duration, realtime)
+        seconds = time.perf_counter() - t0
+        ran = scheduler.ticks - start
+        return {'steps': ran, 'sim_time': scheduler.clock.get_time() - start_time,
+                'seconds': seconds, 'steps_per_second': ran/seconds if seconds > 0 else 0.0}
+
+
+class PygameRenderer:
+    """
+    Draws a circuit and its body in a pygame window, coloured as NeuronG draws
+    them. Closing the window stops the runner.
+    """
+
+    def __init__(self, runner, size = (1280, 720)):
+        import pygame
+        pygame.init()
+        self.pygame = pygame
+        self.runner = runner
+        self.screen = pygame.display.set_mode(size)
+
+    def __call__(self, curr_time, deltatime):
+        pygame = self.pygame
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.runner.stop()
+        screen = self.screen
+        screen.fill((255, 255, 255))
+        circuit = self.runner.circuit
+        layout = circuit.layout
+        for neuron in circuit.neurons:
+            for sout in neuron.sout:
+                if sout.dest in layout:
+                    val = int(sout.value/sout.potential*255)
+                    color = (0,-val,0) if val < 0 else (val,0,255-val)
+                    pygame.draw.aaline(screen, color, layout[neuron], layout[sout.dest])
+        for neuron in circuit.neurons:
+            if neuron in layout:
+                val = int(neuron.curr/neuron.potential*255)
+                pos = layout[neuron]
+                pygame.draw.circle(screen, (val,0,255-val), (int(pos[0]), int(pos[1])), 12)
+        if self.runner.body is not None:
+            for start, end in self.runner.body.segments():
+                pygame.draw.line(screen, (0,0,0), start, end, 3)
+        pygame.display.flip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the engine demos without a display")
+    parser.add_argument('--circuit', default='cpg', choices=sorted(CIRCUITS))
+    parser.add_argument('--body', default='none', choices=['none'] + sorted(BODIES))
+    parser.add_argument('--steps', type=int, default=10000)
+    parser.add_argument('--dt', type=float, default=None,
+                        help="The neural timestep, by default that of the demo")
+    parser.add_argument('--body-every', type=int, default=1)
+    parser.add_argument('--controls', nargs='+', type=float, default=[1],
+                        help="The values the controls are held at")
+    parser.add_argument('--render', action='store_true')
+    parser.add_argument('--render-every', type=int, default=1)
+    parser.add_argument('--realtime', action='store_true')
+    parser.add_argument('--profile', action='store_true')
+    args = parser.parse_args()
+
+    if args.circuit == 'cpg' and args.body == 'muscle':
+        circuit = build_cpg(**MUSCLE_CPG)
+    else:
+        circuit = CIRCUITS[args.circuit]()
+    body = None if args.body == 'none' else BODIES[args.body](circuit)
+    if args.dt is None:
+        args.dt = MUSCLE_DT if args.body == 'muscle' else DT
+    values = args.controls + [0]*(len(circuit.controls) - len(args.controls))
+
+    def drive(curr_time, deltatime):
+        for control, value in zip(circuit.controls, values):
+            control.value = value
+
+    runner = HeadlessRunner(circuit, args.dt, body, args.body_every, drive)
+    if args.profile:
+        runner.profiler = Profiler()
+    if args.render:
+        runner.attach_renderer(PygameRenderer(runner), args.render_every)
+    stats = runner.run(args.steps, args.realtime)
+    print(str(circuit) + ", " + "Body:" + args.body)
+    print("%d steps (%.1f ms simulated) in %.3f s: %.0f steps/s" %
+          (stats['steps'], stats['sim_time'], stats['seconds'], stats['steps_per_second']))
+    if args.profile:
+        print(runner.profiler.table())
+
+if __name__ == "__main__":
+    main()
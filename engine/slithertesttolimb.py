@@ -11,6 +11,7 @@ if not (p in sys.path):
 from AML.graphics.neurongraphics import NeuronG
 from AML.graphics.limbgraphics import LimbG
 from AML.neuralnet.neuron import *
+from AML.neuralnet.circuits import build_cpg
 from AML.neuralnet import timemodule
 from AML.mathlib.math2d import *
 
@@ -46,59 +47,11 @@ scale = 0.6
 
 init_time = 0
 
-##excitory_left = NeuronG(0.1, (100, 300), init_time)
-excitory_lefts = [NeuronG(0.1, ((100 + i*100)*scale, 300*scale), init_time, scale, refract=2) for i in range(n)]
-##inhibitory_left = NeuronG(0.1, (200, 300), init_time)
-inhibitory_lefts = [NeuronG(0.1, ((200 + i*100)*scale, 300*scale), init_time, scale, refract=2) for i in range(n)]
-##motor_left = NeuronG(0.1, (150, 200), init_time)
-motor_lefts = [NeuronG(0.1, ((150 + i*100)*scale, 200*scale), init_time, scale, refract=2) for i in range(n)]
-##excitory_right = NeuronG(0.1, (100, 400), init_time)
-excitory_rights = [NeuronG(0.1, ((100 + i*100)*scale, 400*scale), init_time, scale, refract=2) for i in range(n)]
-##inhibitory_right = NeuronG(0.1, (200, 400), init_time)
-inhibitory_rights = [NeuronG(0.1, ((200 + i*100)*scale, 400*scale), init_time, scale, refract=2) for i in range(n)]
-##motor_right = NeuronG(0.1, (150, 500), init_time)
-motor_rights = [NeuronG(0.1, ((150 + i*100)*scale, 500*scale), init_time, scale, refract=2) for i in range(n)]
-
-#Excitation
-for i in range(n):
-    connect(excitory_lefts[i], inhibitory_lefts[i], 0, 1)
-    connect(excitory_lefts[i], motor_lefts[i], 0, 1)
-    connect(excitory_lefts[i], inhibitory_rights[i], 0, 1)
-    connect(excitory_rights[i], inhibitory_rights[i], 0, 1)
-    connect(excitory_rights[i], motor_rights[i], 0, 1)
-    connect(excitory_rights[i], inhibitory_lefts[i], 0, 1)
-    if i < n-1:
-        connect(motor_rights[i], excitory_lefts[i+1], 0, 1)
-        connect(motor_lefts[i], excitory_rights[i+1], 0, 1)
-        ##connect(inhibitory_rights[i], excitory_rights[i], 0, 1, sign = -1)
-'''
-connect(excitory_left, inhibitory_left, 0, 1)
-connect(excitory_left, motor_left, 0, 1)
-connect(excitory_left, inhibitory_right, 0, 1)
-connect(excitory_right, inhibitory_right, 0, 1)
-connect(excitory_right, motor_right, 0, 1)
-connect(excitory_right, inhibitory_left, 0, 1)
-'''
-
-#Inhibition
-for i in range(n):
-    connect(inhibitory_lefts[i], motor_lefts[i], 0, 1, sign = -1)
-    connect(inhibitory_rights[i], motor_rights[i], 0, 1, sign = -1)
-    connect(motor_lefts[i], inhibitory_lefts[i], 0, 1)
-    connect(motor_rights[i], inhibitory_rights[i], 0, 1)
-    connect(motor_lefts[i], excitory_lefts[i], 0, 1, sign = -1)
-    connect(motor_rights[i], excitory_rights[i], 0, 1, sign = -1)
-    connect(inhibitory_lefts[i], excitory_lefts[i], 0, 1, sign = -1)
-    connect(inhibitory_rights[i], excitory_rights[i], 0, 1, sign = -1)
-'''
-connect(inhibitory_left, motor_left, 0, 1, sign = -1)
-connect(inhibitory_right, motor_right, 0, 1, sign = -1)
-##connect(inhibitory_right, excitory_right, 0, 1, sign = -1)
-'''
-
-#Creating Controls
-control_1 = connect(None, excitory_lefts[0], 0, 1)
-control_2 = connect(None, excitory_rights[0], 0, 1)
+def make(x, y):
+    return NeuronG(0.1, (x*scale, y*scale), init_time, scale, refract=2)
+
+(excitory_lefts, inhibitory_lefts, motor_lefts, excitory_rights, inhibitory_rights,
+ motor_rights, (control_1, control_2)) = build_cpg(n, make)
 
 neurons = (excitory_lefts + inhibitory_lefts + motor_lefts +
            excitory_rights + inhibitory_rights + motor_rights)
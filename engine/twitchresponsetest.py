@@ -8,6 +8,7 @@ if not (p in sys.path):
 
 from AML.graphics.neurongraphics import NeuronG
 from AML.neuralnet.neuron import *
+from AML.neuralnet.circuits import build_twitch
 from AML.neuralnet import timemodule
 from AML.mathlib.math2d import *
 
@@ -44,14 +45,8 @@ nclock = timemodule.Clock()
 
 init_time = 0
 
-sensory = NeuronG(0.1, (300,300), init_time)
-motor = NeuronG(0.1, (600,300), init_time)
-inhibitor = NeuronG(0.1,(600,600), init_time)
-
-control = connect(None, sensory, 0, 1)
-connect(sensory, motor, 0, 1)
-connect(inhibitor, motor, 0, 0.2, sign = -1)
-connect(inhibitor, inhibitor, 1, 1)
+sensory, motor, inhibitor, control = build_twitch(
+    lambda x, y: NeuronG(0.1, (x, y), init_time))
 
 neurons = [sensory,inhibitor,motor]
 
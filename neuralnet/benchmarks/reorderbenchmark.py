@@ -0,0 +1,202 @@
+"""
+Neuron reordering benchmark
+
+Builds two identical networks with Network.from_edges, reorders one of them with
+Network.reorder and steps both from the same starting state for the same ticks
+with the same input pattern, then writes the ticks per second of each, the time
+the reordering took and the mean distance in memory between the endpoints of a
+synapse (edge span) to a JSON file.
+
+Both networks are warmed up with one untimed pass over the input pattern, which
+also builds the kernel lookup tables. They are then timed for several rounds of
+one pass each, alternating which network runs first, with the garbage collector
+paused during each pass. The ticks per second and the speedup are those of the
+best pass of each network; the median and the range of the speedups of the
+rounds show the spread, and every pass time is kept in the JSON file. Both
+networks are held in memory at once.
+
+Topologies
+----------
+random
+    Every synapse starts at a uniformly random neuron, as in neuralnetwork.py.
+    There is little locality to recover, so this bounds the gain from below.
+local
+    Every neuron receives synapses from neurons within a small radius of it on
+    a ring, as in spatially wired networks, but the neurons are numbered in a
+    random order so that the locality is hidden from the storage.
+
+Usage
+-----
+    python reorderbenchmark.py --output reorder.json
+    python reorderbenchmark.py --topologies local --sizes 1000000 --fan-in 10 --repeats 7
+"""
+
+import argparse
+import gc
+import json
+import platform
+import time
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.network import Network
+from AML.neuralnet.reorder import edge_span
+
+DT = 0.075
+THRESHOLD = 0.3
+INHIBITORY = 0.2
+
+
+def _topology(topology, size, fan_in, seed):
+    rng = np.random.default_rng(seed)
+    dest = np.repeat(np.arange(size), fan_in)
+    if topology == 'random':
+        origin = rng.integers(0, size, size*fan_in)
+    elif topology == 'local':
+        offset = rng.integers(1, fan_in + 1, size*fan_in)*rng.choice([-1, 1], size*fan_in)
+        origin = (dest + offset) % size
+        label = rng.permutation(size)
+        origin = label[origin]
+        dest = label[dest]
+    else:
+        raise ValueError("Unknown topology '" + str(topology) + "'")
+    sign = np.where(rng.random(size*fan_in) < INHIBITORY, -1.0, 1.0)
+    weight = rng.random(size*fan_in)
+    return origin, dest, sign, weight
+
+def _time_pass(network, drive, input_ids, fan_in, first):
+    # Steps ticks first to first + len(drive) - 1 and returns the seconds spent
+    # stepping, leaving out the writes of the input pattern
+    matrix = network.synapses
+    positions = matrix.position[input_ids]
+    gc.collect()
+    gc.disable()
+    try:
+        stepping = 0.0
+        for tick in range(first, first + len(drive)):
+            matrix.value[positions] = drive[tick % len(drive)]*fan_in
+            start = time.perf_counter()
+            network.step(tick*DT)
+            stepping += time.perf_counter() - start
+    finally:
+        gc.enable()
+    return stepping
+
+def run_case(topology, size, fan_in, activity, ticks, repeats = 5, seed = 0):
+    """
+    Steps a network and a reordered copy of it
+
+    Parameters
+    ----------
+    topology : str
+        'random' or 'local'
+    size : int
+        The number of neurons
+    fan_in : int
+        The number of synapses ending in each neuron, not counting its input
+    activity : float
+        The fraction of neurons whose input synapse is driven on each tick
+    ticks : int
+        The number of ticks in each timed pass
+    repeats : int, optional
+        The number of timed passes of each network
+    seed : int, optional
+        The seed of the topology and the input pattern
+
+    Returns
+    -------
+    dict
+        The parameters and measurements of the case
+    """
+
+    origin, dest, sign, weight = _topology(topology, size, fan_in, seed)
+    inputs = np.arange(size)
+
+    def build():
+        return Network.from_edges(size, np.concatenate((origin, np.full(size, -1))),
+                                  np.concatenate((dest, inputs)), THRESHOLD,
+                                  sign=np.concatenate((sign, np.ones(size))),
+                                  potential=np.concatenate((np.ones(len(origin)),
+                                                            np.full(size, fan_in))),
+                                  weight=np.concatenate((weight, np.ones(size))), dt=DT)
+
+    # Input synapse ids are fixed, so the same ids drive the same neurons after
+    # reordering
+    input_ids = len(origin) + inputs
+    rng = np.random.default_rng(seed + 1)
+    drive = rng.random((ticks, size)) < activity
+
+    # Networks hold reference cycles, so those of the last case are collected
+    # before two more are built
+    gc.collect()
+    original = build()
+    reordered = build()
+    start = time.perf_counter()
+    order = reordered.reorder()
+    reorder_s = time.perf_counter() - start
+
+    networks = (original, reordered)
+    for network in networks:
+        _time_pass(network, drive, input_ids, fan_in, 0)
+    # Both networks step the same ticks in every round, so each pair of passes
+    # starts from the same state
+    seconds = ([], [])
+    for repeat in range(repeats):
+        first = (repeat + 1)*ticks
+        for i in ((0, 1) if repeat % 2 == 0 else (1, 0)):
+            seconds[i].append(_time_pass(networks[i], drive, input_ids, fan_in, first))
+    before, after = seconds
+    speedups = [b/a for b, a in zip(before, after)]
+
+    return {'topology': topology, 'neurons': size, 'fan_in': fan_in,
+            'activity': activity, 'ticks': ticks, 'repeats': repeats,
+            'reorder_s': reorder_s, 'span_before': edge_span(origin, dest),
+            'span_after': edge_span(origin, dest, order),
+            'seconds_before': before, 'seconds_after': after,
+            'ticks_per_s_before': ticks/min(before), 'ticks_per_s_after': ticks/min(after),
+            'speedup': min(before)/min(after),
+            'speedup_median': float(np.median(speedups)),
+            'speedup_min': min(speedups), 'speedup_max': max(speedups)}
+
+def _format(result):
+    return ("%-6s n=%-8d fan_in=%-4d span %10.1f -> %8.1f  reorder %6.2f s  "
+            "%8.2f -> %8.2f ticks/s  x%.2f (median x%.2f, rounds x%.2f-%.2f)" %
+            (result['topology'], result['neurons'], result['fan_in'],
+             result['span_before'], result['span_after'], result['reorder_s'],
+             result['ticks_per_s_before'], result['ticks_per_s_after'], result['speedup'],
+             result['speedup_median'], result['speedup_min'], result['speedup_max']))
+
+def main():
+    parser = argparse.ArgumentParser(description="Neuron reordering benchmark")
+    parser.add_argument('--topologies', nargs='+', default=['random', 'local'],
+                        choices=['random', 'local'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10**5, 10**6])
+    parser.add_argument('--fan-in', nargs='+', type=int, default=[10])
+    parser.add_argument('--activity', type=float, default=0.05)
+    parser.add_argument('--ticks', type=int, default=20)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default='reorderbenchmark.json')
+    args = parser.parse_args()
+
+    results = []
+    for topology in args.topologies:
+        for size in args.sizes:
+            for fan_in in args.fan_in:
+                result = run_case(topology, size, fan_in, args.activity, args.ticks,
+                                  args.repeats)
+                results.append(result)
+                print(_format(result), flush=True)
+    report = {'python': platform.python_version(), 'numpy': np.__version__,
+              'platform': platform.platform(), 'machine': platform.machine(),
+              'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'dt': DT, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print("Wrote " + args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Scaling benchmark for the neural simulator
+
+Builds random networks with a fixed fan-in per neuron and an external input
+synapse per neuron, whose potential matches the fan-in so that driving it
+alone takes a resting neuron over threshold. It drives a chosen fraction of the inputs on every tick, steps
+them for a fixed number of ticks and writes ticks per second, synaptic events
+per second and peak memory of every case to a JSON file. Each case runs in its
+own process so that its peak memory is not hidden by an earlier, larger case.
+
+Modes
+-----
+object
+    Neuron objects wired with connect() and stepped one by one
+network
+    Neuron objects wired with connect() and stepped by Network.from_neurons
+edges
+    A Network built with Network.from_edges, for sizes too large for objects
+
+Usage
+-----
+    python scalingbenchmark.py --output results.json
+    python scalingbenchmark.py --modes edges --sizes 1000000 --fan-in 10 100
+    python scalingbenchmark.py --compare old.json new.json
+"""
+
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import queue as queues
+import resource
+import time
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import Neuron, connect
+from AML.neuralnet.network import Network
+
+DT = 0.075
+THRESHOLD = 0.3
+INHIBITORY = 0.2
+# The sizes run when none are given, and the largest of them run in each mode
+SIZES = [10**2, 10**3, 10**4, 10**5, 10**6]
+DEFAULT_SIZES = {'object': 10**4, 'network': 10**5, 'edges': 10**6}
+# The seconds between checks that a case's process is still running
+POLL = 1.0
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak/2**20
+    return peak/2**10
+
+def _topology(size, fan_in, seed):
+    rng = np.random.default_rng(seed)
+    origin = rng.integers(0, size, size*fan_in)
+    dest = np.repeat(np.arange(size), fan_in)
+    sign = np.where(rng.random(size*fan_in) < INHIBITORY, -1.0, 1.0)
+    weight = rng.random(size*fan_in)
+    return origin, dest, sign, weight
+
+def _build_objects(size, fan_in, seed):
+    origin, dest, sign, weight = _topology(size, fan_in, seed)
+    neurons = [Neuron(THRESHOLD, dt=DT) for _ in range(size)]
+    for o, d, s, w in zip(origin.tolist(), dest.tolist(), sign.tolist(), weight.tolist()):
+        connect(neurons[o], neurons[d], 0, 1, sign=s, weight=w)
+    inputs = [connect(None, neuron, 0, fan_in) for neuron in neurons]
+    return neurons, inputs, np.bincount(origin, minlength=size)
+
+def run_case(mode, size, fan_in, activity, ticks, seed = 0):
+    """
+    Builds and steps one network
+
+    Parameters
+    ----------
+    mode : str
+        'object', 'network' or 'edges'
+    size : int
+        The number of neurons
+    fan_in : int
+        The number of synapses ending in each neuron, not counting its input
+    activity : float
+        The fraction of neurons whose input synapse is driven on each tick
+    ticks : int
+        The number of ticks to step
+    seed : int, optional
+        The seed of the topology and the input pattern
+
+    Returns
+    -------
+    dict
+        The parameters and measurements of the case
+    """
+
+    rss_start = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'edges':
+        origin, dest, sign, weight = _topology(size, fan_in, seed)
+        inputs = np.arange(size)
+        network = Network.from_edges(size, np.concatenate((origin, np.full(size, -1))),
+                                     np.concatenate((dest, inputs)), THRESHOLD,
+                                     sign=np.concatenate((sign, np.ones(size))),
+                                     potential=np.concatenate((np.ones(len(origin)),
+                                                               np.full(size, fan_in))),
+                                     weight=np.concatenate((weight, np.ones(size))), dt=DT)
+        out_degree = np.bincount(origin, minlength=size)
+        matrix = network.synapses
+        input_positions = matrix.position[len(origin) + inputs]
+        synapse_threshold = network.population.synapse_threshold
+    elif mode in ('object', 'network'):
+        neurons, inputs, out_degree = _build_objects(size, fan_in, seed)
+        if mode == 'network':
+            network = Network.from_neurons(neurons, DT)
+            matrix = network.synapses
+            input_positions = matrix.position[[synapse._id for synapse in inputs]]
+            synapse_threshold = network.population.synapse_threshold
+        else:
+            synapse_threshold = np.array([neuron.synapse_model.threshold
+                                          for neuron in neurons])
+    else:
+        raise ValueError("Unknown mode '" + str(mode) + "'")
+    build = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed + 1)
+    drive = rng.random((ticks, size)) < activity
+    stepping = 0.0
+    events = 0
+    for tick in range(ticks):
+        curr_time = tick*DT
+        if mode == 'object':
+            for synapse, driven in zip(inputs, drive[tick].tolist()):
+                synapse.value = fan_in if driven else 0
+            start = time.perf_counter()
+            for neuron in neurons:
+                neuron.update_inputs(curr_time)
+                neuron.update_outputs()
+            stepping += time.perf_counter() - start
+            curr = np.array([neuron.curr for neuron in neurons])
+        else:
+            matrix.value[input_positions] = drive[tick]*fan_in
+            start = time.perf_counter()
+            network.step(curr_time)
+            stepping += time.perf_counter() - start
+            curr = network.population.curr
+        # Every synapse of a neuron at or above its synapse threshold transmits
+        events += int(out_degree[curr >= synapse_threshold].sum())
+
+    return {'mode': mode, 'neurons': size, 'fan_in': fan_in, 'activity': activity,
+            'synapses': size*(fan_in + 1), 'ticks': ticks, 'build_s': build,
+            'ticks_per_s': ticks/stepping if stepping > 0 else float('inf'),
+            'events_per_s': events/stepping if stepping > 0 else 0.0,
+            'events_per_tick': events/ticks,
+            'rss_before_mb': rss_start, 'peak_rss_mb': _peak_rss_mb()}
+
+def _error(args, error):
+    return {'mode': args[0], 'neurons': args[1], 'fan_in': args[2],
+            'activity': args[3], 'error': error}
+
+def _worker(queue, args):
+    try:
+        queue.put(run_case(*args))
+    except MemoryError:
+        queue.put(_error(args, 'MemoryError'))
+
+def _run_process(ctx, args):
+    # Waits for the result of a case, giving up once its process has exited
+    # without one, as it does when it is killed for running out of memory
+    queue = ctx.Queue()
+    process = ctx.Process(target=_worker, args=(queue, args))
+    process.start()
+    while True:
+        try:
+            result = queue.get(timeout=POLL)
+            break
+        except queues.Empty:
+            if process.exitcode is not None:
+                try:
+                    result = queue.get(timeout=POLL)
+                except queues.Empty:
+                    result = _error(args, 'Exited with code ' + str(process.exitcode))
+                break
+    process.join()
+    return result
+
+def run_suite(modes, sizes, fan_ins, activities, ticks):
+    """
+    Runs every combination of the parameters, each in a fresh process
+
+    Parameters
+    ----------
+    modes : list
+        The modes to run
+    sizes : list
+        The numbers of neurons to run, all of them in every mode. If None, the
+        sizes of SIZES up to the largest of DEFAULT_SIZES for each mode.
+    fan_ins : list
+        The fan-ins to run
+    activities : list
+        The activities to run
+    ticks : int
+        The number of ticks to step each case
+
+    Returns
+    -------
+    list
+        The result of every case, in the order they ran
+    """
+
+    ctx = mp.get_context('spawn')
+    results = []
+    for mode in modes:
+        if sizes is None:
+            mode_sizes = [size for size in SIZES if size <= DEFAULT_SIZES[mode]]
+        else:
+            mode_sizes = sizes
+        for size in mode_sizes:
+            for fan_in in fan_ins:
+                for activity in activities:
+                    result = _run_process(ctx, (mode, size, fan_in, activity, ticks))
+                    results.append(result)
+                    print(_format(result), flush=True)
+    return results
+
+def _format(result):
+    if 'error' in result:
+        return (result['mode'] + " n=" + str(result['neurons']) + " fan_in=" +
+                str(result['fan_in']) + " " + result['error'])
+    return ("%-7s n=%-8d fan_in=%-4d activity=%-5g build %8.2f s  %10.1f ticks/s  "
+            "%12.4g events/s  peak %8.1f MB" %
+            (result['mode'], result['neurons'], result['fan_in'], result['activity'],
+             result['build_s'], result['ticks_per_s'], result['events_per_s'],
+             result['peak_rss_mb']))
+
+def compare(old_path, new_path):
+    """
+    Prints the ratio of ticks per second and peak memory of every case present in
+    two result files
+
+    Parameters
+    ----------
+    old_path : str
+        The baseline results
+    new_path : str
+        The results to compare against the baseline
+    """
+
+    def cases(path):
+        with open(path) as f:
+            data = json.load(f)
+        return {(r['mode'], r['neurons'], r['fan_in'], r['activity']): r
+                for r in data['results'] if 'error' not in r}
+    old, new = cases(old_path), cases(new_path)
+    for key in sorted(set(old) & set(new)):
+        speed = new[key]['ticks_per_s']/old[key]['ticks_per_s']
+        memory = new[key]['peak_rss_mb']/old[key]['peak_rss_mb']
+        print("%-7s n=%-8d fan_in=%-4d activity=%-5g speed x%.2f  memory x%.2f" %
+              (key + (speed, memory)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for the neural simulator")
+    parser.add_argument('--modes', nargs='+', default=['object', 'network', 'edges'],
+                        choices=['object', 'network', 'edges'])
+    parser.add_argument('--sizes', nargs='+', type=int, default=None,
+                        help="Run in every mode. By default each mode runs the sizes "
+                        "up to its largest practical size.")
+    parser.add_argument('--fan-in', nargs='+', type=int, default=[10])
+    parser.add_argument('--activity', nargs='+', type=float, default=[0.01, 0.1])
+    parser.add_argument('--ticks', type=int, default=100)
+    parser.add_argument('--output', default='scalingbenchmark.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = run_suite(args.modes, args.sizes, args.fan_in, args.activity, args.ticks)
+    report = {'python': platform.python_version(), 'numpy': np.__version__,
+              'platform': platform.platform(), 'machine': platform.machine(),
+              'cpus': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'dt': DT, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print("Wrote " + args.output)
+
+if __name__ == "__main__":
+    main()
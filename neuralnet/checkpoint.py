@@ -0,0 +1,132 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.network import Network
+from AML.neuralnet.population import NeuronPopulation
+from AML.neuralnet.synapsematrix import SynapseMatrix
+
+# Bumped whenever the layout of a checkpoint changes
+VERSION = 1
+
+
+def save_checkpoint(network, path, clock = None):
+    """
+    Saves the full state of a network, and optionally of its clock, as a flat set of
+    arrays in an uncompressed .npz file
+
+    Neuron state and parameters, synapse topology, weights and values are each
+    stored as one contiguous array, so saving and loading cost a handful of
+    large copies instead of walking the Neuron and Synapse object graph. Object
+    networks can be checkpointed after binding them with Network.from_neurons.
+
+    Parameters
+    ----------
+    network : Network
+        The network to save
+    path : str
+        The file to write
+    clock : Clock, optional
+        A timemodule.Clock whose time is saved alongside the network
+    """
+
+    arrays = {'version': np.array(VERSION)}
+    for field, array in network.population.state().items():
+        arrays['population/' + field] = array
+    for field, array in network.synapses.state().items():
+        arrays['synapses/' + field] = array
+    arrays['dt'] = np.array(np.nan if network.population.dt is None
+                            else network.population.dt)
+    if network._ids is not None:
+        arrays['ids'] = network.ids
+    if clock is not None:
+        arrays['clock'] = np.array([clock.prevtime, clock.currtime])
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def _read(path, clock):
+    with np.load(path) as data:
+        if int(data['version']) != VERSION:
+            raise ValueError("Unsupported checkpoint version " + str(int(data['version'])))
+        population = {}
+        synapses = {}
+        for name in data.files:
+            if name.startswith('population/'):
+                population[name[len('population/'):]] = data[name]
+            elif name.startswith('synapses/'):
+                synapses[name[len('synapses/'):]] = data[name]
+        dt = float(data['dt'])
+        ids = data['ids'] if 'ids' in data.files else None
+        if clock is not None and 'clock' in data.files:
+            clock.prevtime, clock.currtime = (float(t) for t in data['clock'])
+    return population, synapses, None if np.isnan(dt) else dt, ids
+
+
+def _ids_of(population_state, ids):
+    if ids is None:
+        return np.arange(population_state['curr'].shape[-1])
+    return ids
+
+
+def load_checkpoint(path, clock = None):
+    """
+    Loads a network saved by save_checkpoint. The new network has no Neuron or
+    Synapse objects bound to it.
+
+    Parameters
+    ----------
+    path : str
+        The file to read
+    clock : Clock, optional
+        A timemodule.Clock to set to the saved time
+
+    Returns
+    -------
+    Network
+        The restored network
+    """
+
+    population_state, synapse_state, dt, ids = _read(path, clock)
+    if population_state['curr'].ndim != 1:
+        raise ValueError("Ensemble checkpoints can only be restored into an "
+                         "EnsembleNetwork with restore_checkpoint")
+    # The network keeps the precision it was saved with
+    population = NeuronPopulation(1, dt, population_state['curr'].dtype)
+    population.load_state(population_state)
+    synapses = SynapseMatrix(0, synapse_state['value'].dtype, synapse_state['weight'].dtype)
+    synapses.load_state(synapse_state)
+    network = Network(population, synapses)
+    if ids is not None:
+        network._set_ids(ids)
+    return network
+
+
+def restore_checkpoint(network, path, clock = None):
+    """
+    Overwrites the state of an existing network with a checkpoint of it, so that
+    the Neuron and Synapse objects bound to it resume from the saved state
+
+    Parameters
+    ----------
+    network : Network
+        The network to restore, with the same neurons and synapse ids as the
+        network that was saved
+    path : str
+        The file to read
+    clock : Clock, optional
+        A timemodule.Clock to set to the saved time
+    """
+
+    population_state, synapse_state, dt, ids = _read(path, clock)
+    if (ids is not None or network._ids is not None) and \
+            not np.array_equal(_ids_of(population_state, ids), network.ids):
+        raise ValueError("Checkpoint was saved from a network with a different "
+                         "neuron order")
+    network.population.load_state(population_state)
+    network.population.dt = dt
+    network.synapses.load_state(synapse_state)
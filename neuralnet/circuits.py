@@ -0,0 +1,93 @@
+import sys,os
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import connect
+
+
+def build_twitch(make):
+    """
+    Wires the twitch response circuit: a sensory neuron driven by one control
+    excites a motor neuron that a self-exciting inhibitor holds down
+
+    Parameters
+    ----------
+    make : callable
+        Called as make(x, y) to create the neuron drawn at (x, y)
+
+    Returns
+    -------
+    tuple
+        The sensory, motor and inhibitor neurons and the control synapse
+    """
+
+    sensory = make(300, 300)
+    motor = make(600, 300)
+    inhibitor = make(600, 600)
+
+    control = connect(None, sensory, 0, 1)
+    connect(sensory, motor, 0, 1)
+    connect(inhibitor, motor, 0, 0.2, sign = -1)
+    connect(inhibitor, inhibitor, 1, 1)
+
+    return sensory, motor, inhibitor, control
+
+def build_cpg(n, make):
+    """
+    Wires the central pattern generator of the slither demos: n segments of
+    left and right excitory, inhibitory and motor neurons, where each motor
+    neuron excites the opposite excitory neuron of the next segment. Two
+    controls drive the excitory neurons of the first segment.
+
+    Parameters
+    ----------
+    n : int
+        The number of segments
+    make : callable
+        Called as make(x, y) to create the neuron drawn at (x, y)
+
+    Returns
+    -------
+    tuple
+        The lists of excitory, inhibitory and motor neurons of the left side, the
+        same lists for the right side, and the two control synapses
+    """
+
+    excitory_lefts = [make(100 + i*100, 300) for i in range(n)]
+    inhibitory_lefts = [make(200 + i*100, 300) for i in range(n)]
+    motor_lefts = [make(150 + i*100, 200) for i in range(n)]
+    excitory_rights = [make(100 + i*100, 400) for i in range(n)]
+    inhibitory_rights = [make(200 + i*100, 400) for i in range(n)]
+    motor_rights = [make(150 + i*100, 500) for i in range(n)]
+
+    #Excitation
+    for i in range(n):
+        connect(excitory_lefts[i], inhibitory_lefts[i], 0, 1)
+        connect(excitory_lefts[i], motor_lefts[i], 0, 1)
+        connect(excitory_lefts[i], inhibitory_rights[i], 0, 1)
+        connect(excitory_rights[i], inhibitory_rights[i], 0, 1)
+        connect(excitory_rights[i], motor_rights[i], 0, 1)
+        connect(excitory_rights[i], inhibitory_lefts[i], 0, 1)
+        if i < n-1:
+            connect(motor_rights[i], excitory_lefts[i+1], 0, 1)
+            connect(motor_lefts[i], excitory_rights[i+1], 0, 1)
+
+    #Inhibition
+    for i in range(n):
+        connect(inhibitory_lefts[i], motor_lefts[i], 0, 1, sign = -1)
+        connect(inhibitory_rights[i], motor_rights[i], 0, 1, sign = -1)
+        connect(motor_lefts[i], inhibitory_lefts[i], 0, 1)
+        connect(motor_rights[i], inhibitory_rights[i], 0, 1)
+        connect(motor_lefts[i], excitory_lefts[i], 0, 1, sign = -1)
+        connect(motor_rights[i], excitory_rights[i], 0, 1, sign = -1)
+        connect(inhibitory_lefts[i], excitory_lefts[i], 0, 1, sign = -1)
+        connect(inhibitory_rights[i], excitory_rights[i], 0, 1, sign = -1)
+
+    #Creating Controls
+    control_1 = connect(None, excitory_lefts[0], 0, 1)
+    control_2 = connect(None, excitory_rights[0], 0, 1)
+
+    return (excitory_lefts, inhibitory_lefts, motor_lefts,
+            excitory_rights, inhibitory_rights, motor_rights, (control_1, control_2))
@@ -0,0 +1,99 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.network import Network
+
+
+class EnsembleNetwork(Network):
+    """
+    Many independent copies of one network advanced together by a single step
+
+    Every neuron state and parameter array of the population, and the value and
+    weight arrays of the synapse matrix, carry a leading ensemble axis indexed
+    [copy, ...]. The copies share the connectivity structure, signs and
+    potentials of the synapses. Each copy can be given its own neuron parameters
+    with set_parameter and its own input schedule with set_input, so a parameter
+    sweep costs about one vectorized network step per tick.
+
+    Attributes
+    ----------
+    copies : int
+        The number of copies in the ensemble
+
+    Methods
+    -------
+    set_parameter(name, values)
+        Sets a neuron parameter for every copy
+    set_input(synapse, values)
+        Sets the value of an input synapse in every copy
+    """
+
+    def __init__(self, network, copies):
+        """
+        Parameters
+        ----------
+        network : Network
+            The network to copy. Its current state is the starting state of every copy.
+        copies : int
+            The number of copies
+        """
+
+        super().__init__(network.population.replicate(copies),
+                         network.synapses.replicate(copies))
+        self.copies = copies
+
+    def set_parameter(self, name, values):
+        """
+        Sets a neuron parameter, such as 'fire', 'refract', 'threshold', 'potential',
+        'synapse_threshold' or 'learning_rate', in every copy
+
+        Parameters
+        ----------
+        name : str
+            The name of the population array to set
+        values : array_like
+            The new values, broadcast against [copy, neuron]. For example an array
+            of shape (copies, 1) gives each copy one value for all of its neurons.
+        """
+
+        if name in ('firing_model', 'threshold_model', 't_max'):
+            raise ValueError("Parameter '" + name + "' cannot be set per copy")
+        population = self.population
+        getattr(population, name)[...] = values
+        if name in ('fire', 'refract'):
+            population.t_max[...] = population.fire + population.refract
+        # Model tables depend on fire, refract and precision
+        population._tables = None
+
+    def set_input(self, synapse, values):
+        """
+        Sets the value of an input synapse, such as one created with
+        connect(None, neuron, ...), in every copy
+
+        Parameters
+        ----------
+        synapse : Synapse or int
+            The input synapse or its id in the original network's SynapseMatrix
+        values : array_like
+            The new value of the synapse, one per copy or one for every copy
+        """
+
+        synapse_id = synapse if isinstance(synapse, (int, np.integer)) else synapse._id
+        self.synapses.value[:, self.synapses.position[synapse_id]] = values
+
+    def add_neuron(self, neuron):
+        raise ValueError("Neurons cannot be added to an EnsembleNetwork")
+
+    def add_synapse(self, synapse):
+        raise ValueError("Synapses cannot be added to an EnsembleNetwork")
+
+    def __repr__(self):
+        return ("EnsembleNetwork(" + "Copies:" + str(self.copies) +
+                ", " + "Neurons:" + str(len(self.population)) +
+                ", " + "Synapses:" + str(len(self.synapses)) +
+                ")")
@@ -0,0 +1,408 @@
+import heapq
+import sys,os
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+
+class _Plan:
+    """
+    The precomputed states of a fast-forwarded neuron for the ticks after its last
+    update, valid while its inputs stay unchanged
+    """
+
+    __slots__ = ('start', 'states', 'wake')
+
+    def __init__(self, start, states, wake):
+        # The tick of the neuron's last real update
+        self.start = start
+        # (curr_time, activation_time, curr, curr_threshold) for ticks start+1, ...
+        self.states = states
+        # The tick at which the neuron's outputs change, or None if it settles at rest
+        self.wake = wake
+
+
+class EventScheduler:
+    """
+    Steps a list of Neuron objects while only touching the neurons whose state
+    can change
+
+    A resting neuron (activation_time of -1) whose synaptic inputs have not
+    changed since its last update would compute the same result again, so it is
+    skipped until one of its input synapses changes value. Each step gives the
+    same result as calling update_inputs then update_outputs on every neuron in
+    list order, provided external inputs are written through set_input or
+    schedule_input so the scheduler knows which neurons they reach. Neurons with
+    a nonzero learning rate change their weights every tick and are never
+    skipped.
+
+    Given a fixed timestep dt, a firing neuron is fast-forwarded as well. While
+    its inputs are unchanged its firing cycle is a deterministic function of its
+    activation time, so after each update the scheduler runs the neuron's own
+    recurrence ahead from the firing model's waveform, without touching its
+    synapses, up to the tick at which its output to its synapses switches on or
+    off, or at which it settles at rest. The neuron is then left alone until that
+    tick or until an input wakes it, at which point its state is restored from
+    the plan. Stepping to a time several ticks ahead runs the ticks in between,
+    skipping those on which nothing is due, so sparse networks can be stepped
+    straight to next_change_time(). The state of a fast-forwarded neuron lags
+    until sync() is called.
+
+    Attributes
+    ----------
+    neurons : list
+        The neurons being stepped, in update order
+    active : set
+        The indices of the neurons that will be updated on the next step
+    updates : int
+        The total number of neuron updates performed so far
+    dt : float
+        The fixed timestep, or None if neurons are never fast-forwarded
+    horizon : int
+        The most ticks a neuron is fast-forwarded by at once
+    ticks : int
+        The number of ticks stepped so far
+    planned : int
+        The total number of neuron ticks covered by fast-forwarding instead of updates
+
+    Methods
+    -------
+    wake(neuron)
+        Makes sure the neuron is updated on the next step
+    set_input(synapse, value)
+        Sets the value of a synapse and wakes its destination
+    schedule_input(time, synapse, value)
+        Sets the value of a synapse on the first step at or after time
+    next_change_time()
+        Returns the time of the next tick at which any neuron's state could change
+    sync()
+        Brings every fast-forwarded neuron up to the last step
+    step(curr_time)
+        Updates every neuron whose state could change at curr_time
+    """
+
+    def __init__(self, neurons, dt = None, horizon = 250):
+        """
+        Parameters
+        ----------
+        neurons : list
+            The neurons to be stepped, in update order
+        dt : float, optional
+            The fixed timestep the scheduler is stepped at, which enables
+            fast-forwarding of firing neurons
+        horizon : int, optional
+            The most ticks a neuron is fast-forwarded by at once
+        """
+
+        if dt is not None and dt <= 0:
+            raise ValueError("Timestep must be positive")
+        if horizon < 2:
+            raise ValueError("The fast-forward horizon must be at least 2 ticks")
+        self.neurons = list(neurons)
+        self._indices = {id(neuron): i for i, neuron in enumerate(self.neurons)}
+        # Every neuron is updated once so that its outputs reflect its state
+        self.active = set(range(len(self.neurons)))
+        self.updates = 0
+        self.dt = dt
+        self.horizon = horizon
+        self.ticks = 0
+        self.planned = 0
+        self._time = None
+        self._events = []
+        self._count = 0
+        self._plans = {}
+        self._wakes = []
+        # The index of the neuron being updated, or -1 between updates
+        self._position = -1
+
+    def wake(self, neuron):
+        """
+        Makes sure the neuron is updated on the next step
+
+        Parameters
+        ----------
+        neuron : Neuron
+            The neuron to be woken
+        """
+
+        index = self._indices.get(id(neuron))
+        if index is not None:
+            self._restore(index, self._last_tick(index))
+            self.active.add(index)
+
+    def set_input(self, synapse, value):
+        """
+        Sets the value of a synapse, such as one created with connect(None, neuron, ...),
+        and wakes its destination if the value changed
+
+        Parameters
+        ----------
+        synapse : Synapse
+            The synapse to be set
+        value : float
+            The new value of the synapse
+        """
+
+        if synapse.value != value:
+            synapse.value = value
+            if synapse.dest is not None:
+                self.wake(synapse.dest)
+
+    def schedule_input(self, time, synapse, value):
+        """
+        Queues a change to the value of a synapse, applied by the first step at or
+        after the given time
+
+        Parameters
+        ----------
+        time : float
+            The time at which the value is set
+        synapse : Synapse
+            The synapse to be set
+        value : float
+            The new value of the synapse
+        """
+
+        # The counter breaks ties so that events at the same time apply in order
+        heapq.heappush(self._events, (time, self._count, synapse, value))
+        self._count += 1
+
+    def next_event_time(self):
+        """
+        Returns the time of the earliest pending input, or None if there is none
+        """
+
+        if self._events:
+            return self._events[0][0]
+        return None
+
+    def next_change_time(self):
+        """
+        Returns the time of the next tick at which any neuron's state could change,
+        from an active neuron, the end of a fast-forward or a pending input. Every
+        step before it would do nothing, so the scheduler can be stepped straight
+        to it.
+
+        Returns
+        -------
+        float
+            The time of the tick, or None if every neuron is at rest and no input
+            is pending
+        """
+
+        if self.dt is None:
+            raise ValueError("next_change_time needs a fixed timestep dt")
+        if self._time is None:
+            return None
+        self._discard_stale_wakes()
+        if self.active:
+            return self._time + self.dt
+        last = self.ticks - 1
+        target = self._wakes[0][0] if self._wakes else None
+        t = self._time
+        tick = last
+        while True:
+            if target is not None and tick >= target:
+                return t
+            if self._events and t >= self._events[0][0] and tick > last:
+                return t
+            if target is None and not self._events:
+                return None
+            t = t + self.dt
+            tick += 1
+
+    def sync(self):
+        """
+        Brings the state of every fast-forwarded neuron up to the last step, as
+        before reading the curr of every neuron. The neurons are updated normally
+        on the next step.
+        """
+
+        for index in list(self._plans):
+            self._restore(index, self.ticks - 1)
+            self.active.add(index)
+
+    def _last_tick(self, index):
+        # The last tick a woken neuron has already been through. During a step,
+        # a neuron after the one being updated has not reached the current tick.
+        if self._position < 0 or index > self._position:
+            return self.ticks - 1
+        return self.ticks
+
+    def _restore(self, index, tick):
+        plan = self._plans.pop(index, None)
+        if plan is None:
+            return
+        ticks = tick - plan.start
+        if ticks <= 0:
+            return
+        self.planned += ticks
+        neuron = self.neurons[index]
+        (neuron.curr_time, neuron.activation_time, neuron.curr,
+         neuron.threshold_model.curr_threshold) = plan.states[min(ticks, len(plan.states)) - 1]
+
+    def _discard_stale_wakes(self):
+        wakes = self._wakes
+        while wakes and self._plans.get(wakes[0][2]) is not wakes[0][3]:
+            heapq.heappop(wakes)
+
+    def _plan(self, index, curr_time):
+        # Runs the neuron's update_inputs ahead while its inputs stay as they are,
+        # with the same arithmetic, until its output switches or it settles at rest
+        neuron = self.neurons[index]
+        synapse_model = neuron.synapse_model
+        if (synapse_model.lr != 0 or synapse_model.lazy or synapse_model.buffer is not None):
+            return False
+        # Learning origins read the neuron's curr on every tick they fire
+        for synapse in neuron.sin:
+            if synapse.origin is not None and synapse.origin.synapse_model.lr != 0:
+                return False
+        firing_model = neuron.firing_model
+        threshold_model = neuron.threshold_model
+        s, p = synapse_model.get_synapses_in()
+        ins = 0 if p == 0 else s/p
+        potential = neuron.potential
+        t_max = firing_model.t_max
+        output = synapse_model.threshold
+        curr = neuron.curr
+        activation_time = neuron.activation_time
+        threshold = threshold_model.curr_threshold
+        firing = curr >= output
+        dt = self.dt
+        states = []
+        wake = None
+        for k in range(1, self.horizon):
+            t = curr_time + dt
+            resting = activation_time < 0
+            if not resting:
+                activation_time += t - curr_time
+            curr_time = t
+            if(activation_time < 0):
+                c = ins
+                if(c < 0):
+                    c = 0
+            else:
+                c = (curr + s)/(potential + p)
+            new_threshold = threshold_model.threshold_at(activation_time)
+            if(c >= new_threshold):
+                activation_time = 0
+            if(activation_time > t_max):
+                activation_time = -1
+            new_curr = firing_model.curr_val(activation_time)
+            if (new_curr >= output) != firing:
+                wake = self.ticks + k
+                break
+            if resting and activation_time < 0 and new_curr == curr and new_threshold == threshold:
+                break
+            states.append((curr_time, activation_time, new_curr, new_threshold))
+            curr = new_curr
+            threshold = new_threshold
+        else:
+            wake = self.ticks + self.horizon
+        if wake == self.ticks + 1:
+            # The output switches on the next tick anyway
+            return False
+        plan = _Plan(self.ticks, states, wake)
+        self._plans[index] = plan
+        if wake is not None:
+            heapq.heappush(self._wakes, (wake, self._count, index, plan))
+            self._count += 1
+        return True
+
+    def step(self, curr_time):
+        """
+        Updates every neuron whose state could change at curr_time. With a fixed
+        timestep, a curr_time several ticks ahead runs each tick in between.
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        """
+
+        if self.dt is None or self._time is None:
+            self._step_tick(curr_time)
+            return
+        dt = self.dt
+        # A time off the grid of ticks cannot use the fast-forwarded states
+        grid = self._time
+        while grid < curr_time:
+            grid = grid + dt
+        if curr_time <= self._time or grid != curr_time:
+            self.sync()
+            self._step_tick(curr_time)
+            return
+        t = self._time + dt
+        while True:
+            if t == curr_time:
+                self._step_tick(t)
+                return
+            # Ticks with nothing due are skipped outright
+            if (self.active or (self._events and self._events[0][0] <= t) or
+                    (self._wakes and self._wakes[0][0] <= self.ticks)):
+                self._step_tick(t)
+            else:
+                self._time = t
+                self.ticks += 1
+            t = t + dt
+
+    def _step_tick(self, curr_time):
+        while self._events and self._events[0][0] <= curr_time:
+            _, _, synapse, value = heapq.heappop(self._events)
+            self.set_input(synapse, value)
+        wakes = self._wakes
+        while wakes and wakes[0][0] <= self.ticks:
+            _, _, index, plan = heapq.heappop(wakes)
+            if self._plans.get(index) is plan:
+                self._restore(index, self.ticks - 1)
+                self.active.add(index)
+
+        # Neurons are updated in list order. A neuron woken by an earlier neuron
+        # in the same step is still updated this step, as it would be in a full
+        # sweep, while one woken by a later neuron waits for the next step.
+        pending = list(self.active)
+        heapq.heapify(pending)
+        self.active = set()
+        done = set()
+        plan = self.dt is not None
+        while pending:
+            i = heapq.heappop(pending)
+            if i in done:
+                continue
+            done.add(i)
+            self._position = i
+            neuron = self.neurons[i]
+            was_active = neuron.activation_time >= 0
+            neuron.update_inputs(curr_time)
+            before = [synapse.value for synapse in neuron.sout]
+            neuron.update_outputs()
+            self.updates += 1
+            for synapse, value in zip(neuron.sout, before):
+                if synapse.value != value and synapse.dest is not None:
+                    j = self._indices.get(id(synapse.dest))
+                    if j is None:
+                        continue
+                    self._restore(j, self._last_tick(j))
+                    if j > i and j not in done:
+                        heapq.heappush(pending, j)
+                    else:
+                        self.active.add(j)
+            # A neuron that has just returned to rest still needs one update with
+            # its resting input before it can be skipped
+            if (was_active or neuron.activation_time >= 0 or
+                    neuron.synapse_model.lr != 0):
+                # A neuron that has woken itself has a new input to see first
+                if not (plan and i not in self.active and self._plan(i, curr_time)):
+                    self.active.add(i)
+        self._position = -1
+        self._time = curr_time
+        self.ticks += 1
+
+    def __repr__(self):
+        return ("EventScheduler(" + "Neurons:" + str(len(self.neurons)) +
+                ", " + "Active:" + str(len(self.active)) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
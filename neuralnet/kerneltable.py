@@ -0,0 +1,132 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+# Tables are shared by every model with the same parameters
+_TABLES = {}
+
+
+class KernelTable:
+    """
+    A firing or threshold waveform sampled once per tick of a fixed timestep
+
+    Entry k holds the waveform at the activation time reached after k ticks of
+    dt, accumulated the same way a neuron accumulates its activation time, so
+    a lookup matches evaluating the waveform directly up to the rounding of the
+    clock.
+
+    Attributes
+    ----------
+    dt : float
+        The timestep the waveform is sampled at
+    values : list
+        The waveform at each integer phase, as Python floats
+    array : ndarray
+        The waveform at each integer phase, for vectorized lookups
+
+    Methods
+    -------
+    phase(activation_time)
+        Returns the integer phase of an activation time
+    lookup(activation_time)
+        Returns the waveform at an array of activation times
+    """
+
+    def __init__(self, kernel, t_max, dt):
+        """
+        Parameters
+        ----------
+        kernel : callable
+            Returns the waveform at a given activation time
+        t_max : float
+            The activation time past which the waveform is no longer needed
+        dt : float
+            The timestep the waveform is sampled at
+        """
+
+        if dt <= 0:
+            raise ValueError("Timestep must be positive")
+        self.dt = dt
+        times = [0]
+        while times[-1] <= t_max:
+            times.append(times[-1] + dt)
+        self.values = [kernel(t) for t in times]
+        self.array = np.array(self.values, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.values)
+
+    def phase(self, activation_time):
+        """
+        Returns the integer phase, clamped to the table, of an activation time
+
+        Parameters
+        ----------
+        activation_time : float
+            The point of time within the current firing cycle of the neuron
+
+        Returns
+        -------
+        int
+            The index of the nearest sampled activation time
+        """
+
+        index = int(activation_time/self.dt + 0.5)
+        if index < 0:
+            return 0
+        if index >= len(self.values):
+            return len(self.values) - 1
+        return index
+
+    def __call__(self, activation_time):
+        return self.values[self.phase(activation_time)]
+
+    def lookup(self, activation_time):
+        """
+        Returns the waveform at an array of activation times
+
+        Parameters
+        ----------
+        activation_time : ndarray
+            Points of time within a firing cycle
+
+        Returns
+        -------
+        ndarray
+            The waveform at the phase of each activation time
+        """
+
+        index = np.floor(activation_time/self.dt + 0.5).astype(np.intp)
+        return self.array[np.clip(index, 0, len(self.values) - 1)]
+
+
+def kernel_table(key, kernel, t_max, dt):
+    """
+    Returns the shared table for key, building it from kernel if it does not exist
+
+    Parameters
+    ----------
+    key : tuple
+        The kernel and every parameter the waveform depends on, including dt
+    kernel : callable
+        Returns the waveform at a given activation time
+    t_max : float
+        The activation time past which the waveform is no longer needed
+    dt : float
+        The timestep the waveform is sampled at
+
+    Returns
+    -------
+    KernelTable
+        The table for key
+    """
+
+    table = _TABLES.get(key)
+    if table is None:
+        table = KernelTable(kernel, t_max, dt)
+        _TABLES[key] = table
+    return table
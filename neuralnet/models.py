@@ -0,0 +1,163 @@
+import math
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+# The registered model names. The index of a name is the integer code stored per
+# neuron in a NeuronPopulation, so names are only ever appended.
+FIRING_MODELS = []
+THRESHOLD_MODELS = []
+# The array kernel of each registered model, in the same order as the names
+FIRING_KERNELS = []
+THRESHOLD_KERNELS = []
+# The scalar kernel of each registered model, by name
+_FIRING = {}
+_THRESHOLD = {}
+
+
+def _register(names, kernels, scalars, name, kernel, array_kernel):
+    if array_kernel is None:
+        array_kernel = np.vectorize(kernel, otypes=[np.float64])
+    scalars[name] = kernel
+    if name in names:
+        kernels[names.index(name)] = array_kernel
+    else:
+        names.append(name)
+        kernels.append(array_kernel)
+
+def _resolve(scalars, name, kind):
+    kernel = scalars.get(name)
+    if kernel is None:
+        raise ValueError("Unknown " + kind + " model type '" + str(name) + "'")
+    return kernel
+
+
+def register_firing_model(name, kernel, array_kernel = None):
+    """
+    Registers a firing model that Neurons and NeuronPopulations can use by name
+
+    A firing kernel returns the neuronal current of an active neuron. Neurons
+    created with dt tabulate the kernel at unit potential and scale the table
+    by their potential, so the kernel should be proportional to potential.
+
+    Parameters
+    ----------
+    name : str
+        The model type the kernel is registered as. Registering an existing name
+        replaces its kernels for models created afterwards.
+    kernel : callable
+        kernel(activation_time, potential, fire, t_max, precision) returning the
+        current at a float activation_time >= 0
+    array_kernel : callable, optional
+        The same function over arrays with one entry per neuron. Defaults to
+        kernel vectorized element by element.
+    """
+
+    _register(FIRING_MODELS, FIRING_KERNELS, _FIRING, name, kernel, array_kernel)
+
+def register_threshold_model(name, kernel, array_kernel = None):
+    """
+    Registers a threshold model that Neurons and NeuronPopulations can use by name
+
+    A threshold kernel returns the threshold of a neuron during its firing
+    cycle. It is only called while the activation time is positive; at other
+    times the threshold is the resting threshold. Neurons created with dt
+    tabulate the kernel at a threshold of 0 as g and use threshold +
+    (1-threshold)*g, so the kernel should have that form.
+
+    Parameters
+    ----------
+    name : str
+        The model type the kernel is registered as. Registering an existing name
+        replaces its kernels for models created afterwards.
+    kernel : callable
+        kernel(activation_time, threshold, t_max) returning the threshold at a
+        float activation_time > 0
+    array_kernel : callable, optional
+        The same function over arrays with one entry per neuron. Defaults to
+        kernel vectorized element by element.
+    """
+
+    _register(THRESHOLD_MODELS, THRESHOLD_KERNELS, _THRESHOLD, name, kernel, array_kernel)
+
+def firing_kernel(name):
+    """
+    Returns the scalar kernel of a registered firing model
+
+    Parameters
+    ----------
+    name : str
+        The model type
+
+    Returns
+    -------
+    callable
+        kernel(activation_time, potential, fire, t_max, precision)
+
+    Raises
+    ------
+    ValueError
+        If no firing model is registered under name
+    """
+
+    return _resolve(_FIRING, name, 'firing')
+
+def threshold_kernel(name):
+    """
+    Returns the scalar kernel of a registered threshold model
+
+    Parameters
+    ----------
+    name : str
+        The model type
+
+    Returns
+    -------
+    callable
+        kernel(activation_time, threshold, t_max)
+
+    Raises
+    ------
+    ValueError
+        If no threshold model is registered under name
+    """
+
+    return _resolve(_THRESHOLD, name, 'threshold')
+
+
+def _neg_exp(activation_time, potential, fire, t_max, precision):
+    # This model is p_0*e^(-beta*t)
+    beta = math.log(1-precision)/t_max
+    return potential*math.exp(beta*activation_time)
+
+def _neg_exp_array(activation_time, potential, fire, t_max, precision):
+    beta = np.log(1-precision)/t_max
+    return potential*np.exp(beta*activation_time)
+
+def _alpha(activation_time, potential, fire, t_max, precision):
+    # This model is p_0*a*t*e^(1-at) which better models the action potential
+    # a is chosen such that the peak of the function occurs at fire/2
+    # since the peak is at t = 1/a, then a = 2/fire
+    alpha = 2/fire
+    return potential*alpha*activation_time*math.exp(1-alpha*activation_time)
+
+def _alpha_array(activation_time, potential, fire, t_max, precision):
+    alpha = 2/fire
+    return potential*alpha*activation_time*np.exp(1-alpha*activation_time)
+
+def _linear(activation_time, threshold, t_max):
+    return threshold + (1-threshold)*(1-activation_time/t_max)
+
+def _quadratic(activation_time, threshold, t_max):
+    return threshold + (1-threshold)*(1-(activation_time/t_max)**2)
+
+
+register_firing_model('neg_exp', _neg_exp, _neg_exp_array)
+register_firing_model('alpha', _alpha, _alpha_array)
+# The threshold kernels only use arithmetic, so they work on floats and arrays alike
+register_threshold_model('linear', _linear, _linear)
+register_threshold_model('quadratic', _quadratic, _quadratic)
@@ -0,0 +1,468 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.population import NeuronPopulation
+from AML.neuralnet.synapsematrix import SynapseMatrix
+from AML.neuralnet.profiling import DISABLED
+from AML.neuralnet.reorder import rcm_order
+
+
+class Network:
+    """
+    A network of spiking neurons whose neuron state lives in a NeuronPopulation
+    and whose synapses live in a SynapseMatrix
+
+    Bound Neuron and Synapse objects act as views into the network's arrays, and
+    connect() registers new synapses between bound neurons with the network.
+
+    Attributes
+    ----------
+    population : NeuronPopulation
+        The state and parameters of the network's neurons
+    synapses : SynapseMatrix
+        The network's synapses
+    neurons : list
+        The Neuron bound to each index of the population, or None
+    monitors : list
+        Objects whose record(network) method is called after every step, such as
+        a Recorder
+    stimuli : list
+        Objects whose apply(network, curr_time) method is called at the start of
+        every step to set external inputs, such as a Stimulus
+    profiler : Profiler
+        Times the aggregate, transmit, learn and monitor phases of a step, along
+        with the phases of the population's step. Disabled unless set.
+    ids : ndarray
+        The user-facing id of the neuron stored at each index. Ids are the
+        indices the neurons were created with and only differ from them after
+        reorder.
+
+    Methods
+    -------
+    from_neurons(neurons, dt, dtype, weight_dtype)
+        Creates a network from Neuron objects and the synapses between them
+    from_edges(size, origin, dest, threshold, ...)
+        Creates a network from arrays of synapses and neuron parameters
+    add_neuron(neuron)
+        Binds a Neuron and its existing synapses to the network
+    add_synapse(synapse)
+        Binds a Synapse between neurons of the network to the network
+    remove_synapse(synapse)
+        Unbinds a Synapse from the network
+    prune(max_weight)
+        Disconnects every synapse whose weight has decayed to max_weight
+    reorder(order)
+        Permutes the storage of the neurons to cluster connected neurons
+    indices(ids)
+        Returns the storage index of each user-facing neuron id
+    step(curr_time)
+        Advances the whole network to curr_time
+    update_inputs(curr_time)
+        Aggregates the synaptic inputs of every neuron and advances them to curr_time
+    update_outputs()
+        Updates the output of every neuron to its synaptic outputs
+    """
+
+    def __init__(self, population = None, synapses = None):
+        """
+        Parameters
+        ----------
+        population : NeuronPopulation, optional
+            The neurons of the network
+        synapses : SynapseMatrix, optional
+            The synapses of the network
+        """
+
+        if population is None:
+            population = NeuronPopulation()
+        if synapses is None:
+            synapses = SynapseMatrix(len(population), population.dtype)
+        self.population = population
+        self.population.network = self
+        self.synapses = synapses
+        self.monitors = []
+        self.stimuli = []
+        self.profiler = DISABLED
+        self._ids = None
+        self._indices = None
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        self._profiler = profiler
+        self.population.profiler = profiler
+
+    @classmethod
+    def from_neurons(cls, neurons, dt = None, dtype = np.float64, weight_dtype = None):
+        """
+        Creates a network from Neuron objects and the synapses between them. The
+        neurons and their synapses become views into the network.
+
+        Parameters
+        ----------
+        neurons : list
+            The Neuron objects of the network, in index order
+        dt : float, optional
+            The fixed timestep the network will be stepped at, to evaluate the
+            neuron models from shared tables
+        dtype : numpy.dtype, optional
+            The type to store neuron and synapse state as, float64 or float32. See
+            NeuronPopulation and SynapseMatrix for the error bounds of float32.
+        weight_dtype : numpy.dtype, optional
+            The type to store synaptic weights as, float64, float32, float16 or
+            int8. Defaults to dtype. int8 weights cover [-1, 1].
+
+        Returns
+        -------
+        Network
+            The new network
+        """
+
+        population = NeuronPopulation.from_neurons(neurons, dt, dtype)
+        network = cls(population, SynapseMatrix(len(population), dtype, weight_dtype))
+        for neuron in neurons:
+            # Weight decay and input aggregation are done by the network from now on
+            neuron.synapse_model.lazy = False
+            neuron.synapse_model.incremental = False
+        # Synapses are added in the order of each neuron's sin so that rows
+        # are summed in the same order as Synapse_Model.get_synapses_in
+        for neuron in neurons:
+            for synapse in neuron.sin:
+                network.add_synapse(synapse)
+        for neuron in neurons:
+            for synapse in neuron.sout:
+                if synapse.dest is None:
+                    network.add_synapse(synapse)
+        network.synapses.compile()
+        return network
+
+    @classmethod
+    def from_edges(cls, size, origin, dest, threshold, sign = 1, weight = 1, potential = 1,
+                   value = 0, delay = 1, dt = None, dtype = np.float64, weight_dtype = None,
+                   **kwargs):
+        """
+        Creates a network from arrays describing every synapse and neuron, without
+        creating any Neuron or Synapse objects. Every argument other than size is
+        either a scalar shared by all synapses (or neurons) or an array with one
+        entry per synapse (or neuron). Synapse ids follow the order of the arrays.
+
+        Parameters
+        ----------
+        size : int
+            The number of neurons
+        origin : array_like
+            The index of the neuron connected to the input of each synapse, or -1
+            for an external input
+        dest : array_like
+            The index of the neuron connected to the output of each synapse, or -1
+        threshold : array_like
+            The value of input at which each neuron goes from being inactive to active
+        sign : array_like, optional
+            Whether each synapse is inhibitory (-1) or excitory (+1)
+        weight : array_like, optional
+            The value that weights the output of each synapse
+        potential : array_like, optional
+            The highest possible value (in magnitude) of each synapse
+        value : array_like, optional
+            The starting value of each synapse
+        delay : array_like, optional
+            The transmission delay of each synapse in ticks
+        dt : float, optional
+            The fixed timestep the network will be stepped at
+        dtype : numpy.dtype, optional
+            The type to store neuron and synapse state as, float64 or float32
+        weight_dtype : numpy.dtype, optional
+            The type to store synaptic weights as, float64, float32, float16 or
+            int8. Defaults to dtype. See SynapseMatrix for the error bound of each.
+        **kwargs
+            The per-neuron parameters accepted by NeuronPopulation.from_arrays, and
+            the weight_scale of int8 weights
+
+        Returns
+        -------
+        Network
+            The new network
+        """
+
+        origin = np.asarray(origin, dtype=np.intp)
+        dest = np.asarray(dest, dtype=np.intp)
+        if len(origin) != len(dest):
+            raise ValueError("origin and dest must have the same length")
+        if (origin >= size).any() or (dest >= size).any() or (origin < -1).any() or \
+                (dest < -1).any():
+            raise ValueError("Synapse endpoints must be neuron indices or -1")
+        weight_scale = kwargs.pop('weight_scale', None)
+        population = NeuronPopulation.from_arrays(size, threshold, dt=dt, dtype=dtype,
+                                                  **kwargs)
+        synapses = SynapseMatrix.from_arrays(size, origin, dest, value, potential, sign,
+                                             weight, delay=delay, dtype=dtype,
+                                             weight_dtype=weight_dtype,
+                                             weight_scale=weight_scale)
+        return cls(population, synapses)
+
+    @property
+    def neurons(self):
+        return self.population.neurons
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            return np.arange(len(self.population))
+        return self._ids
+
+    def indices(self, ids):
+        """
+        Returns the storage index of each user-facing neuron id, the index into the
+        population's arrays and the synapse matrix's origin and dest
+
+        Parameters
+        ----------
+        ids : array_like
+            Neuron ids, as passed to from_edges or returned by add_neuron before
+            any reorder
+
+        Returns
+        -------
+        ndarray
+            The storage index of each id
+        """
+
+        ids = np.asarray(ids, dtype=np.intp)
+        if self._ids is None:
+            return ids
+        return self._indices[ids]
+
+    def reorder(self, order = None):
+        """
+        Permutes the storage of the neurons, and with it the rows of the synapse
+        matrix, so that connected neurons sit close together in memory and the
+        gather of presynaptic values touches fewer cache lines. Synapse ids, the
+        order each row is summed in and therefore every result are unchanged.
+        Arrays such as population.curr and Recorder output are in storage order
+        afterwards; ids maps them back to user-facing ids.
+
+        Parameters
+        ----------
+        order : array_like, optional
+            The current index of the neuron to place at each new index. Defaults
+            to a reverse Cuthill-McKee ordering of the synapses.
+
+        Returns
+        -------
+        ndarray
+            The order applied
+        """
+
+        matrix = self.synapses
+        if matrix.dirty:
+            matrix.compile()
+        if order is None:
+            order = rcm_order(len(self.population), matrix.origin, matrix.dest)
+        order = np.asarray(order, dtype=np.intp)
+        self.population.permute(order)
+        matrix.permute(order)
+        self._set_ids(self.ids[order])
+        return order
+
+    def _set_ids(self, ids):
+        self._ids = ids
+        self._indices = np.empty(len(ids), dtype=np.intp)
+        self._indices[ids] = np.arange(len(ids))
+
+    def __len__(self):
+        return len(self.population)
+
+    def _index_of(self, neuron):
+        if neuron is None:
+            return -1
+        if neuron.population is not self.population:
+            raise ValueError("Neuron does not belong to this network")
+        return neuron._index
+
+    def add_neuron(self, neuron):
+        """
+        Binds a Neuron to the network along with any of its synapses whose other
+        end already belongs to the network
+
+        Parameters
+        ----------
+        neuron : Neuron
+            The neuron to be added
+
+        Returns
+        -------
+        int
+            The index of the neuron within the network
+        """
+
+        index = self.population.bind(neuron)
+        if self._ids is not None:
+            # Ids stay a permutation of the indices, so a new neuron gets the next one
+            self._set_ids(np.append(self._ids, len(self._ids)))
+        neuron.synapse_model.lazy = False
+        neuron.synapse_model.incremental = False
+        self.synapses.resize(len(self.population))
+        for synapse in list(neuron.sin) + list(neuron.sout):
+            if synapse.matrix is None:
+                ends = (synapse.origin, synapse.dest)
+                if all(end is None or end.population is self.population for end in ends):
+                    self.add_synapse(synapse)
+        return index
+
+    def add_synapse(self, synapse, delay = 1):
+        """
+        Binds a Synapse to the network, making its value, potential, sign and
+        weight views into the network's SynapseMatrix
+
+        Parameters
+        ----------
+        synapse : Synapse
+            The synapse to be added. Its origin and dest must be None or neurons of
+            the network, and at least one of them a neuron.
+        delay : int, optional
+            The number of ticks the synapse's output takes to reach its dest
+        """
+
+        if synapse.matrix is not None:
+            raise ValueError("Synapse is already bound to a network")
+        if synapse.origin is None and synapse.dest is None:
+            raise ValueError("Synapse has no neuron to bind it to a network")
+        origin = self._index_of(synapse.origin)
+        dest = self._index_of(synapse.dest)
+        synapse._id = self.synapses.add(origin, dest, synapse.value, synapse.potential,
+                                        synapse.sign, synapse.weight, delay)
+        synapse._decay_mark = -1
+
+    def remove_synapse(self, synapse):
+        """
+        Removes a Synapse from the network's SynapseMatrix. The synapse keeps its
+        last value, potential, sign and weight but stays in the sin and sout lists
+        of its neurons; disconnect() removes it from both.
+
+        Parameters
+        ----------
+        synapse : Synapse
+            The synapse to be removed. It must be bound to this network.
+        """
+
+        if synapse.matrix is not self.synapses:
+            raise ValueError("Synapse is not bound to this network")
+        synapse_id = synapse._id
+        self._unbind(synapse)
+        self.synapses.remove(synapse_id)
+
+    def _unbind(self, synapse):
+        # The arrays still hold synapses queued for removal, so unbinding never
+        # forces a compile
+        matrix = self.synapses
+        fields = [matrix.get(synapse._id, field)
+                  for field in ('value', 'potential', 'sign', 'weight')]
+        synapse._id = -1
+        synapse.value, synapse.potential, synapse.sign, synapse.weight = fields
+
+    def prune(self, max_weight = 0):
+        """
+        Disconnects every synapse with an origin whose weight is at or below
+        max_weight, such as the synapses whose Hebbian weight has decayed to 0, so
+        the network stops carrying dead edges. Bound Synapse objects are removed
+        from their neurons' sin and sout lists as well.
+
+        Parameters
+        ----------
+        max_weight : float, optional
+            The weight at or below which a synapse is removed
+
+        Returns
+        -------
+        ndarray
+            The ids of the removed synapses
+        """
+
+        matrix = self.synapses
+        ids = matrix.prune(max_weight)
+        # Bound Synapse objects are found through the sout lists of the pruned
+        # synapses' origins, before the matrix drops them
+        removed = set(ids.tolist())
+        origins = np.unique(matrix.origin[matrix.position[ids]])
+        for index in origins.tolist():
+            neuron = self.population.neurons[index]
+            if neuron is None:
+                continue
+            for synapse in list(neuron.sout):
+                if synapse.matrix is matrix and synapse._id in removed:
+                    self._unbind(synapse)
+                    neuron.remove_sout(synapse)
+                    if synapse.dest is not None:
+                        synapse.dest.remove_sin(synapse)
+        matrix.compile()
+        return ids
+
+    def update_inputs(self, curr_time):
+        """
+        Aggregates the synaptic inputs of every neuron with one pass over the
+        synapse matrix and advances every neuron to curr_time
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        """
+
+        with self._profiler.phase('aggregate'):
+            s, p = self.synapses.aggregate()
+        self.population.step(curr_time, s, p)
+
+    def update_outputs(self):
+        """
+        Updates the output of every neuron to its synaptic outputs, then applies the
+        Hebbian learning rule to every synapse at once if any neuron has a nonzero
+        learning rate
+        """
+
+        population = self.population
+        profiler = self._profiler
+        with profiler.phase('transmit'):
+            fired = self.synapses.transmit(population.curr, population.synapse_threshold)
+        if population.learning_rate.any():
+            with profiler.phase('learn'):
+                self.synapses.learn(fired, population.curr, population.potential,
+                                    population.learning_rate)
+
+    def step(self, curr_time):
+        """
+        Advances the whole network to curr_time, equivalent to calling
+        update_inputs(curr_time) on every neuron followed by update_outputs()
+        on every neuron. Stimuli are applied first and monitors record last.
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        """
+
+        if self.stimuli:
+            with self._profiler.phase('stimuli'):
+                for stimulus in self.stimuli:
+                    stimulus.apply(self, curr_time)
+        self.update_inputs(curr_time)
+        self.update_outputs()
+        if self.monitors:
+            with self._profiler.phase('monitors'):
+                for monitor in self.monitors:
+                    monitor.record(self)
+
+    def __repr__(self):
+        return ("Network(" + "Neurons:" + str(len(self.population)) +
+                ", " + "Synapses:" + str(len(self.synapses)) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
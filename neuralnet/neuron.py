@@ -1,16 +1,45 @@
-import math
 import sys,os
+import math
 
 p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 if not (p in sys.path):
     sys.path.insert(0,p)
 
 from AML.neuralnet.synapse import Synapse
+from AML.neuralnet.kerneltable import kernel_table
+from AML.neuralnet.models import firing_kernel, threshold_kernel
+
+# Shared model parameter records, keyed by their kernel and every parameter they
+# hold, so that re-registering a model gives later neurons new records
+_SHARED = {}
+
+def _shared(cls, key, *args, **kwargs):
+    record = _SHARED.get((cls, key))
+    if record is None:
+        record = cls(*args, **kwargs)
+        record._frozen = True
+        _SHARED[(cls, key)] = record
+    return record
+
+class _Shareable:
+    # Records handed out by _shared are read-only, since every neuron with the
+    # same parameters holds the same instance
+    __slots__ = ('_frozen',)
+
+    def __setattr__(self, name, value):
+        if getattr(self, '_frozen', False):
+            raise AttributeError("A shared " + type(self).__name__ + " is read-only")
+        object.__setattr__(self, name, value)
 
-class Firing_Model:
+class Firing_Model(_Shareable):
     """
     The model that describes how the neuron will fire given that it is activated
 
+    A Firing_Model holds no per-neuron state, so neurons with identical firing
+    parameters share one instance created by Firing_Model.shared. Setting an
+    attribute of a shared instance raises an AttributeError. The model type is
+    resolved to its registered kernel once, when the model is created.
+
     Attributes
     ----------
     model_type : str
@@ -26,24 +55,33 @@ class Firing_Model:
     precision: float
         The margin of error within which we want the neuron's baseline to be reached
         Note, this is only used in certain models.
-    activation_time : float
-        The point of time within the current firing cycle of the neuron
-        If it is -1, then the neuron is inactive
     potential : float
         The maximum value the neuronal current is to reach
+    dt : float
+        The fixed timestep the model is tabulated at, or None if it is evaluated directly
+    table : KernelTable
+        The unit-potential waveform sampled at every tick of dt, or None
+    kernel : callable
+        The kernel registered for model_type, see register_firing_model
 
     Methods
     -------
+    shared(model_type, **kwargs)
+        Returns the Firing_Model shared by every neuron with the same parameters
     curr_val(activation_time)
         Returns the current value of the neuronal current based on the given activation time
     """
+
+    __slots__ = ('model_type', 'fire', 'refract', 't_max', 'precision', 'potential', 'dt',
+                 'table', 'kernel')
     
     def __init__(self, model_type='alpha', **kwargs):
         """
         Parameters
         ----------
         model_type : str, optional
-            Describes the type of firing model for this Firing_Model instance
+            Describes the type of firing model for this Firing_Model instance. It must be
+            registered with register_firing_model, or a ValueError is raised.
         **fire : float, optional
             Specifies the duration of time it takes for the neuronal current to reach its peak and return
             approximately to baseline
@@ -53,21 +91,53 @@ class Firing_Model:
         **precision: float, optional
             Specifies the margin of error within which we want the neuron's baseline to be reached
             Note, this is only used in certain models
-        **activation_time : float, optional
-            Describes the point of time within the firing cycle of the neuron which we are in
-            currently
-            If it is -1, then the neuron is inactive
         **potential : float, optional
             Specifies the maximum value the neuronal current is to reach
+        **dt : float, optional
+            Specifies a fixed timestep at which to tabulate the waveform. The table is
+            shared by every Firing_Model with the same type, fire, refract, precision
+            and dt, and is indexed by the activation time's integer phase.
         """
         
         self.model_type = model_type
+        self.kernel = firing_kernel(model_type)
         self.fire = kwargs.get('fire', 2)
         self.refract = kwargs.get('refract', 4)
         self.t_max = self.fire + self.refract
         self.precision = kwargs.get('precision', 0.97)
-        self.activation_time = kwargs.get('activation_time', -1)
         self.potential = kwargs.get('potential', 1)
+        self.dt = kwargs.get('dt', None)
+        self.table = None
+        if self.dt is not None:
+            unit = Firing_Model(model_type, fire=self.fire, refract=self.refract,
+                                precision=self.precision)
+            self.table = kernel_table(('firing', self.kernel, self.fire, self.refract,
+                                       self.precision, self.dt),
+                                      unit.curr_val, self.t_max, self.dt)
+
+    @classmethod
+    def shared(cls, model_type='alpha', **kwargs):
+        """
+        Returns the Firing_Model shared by every caller with the same parameters,
+        creating it on first use
+
+        Parameters
+        ----------
+        model_type : str, optional
+            Describes the type of firing model
+        **kwargs
+            The optional parameters accepted by Firing_Model
+
+        Returns
+        -------
+        Firing_Model
+            The shared, read-only model
+        """
+
+        key = (firing_kernel(model_type), kwargs.get('fire', 2), kwargs.get('refract', 4),
+               kwargs.get('precision', 0.97), kwargs.get('potential', 1),
+               kwargs.get('dt', None))
+        return _shared(cls, key, model_type, **kwargs)
         
     def curr_val(self, activation_time = -1):
         """
@@ -85,19 +155,113 @@ class Firing_Model:
             The neuronal current as a function of the model's type, parameters, and activation time
         """
         
-        self.activation_time = activation_time
-        if(self.activation_time < 0):
+        if(activation_time < 0):
             return 0
-        if self.model_type == 'neg_exp':
-            # This model is p_0*e^(-beta*t)
-            beta = math.log(1-self.precision)/self.t_max
-            return self.potential*math.exp(beta*self.activation_time)
-        elif self.model_type == 'alpha':
-            # This model is p_0*a*t*e^(1-at) which better models the action potential
-            # a is chosen such that the peak of the function occurs at self.fire/2
-            # since the peak is at t = 1/a, then a = 2/self.fire
-            alpha = 2/self.fire
-            return self.potential*alpha*self.activation_time*math.exp(1-alpha*self.activation_time)
+        if self.table is not None:
+            values = self.table.values
+            phase = int(activation_time/self.dt + 0.5)
+            if phase >= len(values):
+                phase = len(values) - 1
+            return self.potential*values[phase]
+        return self.kernel(activation_time, self.potential, self.fire, self.t_max,
+                           self.precision)
+
+
+class Threshold_Shape(_Shareable):
+    """
+    The parameters of a threshold curve that do not depend on the neuron's threshold
+
+    Neurons whose threshold curves have the same type and timing share one
+    Threshold_Shape created by Threshold_Shape.shared. Setting an attribute of a
+    shared instance raises an AttributeError.
+
+    Attributes
+    ----------
+    model_type : str
+        A string describing the type of threshold model
+    fire : float
+        The duration of time it takes for the neuronal current to reach its peak and return
+        approximately to baseline
+    refract : float
+        The duration of time it takes after firing until the threshold for activation returns to
+        baseline
+    t_max: float
+        The total duration of time it takes of the neuron to fire and return to baseline
+    dt : float
+        The fixed timestep the curve is tabulated at, or None if it is evaluated directly
+    table : KernelTable
+        The threshold curve of a zero threshold sampled at every tick of dt, or None
+    kernel : callable
+        The kernel registered for model_type, see register_threshold_model
+
+    Methods
+    -------
+    shared(model_type, fire, refract, dt)
+        Returns the Threshold_Shape shared by every neuron with the same parameters
+    """
+
+    __slots__ = ('model_type', 'fire', 'refract', 't_max', 'dt', 'table', 'kernel')
+
+    def __init__(self, model_type, fire=2, refract=4, dt=None):
+        """
+        Parameters
+        ----------
+        model_type : str
+            A string describing the type of threshold model. It must be registered with
+            register_threshold_model, or a ValueError is raised.
+        fire : float, optional
+            Defines the duration of time it takes for the neuronal current to reach its peak and return
+            approximately to baseline
+        refract : float, optional
+            The duration of time it takes after firing until the threshold for activation returns to
+            baseline
+        dt : float, optional
+            Specifies a fixed timestep at which to tabulate the threshold curve. The table is
+            shared by every Threshold_Shape with the same type, fire, refract and dt.
+        """
+
+        self.model_type = model_type
+        self.kernel = threshold_kernel(model_type)
+        self.fire = fire
+        self.refract = refract
+        self.t_max = fire + refract
+        self.dt = dt
+        self.table = None
+        if dt is not None:
+            # The curve of threshold t is t + (1-t)*g, so tabulating g = the curve
+            # of a zero threshold serves every threshold
+            unit = Threshold_Model(model_type, 0, fire, refract)
+            def shape(activation_time):
+                unit.update_threshold(activation_time)
+                return unit.curr_threshold
+            self.table = kernel_table(('threshold', self.kernel, fire, refract, dt),
+                                      shape, self.t_max, dt)
+
+    @classmethod
+    def shared(cls, model_type, fire=2, refract=4, dt=None):
+        """
+        Returns the Threshold_Shape shared by every caller with the same parameters,
+        creating it on first use
+
+        Parameters
+        ----------
+        model_type : str
+            A string describing the type of threshold model
+        fire : float, optional
+            The duration of the firing phase
+        refract : float, optional
+            The duration of the refractory phase
+        dt : float, optional
+            The fixed timestep at which to tabulate the threshold curve
+
+        Returns
+        -------
+        Threshold_Shape
+            The shared, read-only shape
+        """
+
+        return _shared(cls, (threshold_kernel(model_type), fire, refract, dt),
+                       model_type, fire, refract, dt)
 
 
 class Threshold_Model:
@@ -113,6 +277,8 @@ class Threshold_Model:
     curr_threshold : float
         The current value of the threshold, which may vary as a function of the activation
         time
+    shape : Threshold_Shape
+        The shared parameters of the threshold curve
     fire : float
         The duration of time it takes for the neuronal current to reach its peak and return
         approximately to baseline
@@ -121,14 +287,22 @@ class Threshold_Model:
         baseline
     t_max: float
         The total duration of time it takes of the neuron to fire and return to baseline
+    dt : float
+        The fixed timestep the model is tabulated at, or None if it is evaluated directly
+    table : KernelTable
+        The threshold curve of a zero threshold sampled at every tick of dt, or None
 
     Methods
     -------
     update_threshold(activation_time)
         Modifies the model's current threshold based on the model type and parameters
+    threshold_at(activation_time)
+        Returns the threshold at a point of a firing cycle
     """
+
+    __slots__ = ('threshold', 'curr_threshold', 'shape')
     
-    def __init__(self, model_type, threshold, fire=2, refract=4):
+    def __init__(self, model_type, threshold, fire=2, refract=4, dt=None):
         """
         Parameters
         ----------
@@ -142,14 +316,38 @@ class Threshold_Model:
         refract : float, optional
             The duration of time it takes after firing until the threshold for activation returns to
             baseline
+        dt : float, optional
+            Specifies a fixed timestep at which to tabulate the threshold curve. The table is
+            shared by every Threshold_Model with the same type, fire, refract and dt.
         """
         
-        self.model_type = model_type
         self.threshold = threshold
         self.curr_threshold = threshold
-        self.fire = fire
-        self.refract = refract
-        self.t_max = self.fire + self.refract
+        self.shape = Threshold_Shape.shared(model_type, fire, refract, dt)
+
+    @property
+    def model_type(self):
+        return self.shape.model_type
+
+    @property
+    def fire(self):
+        return self.shape.fire
+
+    @property
+    def refract(self):
+        return self.shape.refract
+
+    @property
+    def t_max(self):
+        return self.shape.t_max
+
+    @property
+    def dt(self):
+        return self.shape.dt
+
+    @property
+    def table(self):
+        return self.shape.table
         
     def update_threshold(self, activation_time):
         """
@@ -163,20 +361,96 @@ class Threshold_Model:
             If it is -1, then the neuron is inactive
         """
         
-        if self.model_type == 'linear':
-            if(activation_time > 0):
-                self.curr_threshold = (self.threshold +
-                                 (1-self.threshold)*(1-activation_time/
-                                                (self.t_max)))
-            else:
-                self.curr_threshold = self.threshold
-        elif self.model_type == 'quadratic':
-            if(activation_time > 0):
-                self.curr_threshold = (self.threshold +
-                                 (1-self.threshold)*(1-(activation_time/
-                                                (self.t_max))**2))
-            else:
-                self.curr_threshold = self.threshold
+        self.curr_threshold = self.threshold_at(activation_time)
+
+    def threshold_at(self, activation_time):
+        """
+        Returns the threshold at a point of a firing cycle without modifying the model
+
+        Parameters
+        ----------
+        activation_time : float
+            The point of time within the current firing cycle of the neuron
+            If it is -1, then the neuron is inactive
+
+        Returns
+        -------
+        float
+            The threshold for activation
+        """
+
+        shape = self.shape
+        if shape.table is not None:
+            return self.threshold + (1-self.threshold)*shape.table(activation_time)
+        elif(activation_time > 0):
+            return shape.kernel(activation_time, self.threshold, shape.t_max)
+        return self.threshold
+
+def _decayed(weight, lr, ticks):
+    """
+    Applies ticks of the eager decay rule, weight = max(weight - lr, 0), rounding
+    exactly as the eager rule does but without stepping through every tick. Within
+    a binade every subtraction rounds lr to the same multiple of the weight's ulp,
+    so a whole run of ticks is one exact subtraction, and once the ulp of the weight
+    is no larger than that of lr every subtraction is exact. The cost grows with the
+    number of binades crossed instead of the number of ticks.
+
+    Parameters
+    ----------
+    weight : float
+        The synaptic weight
+    lr : float
+        The amount subtracted per tick
+    ticks : int
+        The number of ticks
+
+    Returns
+    -------
+    float
+        The decayed weight, equal to the weight the eager rule would reach
+    """
+
+    # A few ticks are cheaper to replay
+    if ticks <= 8 or not (lr > 0 and math.isfinite(lr) and math.isfinite(weight)):
+        for _ in range(ticks):
+            weight = weight - lr
+            if weight < 0:
+                return 0
+        return weight
+    weight = float(weight)
+    while ticks > 0:
+        if weight <= lr:
+            # The subtraction reaches 0, and the clamp holds it there
+            return 0.0 if weight == lr and ticks == 1 else 0
+        ulp = math.ulp(weight)
+        if ulp <= math.ulp(lr):
+            left = round(weight/ulp) - ticks*round(lr/ulp)
+            return left*ulp if left >= 0 else 0
+        bottom = math.ldexp(0.5, math.frexp(weight)[1])
+        units = lr/ulp
+        whole = math.floor(units)
+        # Halfway cases round to even and so alternate, and are stepped singly
+        if units - whole != 0.5:
+            step = whole + (units - whole > 0.5)
+            # The number of ticks after the first that stay in the binade
+            room = round((weight - bottom)/ulp) - math.ceil(units)
+            if room >= 0:
+                if step == 0:
+                    return weight
+                n = min(room//step + 1, ticks)
+                weight = weight - n*step*ulp
+                ticks -= n
+                continue
+        weight = weight - lr
+        ticks -= 1
+    return weight
+
+# How a Synapse_Model applies the weight decay of silent ticks: eagerly to every
+# synaptic output, or lazily, with the outputs either still to be zeroed or
+# already zeroed since the neuron last fired
+_EAGER = 0
+_LAZY = 1
+_LAZY_ZEROED = 2
 
 class Synapse_Model:
     """
@@ -192,14 +466,37 @@ class Synapse_Model:
         A list of synaptic inputs to the neuron
     sout : list
         A list of synaptic outputs from the neuron
+    lazy : bool
+        Whether the weight decay of silent ticks is deferred until a weight is read
+    incremental : bool
+        Whether the sums of the synaptic inputs are kept up to date as their values
+        change instead of being recomputed on every update
+    silent_ticks : int
+        The number of updates so far in which the neuron's current was below threshold
+    buffer : list
+        If not None, synaptic output values are appended to this list as (synapse,
+        value) pairs instead of being written to the synapses, so they can be
+        swapped in once every neuron has been updated
 
     Methods
     -------
-    update_threshold(activation_time)
-        Modifies the model's current threshold based on the model type and parameters
+    get_synapses_in()
+        Aggregates the input current and potential from the neuron's synaptic inputs
+    push(old, new)
+        Updates the input sums for a synaptic input whose value changed
+    invalidate()
+        Discards the input sums so they are recomputed on the next update
+    update_synapses_out(curr)
+        Updates the neuron's synaptic outputs and their weights
+    track(synapse)
+        Starts tracking the pending decay of a new synaptic output
+    catch_up(synapse)
+        Applies the decay a synaptic output has missed since it was last touched
     """
+
+    __slots__ = ('threshold', 'lr', 'sin', 'sout', 'silent_ticks', 'buffer', '_decay', '_inputs')
     
-    def __init__(self, threshold, lr, sin, sout):
+    def __init__(self, threshold, lr, sin, sout, lazy=False, incremental=False):
         """
         Parameters
         ----------
@@ -211,29 +508,167 @@ class Synapse_Model:
             Specifies the list of synaptic inputs to the neuron
         sout : list
             Specifies the list of synaptic outputs from the neuron
+        lazy : bool, optional
+            Defers the weight decay of silent ticks until each weight is next read or
+            potentiated, instead of visiting every synaptic output on every silent tick
+        incremental : bool, optional
+            Keeps the sums of the synaptic inputs up to date as their values change,
+            so that an update costs O(1) instead of O(len(sin))
         """
         
         self.threshold = threshold
         self.lr = lr
         self.sin = sin
         self.sout = sout
+        self.silent_ticks = 0
+        self.buffer = None
+        self._decay = _EAGER
+        self.lazy = lazy
+        self._inputs = None
+        self.incremental = incremental
+
+    @property
+    def lazy(self):
+        return self._decay != _EAGER
+
+    @lazy.setter
+    def lazy(self, lazy):
+        if lazy and self._decay == _EAGER:
+            self._decay = _LAZY
+            for synapse in self.sout:
+                self.track(synapse)
+        elif not lazy and self._decay != _EAGER:
+            # Settle the decay owed so far, since later silent ticks decay the
+            # weights directly
+            for synapse in self.sout:
+                if synapse._decay_mark >= 0:
+                    self.catch_up(synapse)
+                    synapse._decay_mark = -1
+            self._decay = _EAGER
+
+    @property
+    def incremental(self):
+        return self._inputs is not None
+
+    @incremental.setter
+    def incremental(self, incremental):
+        # The sum of the values, the sum of the potentials (None until computed),
+        # the number of nonzero values and the number of changes pushed since the
+        # sums were last computed exactly
+        if not incremental:
+            self._inputs = None
+        elif self._inputs is None:
+            self._inputs = [0, None, 0, 0]
+
+    def track(self, synapse):
+        """
+        Starts tracking the pending decay of a new synaptic output of a lazy model
+
+        Parameters
+        ----------
+        synapse : Synapse
+            The synaptic output
+        """
+        
+        if self._decay != _EAGER:
+            synapse._decay_mark = self.silent_ticks
+            # The new synapse's value must be zeroed on the next silent tick
+            self._decay = _LAZY
+
+    def catch_up(self, synapse):
+        """
+        Applies to a synaptic output the decay of every silent tick since it was last
+        touched, with the same result as the eager rule applying it one tick at a time
+
+        Parameters
+        ----------
+        synapse : Synapse
+            The synaptic output
+        """
+        
+        pending = self.silent_ticks - synapse._decay_mark
+        if pending <= 0:
+            return
+        synapse._decay_mark = self.silent_ticks
+        if self.lr == 0:
+            return
+        synapse.weight = _decayed(synapse.weight, self.lr, pending)
         
     def get_synapses_in(self):
         """
         Aggregates the input current and potential based on the input from the neuron's synaptic inputs.
 
+        If the model is incremental, the sums pushed since they were last computed
+        are returned instead. The sums are recomputed exactly here after synaptic
+        inputs are added or removed, and after len(sin) pushed changes, so they
+        differ from summing the inputs by at most one rounding per change since,
+        and are exactly 0 whenever every input is 0.
+
         Returns
         -------
         tuple
             A tuple of the aggregated synapse values and the aggregated synapse potentials
         """
         
+        inputs = self._inputs
+        if inputs is not None and inputs[1] is not None:
+            return (inputs[0], inputs[1])
         s = 0
         p = 0
+        if inputs is None:
+            for synapse in self.sin:
+                s += synapse.value
+                p += synapse.potential
+            return (s,p)
+        nonzero = 0
         for synapse in self.sin:
-            s += synapse.value
+            value = synapse.value
+            s += value
             p += synapse.potential
+            if value != 0:
+                nonzero += 1
+        inputs[0] = s
+        inputs[1] = p
+        inputs[2] = nonzero
+        inputs[3] = 0
         return (s,p)
+
+    def push(self, old, new):
+        """
+        Updates the sums of an incremental model for a synaptic input whose value
+        changed. Called by the synapse.
+
+        Parameters
+        ----------
+        old : float
+            The synapse's previous value
+        new : float
+            The synapse's new value
+        """
+        
+        inputs = self._inputs
+        if inputs is None or inputs[1] is None:
+            return
+        nonzero = inputs[2] + (new != 0) - (old != 0)
+        inputs[2] = nonzero
+        inputs[3] += 1
+        if nonzero == 0:
+            # Every input is 0 again, so the exact sum is known
+            inputs[0] = 0
+        elif inputs[3] >= len(self.sin):
+            # Bounds the rounding error, at O(1) per change on average
+            inputs[1] = None
+        else:
+            inputs[0] += new - old
+
+    def invalidate(self):
+        """
+        Discards the sums of an incremental model, so that they are recomputed from
+        the synaptic inputs on the next update
+        """
+        
+        if self._inputs is not None:
+            self._inputs[1] = None
     
     def update_synapses_out(self, curr):
         """
@@ -246,12 +681,17 @@ class Synapse_Model:
             The neuronal current
         """
         
+        buffer = self.buffer
         if curr >= self.threshold:
             for synapse in self.sout:
                 # Currently outputs an output of unit size
                 # i.e. value/potential = potential/potential
                 # Inhibitory vs excitory represented by synapse.sign
-                synapse.value = synapse.sign*synapse.potential*synapse.weight
+                value = synapse.sign*synapse.potential*synapse.weight
+                if buffer is None:
+                    synapse.value = value
+                else:
+                    buffer.append((synapse, value))
                 # Strengthen synaptic weight each time the connected neurons fire together
                 # by the Hebbian learning rule
                 # i.e. neurons that fire together wire together
@@ -260,10 +700,25 @@ class Synapse_Model:
                 synapse.weight += self.lr*firing_correlation
                 if synapse.weight > 1:
                     synapse.weight = 1
+            if self._decay == _LAZY_ZEROED:
+                self._decay = _LAZY
+        elif self._decay != _EAGER:
+            # The decay of this tick is applied when each weight is next read
+            self.silent_ticks += 1
+            if self._decay == _LAZY:
+                for synapse in self.sout:
+                    if buffer is None:
+                        synapse.value = 0
+                    else:
+                        buffer.append((synapse, 0))
+                self._decay = _LAZY_ZEROED
         else:
             for synapse in self.sout:
                 # Weaken synaptic weight each time synapse doesn't fire
-                synapse.value = 0
+                if buffer is None:
+                    synapse.value = 0
+                else:
+                    buffer.append((synapse, 0))
                 synapse.weight = synapse.weight - self.lr
                 if synapse.weight < 0:
                     synapse.weight = 0
@@ -291,6 +746,9 @@ class Neuron:
         The model describing the behavior of how the neuron fires when it is activated.
     curr_time : float
         The time in ms from the point of reference of the neuron.
+    population : NeuronPopulation
+        The population whose arrays hold this neuron's potential, curr,
+        activation_time and curr_time, or None if the neuron stores them itself.
 
     Methods
     -------
@@ -311,7 +769,18 @@ class Neuron:
         Removes the specified synapse from the neuron's synaptic inputs
     remove_sout(synapse)
         Removes the specified synapse from the neuron's synaptic outputs
+
+    Each synapse remembers its slot in the sin list of its dest and the sout list
+    of its origin, so adding and removing a synapse are both O(1). Removing a
+    synapse moves the last synapse of the list into its slot, so removals do not
+    preserve the order of the remaining synapses.
     """
+
+    # Subclasses that do not declare __slots__ still get a __dict__ for their own
+    # attributes
+    __slots__ = ('_population', '_index', 'sout', 'sin', '_potential', '_curr',
+                 '_activation_time', '_curr_time', 'threshold_model', 'firing_model',
+                 'synapse_model')
     
     def __init__(self, threshold, init_time = 0,**kwargs):
         """
@@ -344,29 +813,124 @@ class Neuron:
         **synapse_lr : float, optional
             Defines the amount by which synaptic weights are modified for each timestep
             If the value is 0, the synaptic weights do not change
+        **dt : float, optional
+            Specifies the fixed timestep the neuron will be stepped at. If given, the firing
+            and threshold models are evaluated from tables shared between neurons.
+        **lazy_decay : bool, optional
+            Defers the weight decay of the neuron's synaptic outputs while it is silent
+            until each weight is next read. The weights are identical to eager decay.
+        **incremental_inputs : bool, optional
+            Keeps running sums of the neuron's synaptic inputs that each synapse
+            updates when its value changes, so that aggregating the inputs costs
+            O(1) per update instead of O(len(sin)). The sums may differ from
+            summing the inputs in order by a few roundings, see
+            Synapse_Model.get_synapses_in.
         """
         
+        # A neuron owns its state until it is bound to a NeuronPopulation,
+        # after which potential, curr, activation_time and curr_time are views
+        # into the population's arrays
+        self._population = None
+        self._index = -1
         self.sout = kwargs.get('sout',[])
         self.sin = kwargs.get('sin',[])
-        self.potential = kwargs.get('potential',1)
+        for slot, synapse in enumerate(self.sout):
+            synapse._out_slot = slot
+        for slot, synapse in enumerate(self.sin):
+            synapse._in_slot = slot
+        self._potential = kwargs.get('potential',1)
         self.curr = 0
         # Note: set fire to 1 ms to make it biologically reasonable,
         # set refract to 3-4 ms to make it biologically reasonable
         fire = kwargs.get('fire', 2)
         refract = kwargs.get('refract', 4)
         # Threshold must be a number between 0 and 1
+        dt = kwargs.get('dt', None)
         threshold_model_type = kwargs.get('threshold_model', 'quadratic')
-        self.threshold_model = Threshold_Model(threshold_model_type, threshold, fire, refract)
+        self.threshold_model = Threshold_Model(threshold_model_type, threshold, fire, refract,
+                                               dt)
         precision = kwargs.get('precision', 0.97)
         self.activation_time = -1
         firing_model_type = kwargs.get('firing_model', 'alpha')
-        self.firing_model = Firing_Model(firing_model_type, potential=self.potential,
-                                         precision=precision, fire=fire, refract=refract,
-                                         activation_time=self.activation_time)
+        # Neurons with the same firing parameters share one Firing_Model
+        self.firing_model = Firing_Model.shared(firing_model_type, potential=self.potential,
+                                                precision=precision, fire=fire,
+                                                refract=refract, dt=dt)
         synapse_threshold = kwargs.get('synapse_threshold', 0.5)
         synapse_lr = kwargs.get('learning_rate', 0)
-        self.synapse_model = Synapse_Model(synapse_threshold, synapse_lr, self.sin, self.sout)
+        self.synapse_model = Synapse_Model(synapse_threshold, synapse_lr, self.sin, self.sout,
+                                           kwargs.get('lazy_decay', False),
+                                           kwargs.get('incremental_inputs', False))
         self.curr_time = init_time
+
+    @property
+    def potential(self):
+        if self._population is None:
+            return self._potential
+        return float(self._population.potential[self._index])
+
+    @potential.setter
+    def potential(self, value):
+        if self._population is None:
+            self._potential = value
+        else:
+            self._population.potential[self._index] = value
+        # The shared firing model is read-only, so the neuron switches to the one
+        # with the new potential, which curr_val and update_inputs scale by
+        model = self.firing_model
+        if model.potential != value:
+            self.firing_model = Firing_Model.shared(model.model_type, potential=value,
+                                                    precision=model.precision,
+                                                    fire=model.fire, refract=model.refract,
+                                                    dt=model.dt)
+
+    @property
+    def curr(self):
+        if self._population is None:
+            return self._curr
+        return float(self._population.curr[self._index])
+
+    @curr.setter
+    def curr(self, value):
+        if self._population is None:
+            self._curr = value
+        else:
+            self._population.curr[self._index] = value
+
+    @property
+    def activation_time(self):
+        if self._population is None:
+            return self._activation_time
+        return float(self._population.activation_time[self._index])
+
+    @activation_time.setter
+    def activation_time(self, value):
+        if self._population is None:
+            self._activation_time = value
+        else:
+            self._population.activation_time[self._index] = value
+
+    @property
+    def curr_time(self):
+        if self._population is None:
+            return self._curr_time
+        return float(self._population.curr_time[self._index])
+
+    @curr_time.setter
+    def curr_time(self, value):
+        if self._population is None:
+            self._curr_time = value
+        else:
+            self._population.curr_time[self._index] = value
+
+    @property
+    def population(self):
+        """
+        The NeuronPopulation this neuron is a view into, or None if the neuron
+        owns its own state
+        """
+        
+        return self._population
         
     def curr_val(self):
         """
@@ -450,7 +1014,9 @@ class Neuron:
             The synapse to be added
         """
         
+        synapse._in_slot = len(self.sin)
         self.sin.append(synapse)
+        self.synapse_model.invalidate()
 
     def add_sout(self,synapse):
         """
@@ -462,7 +1028,9 @@ class Neuron:
             The synapse to be added
         """
         
+        synapse._out_slot = len(self.sout)
         self.sout.append(synapse)
+        self.synapse_model.track(synapse)
 
     def remove_sin(self,synapse):
         """
@@ -474,8 +1042,14 @@ class Neuron:
             The synapse to be removed
         """
         
-        if(synapse in self.sin):
-            del(self.sin[index(synapse)])
+        slot = synapse._in_slot
+        if 0 <= slot < len(self.sin) and self.sin[slot] is synapse:
+            last = self.sin.pop()
+            if last is not synapse:
+                self.sin[slot] = last
+                last._in_slot = slot
+            synapse._in_slot = -1
+            self.synapse_model.invalidate()
 
     def remove_sout(self,synapse):
         """
@@ -487,8 +1061,18 @@ class Neuron:
             The synapse to be removed
         """
         
-        if(synapse in self.sout):
-            del(self.sout[index(synapse)])
+        slot = synapse._out_slot
+        if 0 <= slot < len(self.sout) and self.sout[slot] is synapse:
+            if synapse._decay_mark >= 0:
+                # Settle the decay owed so far, since the neuron's silent ticks
+                # no longer apply to the synapse
+                self.synapse_model.catch_up(synapse)
+                synapse._decay_mark = -1
+            last = self.sout.pop()
+            if last is not synapse:
+                self.sout[slot] = last
+                last._out_slot = slot
+            synapse._out_slot = -1
 
     def __repr__(self):
         return ("Neuron(" + "Curr:" + str(self.curr) +
@@ -498,6 +1082,15 @@ class Neuron:
     def __str__(self):
         return self.__repr__()
 
+def _network_of(neurons):
+    # The Network of the first of the neurons that belongs to one, or None
+    for neuron in neurons:
+        if neuron is not None and neuron.population is not None:
+            network = neuron.population.network
+            if network is not None:
+                return network
+    return None
+
 # TODO: Change parameters of connect to match Synapse constructor
 def connect(nout,nin,val,pot,**kwargs):
     """
@@ -510,10 +1103,44 @@ def connect(nout,nin,val,pot,**kwargs):
     nin : Neuron
         The neuron for which the output of the synapse will be the input
         of the neuron
+    
+    If either neuron belongs to a Network, the synapse is registered with the
+    network's SynapseMatrix, and a ValueError is raised if the other neuron
+    belongs to a different population. Only then may a delay in ticks other
+    than 1 be given with the delay keyword.
     """
+    delay = kwargs.get('delay', 1)
+    network = _network_of((nout, nin))
+    if delay != 1 and network is None:
+        raise ValueError("Only synapses between neurons of a Network can have delays")
     synapse = Synapse(val,pot,nout,nin,**kwargs)
+    if network is not None:
+        # Registered first, so that neither neuron is changed if the other one
+        # does not belong to the network
+        network.add_synapse(synapse, delay)
     if not(nout is None):
         nout.add_sout(synapse)
     if not(nin is None):
         nin.add_sin(synapse)
     return synapse
+
+def disconnect(synapse):
+    """
+    Removes a synapse from the neurons it connects in O(1).
+
+    Parameters
+    ----------
+    synapse : Synapse
+        The synapse to be removed
+
+    If the synapse belongs to a Network, it is also removed from the network's
+    SynapseMatrix and keeps its last value, potential, sign and weight.
+    """
+    if synapse.matrix is not None:
+        network = _network_of((synapse.origin, synapse.dest))
+        if network is not None:
+            network.remove_synapse(synapse)
+    if not(synapse.origin is None):
+        synapse.origin.remove_sout(synapse)
+    if not(synapse.dest is None):
+        synapse.dest.remove_sin(synapse)
@@ -0,0 +1,576 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import Firing_Model, Threshold_Model
+# The firing and threshold model types are indexed by the integer codes stored
+# per neuron, see AML.neuralnet.models
+from AML.neuralnet.models import (FIRING_MODELS, FIRING_KERNELS, THRESHOLD_MODELS,
+                                  THRESHOLD_KERNELS)
+from AML.neuralnet.profiling import DISABLED
+from AML.neuralnet.synapsematrix import STATE_DTYPES
+
+
+class NeuronPopulation:
+    """
+    A population of spiking neurons whose state is kept in contiguous arrays so
+    that the whole population can be advanced by a single call to step
+
+    The arithmetic of step mirrors Neuron.update_inputs element for element.
+    Neuron objects can be bound to a population, after which their potential,
+    curr, activation_time and curr_time are views into the population's arrays,
+    so code that reads or steps individual neurons keeps working.
+
+    The current, thresholds and parameters are stored as dtype, float64 or
+    float32, while curr_time and activation_time stay float64 so that the clock
+    does not drift and the model tables are read at the same phases. Inputs and
+    the new current are computed in float64 and rounded once when stored, so a
+    float32 population's current after a step differs from the float64 one fed
+    the same inputs by at most about 2**-22 (2.4e-7) relative, from rounding
+    the stored current, threshold and potential. A neuron whose current is
+    within that of its threshold may fire a tick earlier or later, after which
+    the two populations can diverge.
+
+    Attributes
+    ----------
+    neurons : list
+        The Neuron bound to each index of the population, or None for neurons
+        that were added without an object
+    network : Network
+        The network this population belongs to, if any
+    profiler : Profiler
+        Times the integrate, threshold and kernel phases of step. Disabled unless
+        set, usually by the population's Network.
+    dt : float
+        The fixed timestep the population is stepped at, or None. If given, the
+        firing and threshold models are evaluated from the same shared tables as
+        Neurons created with dt.
+    dtype : numpy.dtype
+        The type the neuron state and parameters other than the clock are stored as
+    curr_time : ndarray
+        The time in ms from the point of reference of each neuron
+    activation_time : ndarray
+        The point of time within the current firing cycle of each neuron.
+        If it is -1, then the neuron is inactive.
+    curr : ndarray
+        The current neuronal current of each neuron
+    curr_threshold : ndarray
+        The threshold of each neuron as of the last step
+    threshold : ndarray
+        The resting threshold of each neuron
+    potential : ndarray
+        The maximum value the neuronal current of each neuron is to reach
+    fire : ndarray
+        The firing duration of each neuron
+    refract : ndarray
+        The refractory duration of each neuron
+    t_max : ndarray
+        The total duration of each neuron's firing cycle
+    precision : ndarray
+        The precision of each neuron's firing model
+    synapse_threshold : ndarray
+        The current required for each neuron's outgoing synapses to be activated
+    learning_rate : ndarray
+        The amount by which each neuron's outgoing synaptic weights are modified
+        per time step
+    firing_model : ndarray
+        The index into FIRING_MODELS of each neuron's firing model
+    threshold_model : ndarray
+        The index into THRESHOLD_MODELS of each neuron's threshold model
+
+    Methods
+    -------
+    from_neurons(neurons, dt, dtype)
+        Creates a population with the given neurons bound to it
+    from_arrays(size, threshold, init_time, dt, **kwargs)
+        Creates a population from per-neuron parameter arrays
+    add(threshold, init_time, **kwargs)
+        Adds a neuron with the given parameters and returns its index
+    bind(neuron)
+        Copies the state of a Neuron into the population and makes it a view
+    take(indices)
+        Returns a new population holding copies of the given neurons
+    permute(order)
+        Reorders the neurons in place
+    replicate(copies)
+        Returns a new population whose arrays have a leading ensemble axis
+    state()
+        Returns the population's arrays by field name
+    load_state(state)
+        Overwrites the population's arrays with saved ones
+    gather_inputs()
+        Aggregates the synaptic inputs of the bound neurons
+    step(curr_time, s, p)
+        Advances every neuron in the population to curr_time
+    update_outputs()
+        Updates the synaptic outputs of the bound neurons
+    """
+
+    _CLOCK_FIELDS = ('curr_time', 'activation_time')
+    _FLOAT_FIELDS = ('curr', 'curr_threshold', 'threshold', 'potential', 'fire',
+                     'refract', 't_max', 'precision', 'synapse_threshold', 'learning_rate')
+    _CODE_FIELDS = ('firing_model', 'threshold_model')
+
+    def __init__(self, capacity = 16, dt = None, dtype = np.float64):
+        """
+        Parameters
+        ----------
+        capacity : int, optional
+            The number of neurons to allocate storage for up front
+        dt : float, optional
+            The fixed timestep the population will be stepped at, to evaluate the
+            models from tables
+        dtype : numpy.dtype, optional
+            The type to store the neuron state and parameters as, float64 or float32
+        """
+
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in STATE_DTYPES:
+            raise ValueError("dtype must be float64 or float32")
+        self.neurons = []
+        self.network = None
+        self.profiler = DISABLED
+        self.dt = dt
+        self._tables = None
+        self._size = 0
+        self._buffers = {}
+        for field in self._CLOCK_FIELDS:
+            self._buffers[field] = np.zeros(max(capacity, 1))
+        for field in self._FLOAT_FIELDS:
+            self._buffers[field] = np.zeros(max(capacity, 1), dtype=self.dtype)
+        for field in self._CODE_FIELDS:
+            self._buffers[field] = np.zeros(max(capacity, 1), dtype=np.int8)
+        self._update_views()
+
+    @classmethod
+    def from_neurons(cls, neurons, dt = None, dtype = np.float64):
+        """
+        Creates a population with the given neurons bound to it, in order
+
+        Parameters
+        ----------
+        neurons : list
+            The Neuron objects to bind
+        dt : float, optional
+            The fixed timestep the population will be stepped at
+        dtype : numpy.dtype, optional
+            The type to store the neuron state and parameters as
+
+        Returns
+        -------
+        NeuronPopulation
+            The new population
+        """
+
+        population = cls(len(neurons), dt, dtype)
+        for neuron in neurons:
+            population.bind(neuron)
+        return population
+
+    @classmethod
+    def from_arrays(cls, size, threshold, init_time = 0, dt = None, **kwargs):
+        """
+        Creates a population of size neurons in one call. Every parameter is either
+        a scalar shared by all neurons or an array with one entry per neuron.
+
+        Parameters
+        ----------
+        size : int
+            The number of neurons
+        threshold : array_like
+            The value of input at which each neuron goes from being inactive to active
+        init_time : array_like, optional
+            The starting time in ms from the reference point of each neuron
+        dt : float, optional
+            The fixed timestep the population will be stepped at
+        **kwargs
+            The same optional parameters accepted by Neuron. firing_model and
+            threshold_model may be a name or an array of names. dtype sets the
+            type to store the neuron state and parameters as.
+
+        Returns
+        -------
+        NeuronPopulation
+            The new population
+        """
+
+        population = cls(size, dt, kwargs.get('dtype', np.float64))
+        fire = np.broadcast_to(np.asarray(kwargs.get('fire', 2), dtype=np.float64), (size,))
+        refract = np.broadcast_to(np.asarray(kwargs.get('refract', 4), dtype=np.float64),
+                                  (size,))
+        values = {'curr_time': init_time, 'activation_time': -1, 'curr': 0,
+                  'curr_threshold': threshold, 'threshold': threshold,
+                  'potential': kwargs.get('potential', 1), 'fire': fire,
+                  'refract': refract, 't_max': fire + refract,
+                  'precision': kwargs.get('precision', 0.97),
+                  'synapse_threshold': kwargs.get('synapse_threshold', 0.5),
+                  'learning_rate': kwargs.get('learning_rate', 0),
+                  'firing_model': _model_codes(FIRING_MODELS,
+                                               kwargs.get('firing_model', 'alpha')),
+                  'threshold_model': _model_codes(THRESHOLD_MODELS,
+                                                  kwargs.get('threshold_model', 'quadratic'))}
+        for field, value in values.items():
+            population._buffers[field][:size] = value
+        population._size = size
+        population.neurons = [None]*size
+        population._update_views()
+        return population
+
+    def __len__(self):
+        return self._size
+
+    def _update_views(self):
+        # Public arrays are views of the first _size entries of the buffers
+        for field, buf in self._buffers.items():
+            setattr(self, field, buf[..., :self._size])
+
+    def _append(self, **values):
+        if self._size == len(self._buffers['curr']):
+            for field, buf in self._buffers.items():
+                grown = np.zeros(2*len(buf), dtype=buf.dtype)
+                grown[:self._size] = buf[:self._size]
+                self._buffers[field] = grown
+        index = self._size
+        for field, value in values.items():
+            self._buffers[field][index] = value
+        self._size += 1
+        self._update_views()
+        self._tables = None
+        return index
+
+    def _build_tables(self):
+        # Concatenate the table of every distinct parameter set and point each
+        # neuron at the start and last entry of its tables
+        params = np.stack((self.firing_model.ravel(), self.threshold_model.ravel(),
+                           self.fire.ravel(), self.refract.ravel(),
+                           self.precision.ravel()), axis=1)
+        unique, inverse = np.unique(params, axis=0, return_inverse=True)
+        firing, threshold = [], []
+        for firing_code, threshold_code, fire, refract, precision in unique:
+            firing.append(Firing_Model(FIRING_MODELS[int(firing_code)], fire=fire,
+                                       refract=refract, precision=precision,
+                                       dt=self.dt).table.array)
+            threshold.append(Threshold_Model(THRESHOLD_MODELS[int(threshold_code)], 0,
+                                             fire, refract, self.dt).table.array)
+        inverse = inverse.reshape(-1)
+        tables = {}
+        for name, arrays in (('firing', firing), ('threshold', threshold)):
+            lengths = np.array([len(a) for a in arrays], dtype=np.intp)
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.intp)
+            tables[name] = (np.concatenate(arrays),
+                            offsets[inverse].reshape(self.fire.shape),
+                            lengths[inverse].reshape(self.fire.shape) - 1)
+        self._tables = tables
+
+    def _lookup(self, name, activation_time):
+        values, offset, last = self._tables[name]
+        phase = np.floor(activation_time/self.dt + 0.5).astype(np.intp)
+        return values[offset + np.clip(phase, 0, last)]
+
+    def add(self, threshold, init_time = 0, **kwargs):
+        """
+        Adds a neuron to the population without creating a Neuron object
+
+        Parameters
+        ----------
+        threshold : float
+            Defines the value of input at which point the neuron goes from being inactive to active
+        init_time : float, optional
+            Defines the starting time in ms from the reference point of the neuron
+        **kwargs
+            The same optional parameters accepted by Neuron
+
+        Returns
+        -------
+        int
+            The index of the new neuron
+        """
+
+        fire = kwargs.get('fire', 2)
+        refract = kwargs.get('refract', 4)
+        index = self._append(curr_time=init_time, activation_time=-1, curr=0,
+                             curr_threshold=threshold, threshold=threshold,
+                             potential=kwargs.get('potential', 1),
+                             fire=fire, refract=refract, t_max=fire + refract,
+                             precision=kwargs.get('precision', 0.97),
+                             synapse_threshold=kwargs.get('synapse_threshold', 0.5),
+                             learning_rate=kwargs.get('learning_rate', 0),
+                             firing_model=_model_code(FIRING_MODELS,
+                                                      kwargs.get('firing_model', 'alpha')),
+                             threshold_model=_model_code(THRESHOLD_MODELS,
+                                                         kwargs.get('threshold_model',
+                                                                    'quadratic')))
+        self.neurons.append(None)
+        return index
+
+    def bind(self, neuron):
+        """
+        Copies the state and parameters of a Neuron into the population and makes
+        the neuron a view into the population's arrays
+
+        Parameters
+        ----------
+        neuron : Neuron
+            The neuron to bind
+
+        Returns
+        -------
+        int
+            The index of the neuron within the population
+        """
+
+        if neuron.population is not None:
+            raise ValueError("Neuron is already bound to a population")
+        firing_model = neuron.firing_model
+        threshold_model = neuron.threshold_model
+        index = self._append(curr_time=neuron.curr_time,
+                             activation_time=neuron.activation_time,
+                             curr=neuron.curr,
+                             curr_threshold=threshold_model.curr_threshold,
+                             threshold=threshold_model.threshold,
+                             potential=firing_model.potential,
+                             fire=firing_model.fire, refract=firing_model.refract,
+                             t_max=firing_model.t_max,
+                             precision=firing_model.precision,
+                             synapse_threshold=neuron.synapse_model.threshold,
+                             learning_rate=neuron.synapse_model.lr,
+                             firing_model=_model_code(FIRING_MODELS,
+                                                      firing_model.model_type),
+                             threshold_model=_model_code(THRESHOLD_MODELS,
+                                                         threshold_model.model_type))
+        self.neurons.append(neuron)
+        neuron._population = self
+        neuron._index = index
+        return index
+
+    def take(self, indices):
+        """
+        Returns a new population holding copies of the state and parameters of the
+        given neurons, without any bound Neuron objects
+
+        Parameters
+        ----------
+        indices : array_like
+            The indices of the neurons to copy, in their new order
+
+        Returns
+        -------
+        NeuronPopulation
+            The new population
+        """
+
+        indices = np.asarray(indices, dtype=np.intp)
+        population = type(self)(len(indices), self.dt, self.dtype)
+        for field in self._buffers:
+            population._buffers[field][:len(indices)] = getattr(self, field)[indices]
+        population._size = len(indices)
+        population.neurons = [None]*len(indices)
+        population._update_views()
+        return population
+
+    def permute(self, order):
+        """
+        Reorders the neurons in place so that the neuron at index order[i] moves
+        to index i. Bound neurons follow their state to the new index.
+
+        Parameters
+        ----------
+        order : array_like
+            The old index of the neuron placed at each new index, a permutation of
+            every index of the population
+        """
+
+        order = np.asarray(order, dtype=np.intp)
+        if (order.shape != (self._size,) or
+                not np.array_equal(np.sort(order), np.arange(self._size))):
+            raise ValueError("order must be a permutation of the population's indices")
+        for field, buf in self._buffers.items():
+            buf[..., :self._size] = buf[..., :self._size][..., order]
+        self.neurons = [self.neurons[i] for i in order.tolist()]
+        for index, neuron in enumerate(self.neurons):
+            if neuron is not None:
+                neuron._index = index
+        self._tables = None
+
+    def replicate(self, copies):
+        """
+        Returns a new population holding copies independent copies of this one. Its
+        arrays have a leading ensemble axis, so each array is indexed [copy, neuron],
+        and step advances every copy at once. Neurons cannot be added to it.
+
+        Parameters
+        ----------
+        copies : int
+            The number of copies
+
+        Returns
+        -------
+        NeuronPopulation
+            The new population
+        """
+
+        population = type(self)(1, self.dt, self.dtype)
+        for field, buf in self._buffers.items():
+            population._buffers[field] = np.repeat(buf[np.newaxis, :self._size],
+                                                   copies, axis=0)
+        population._size = self._size
+        population.neurons = [None]*self._size
+        population._update_views()
+        return population
+
+    def state(self):
+        """
+        Returns the population's state and parameter arrays by field name
+
+        Returns
+        -------
+        dict
+            The array of every field, without spare capacity
+        """
+
+        return {field: getattr(self, field) for field in self._buffers}
+
+    def load_state(self, state):
+        """
+        Overwrites the population's arrays with arrays returned by state(), resizing
+        the population to match and converting them to the population's dtype.
+        Bound neurons keep their indices.
+
+        Parameters
+        ----------
+        state : dict
+            The array of every field
+        """
+
+        size = state['curr'].shape[-1]
+        if self.neurons and size != self._size:
+            raise ValueError("Saved population does not match the bound neurons")
+        for field, buf in self._buffers.items():
+            self._buffers[field] = np.array(state[field], dtype=buf.dtype)
+        self._size = size
+        if not self.neurons:
+            self.neurons = [None]*size
+        self._update_views()
+        self._tables = None
+
+    def gather_inputs(self):
+        """
+        Aggregates the synaptic inputs of every bound neuron through its Synapse_Model
+        Neurons without an object receive no input.
+
+        Returns
+        -------
+        tuple
+            Arrays of the aggregated synapse values and the aggregated synapse potentials
+        """
+
+        s = np.zeros(self._size)
+        p = np.zeros(self._size)
+        for i, neuron in enumerate(self.neurons):
+            if neuron is not None:
+                s[i], p[i] = neuron.synapse_model.get_synapses_in()
+        return (s,p)
+
+    def step(self, curr_time, s = None, p = None):
+        """
+        Advances every neuron of the population to curr_time, equivalent to calling
+        update_inputs(curr_time) on each neuron
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        s : ndarray, optional
+            The aggregated synaptic input of each neuron. Gathered from the bound
+            neurons' synapses if not given.
+        p : ndarray, optional
+            The aggregated synaptic potential of each neuron
+        """
+
+        profiler = self.profiler
+        if s is None:
+            with profiler.phase('gather'):
+                s, p = self.gather_inputs()
+        at = self.activation_time
+
+        with profiler.phase('integrate'):
+            # Get change in time and advance the activation time of active neurons
+            deltatime = curr_time - self.curr_time
+            self.curr_time[:] = curr_time
+            np.add(at, deltatime, out=at, where=at >= 0)
+
+            # Normalize aggregated synaptic inputs. Resting neurons depend only on
+            # their inputs, active neurons on their current value and their inputs
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ins = np.where(p == 0, 0, s/np.where(p == 0, 1, p))
+                curr = np.where(at < 0, np.maximum(ins, 0),
+                                (self.curr + s)/(self.potential + p))
+
+        if self.dt is not None and self._tables is None and self._size > 0:
+            self._build_tables()
+
+        with profiler.phase('threshold'):
+            # Modify the threshold depending on recency of action potential
+            if self._tables is not None:
+                self.curr_threshold[:] = (self.threshold + (1-self.threshold)*
+                                          self._lookup('threshold', at))
+            else:
+                self.curr_threshold[:] = self.threshold
+                for code, kernel in enumerate(THRESHOLD_KERNELS):
+                    mask = (self.threshold_model == code) & (at > 0)
+                    if mask.any():
+                        self.curr_threshold[mask] = kernel(at[mask], self.threshold[mask],
+                                                           self.t_max[mask])
+
+            # Activate neurons over threshold, then deactivate those whose cycle ended
+            at[curr >= self.curr_threshold] = 0
+            at[at > self.t_max] = -1
+
+        with profiler.phase('kernel'):
+            if self._tables is not None:
+                self.curr[:] = np.where(at >= 0,
+                                        self.potential*self._lookup('firing', at), 0)
+            else:
+                self.curr[:] = 0
+                for code, kernel in enumerate(FIRING_KERNELS):
+                    mask = (self.firing_model == code) & (at >= 0)
+                    if mask.any():
+                        self.curr[mask] = kernel(at[mask], self.potential[mask],
+                                                 self.fire[mask], self.t_max[mask],
+                                                 self.precision[mask])
+
+    def update_outputs(self):
+        """
+        Updates the synaptic outputs of every bound neuron, equivalent to calling
+        update_outputs() on each neuron
+        """
+
+        for neuron in self.neurons:
+            if neuron is not None:
+                neuron.update_outputs()
+
+    def __repr__(self):
+        return ("NeuronPopulation(" + "Size:" + str(self._size) +
+                ", " + "Active:" + str(int((self.activation_time >= 0).sum())) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
+
+
+def _model_code(names, model_type):
+    if model_type not in names:
+        raise ValueError("Unknown model type '" + str(model_type) + "'")
+    return names.index(model_type)
+
+def _model_codes(names, model_types):
+    if isinstance(model_types, str):
+        return _model_code(names, model_types)
+    model_types = np.asarray(model_types)
+    unique, inverse = np.unique(model_types, return_inverse=True)
+    codes = np.array([_model_code(names, str(name)) for name in unique], dtype=np.int8)
+    return codes[inverse.reshape(model_types.shape)]
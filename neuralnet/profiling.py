@@ -0,0 +1,188 @@
+import json
+import time
+import sys,os
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+
+class _NullPhase:
+    # Returned by a disabled profiler, so timing a phase costs one method call
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler._stack
+        if stack:
+            self.name = stack[-1] + '/' + self.name
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self.start
+        profiler = self.profiler
+        profiler._stack.pop()
+        totals = profiler.totals.get(self.name)
+        if totals is None:
+            profiler.totals[self.name] = [elapsed, 1]
+        else:
+            totals[0] += elapsed
+            totals[1] += 1
+        return False
+
+
+class Profiler:
+    """
+    Accumulates the wall time and call count of named phases of a simulation
+
+    Phases are timed with `with profiler.phase(name):`. A phase entered inside
+    another is recorded under both names joined by '/', such as
+    'neural/aggregate', so the table shows where the time of each phase goes.
+    While the profiler is disabled, phase returns a shared object that does
+    nothing, so instrumented code costs one method call per phase.
+
+    A Network and a Scheduler time their own phases once a profiler is
+    assigned to their profiler attribute.
+
+    Attributes
+    ----------
+    enabled : bool
+        Whether phases are timed
+    totals : dict
+        The [seconds, calls] of each phase by name
+
+    Methods
+    -------
+    phase(name)
+        Returns a context manager that times a phase
+    reset()
+        Clears every total
+    report()
+        Returns the totals as a dict
+    table()
+        Returns the totals as a text table
+    dump(path)
+        Writes the totals as JSON
+    """
+
+    def __init__(self, enabled = True):
+        """
+        Parameters
+        ----------
+        enabled : bool, optional
+            Whether phases are timed
+        """
+
+        self.enabled = enabled
+        self.totals = {}
+        self._stack = []
+
+    def phase(self, name):
+        """
+        Returns a context manager that adds the time spent inside it to a phase
+
+        Parameters
+        ----------
+        name : str
+            The name of the phase
+
+        Returns
+        -------
+        object
+            The context manager
+        """
+
+        if not self.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def reset(self):
+        """
+        Clears every total
+        """
+
+        self.totals = {}
+        self._stack = []
+
+    def report(self):
+        """
+        Returns the totals of every phase
+
+        Returns
+        -------
+        dict
+            The calls, total_ms and mean_us of each phase by name
+        """
+
+        return {name: {'calls': calls, 'total_ms': 1000*seconds,
+                       'mean_us': 1e6*seconds/calls}
+                for name, (seconds, calls) in self.totals.items()}
+
+    def table(self):
+        """
+        Returns the totals as a text table, with each phase's share of the time of
+        its enclosing phase (or of every top-level phase)
+
+        Returns
+        -------
+        str
+            The table
+        """
+
+        top = sum(seconds for name, (seconds, calls) in self.totals.items() if '/' not in name)
+        rows = [('phase', 'calls', 'total ms', 'mean us', '%')]
+        for name in sorted(self.totals):
+            seconds, calls = self.totals[name]
+            parent = name.rpartition('/')[0]
+            whole = self.totals[parent][0] if parent in self.totals else top
+            share = 100*seconds/whole if whole > 0 else 0
+            rows.append((name, str(calls), '%.3f' % (1000*seconds),
+                         '%.3f' % (1e6*seconds/calls), '%.1f' % share))
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        lines = []
+        for row in rows:
+            lines.append('  '.join([row[0].ljust(widths[0])] +
+                                   [cell.rjust(width) for cell, width in zip(row[1:], widths[1:])]))
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """
+        Writes the totals returned by report as JSON
+
+        Parameters
+        ----------
+        path : str
+            The file to write
+        """
+
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def __repr__(self):
+        return ("Profiler(" + "Enabled:" + str(self.enabled) +
+                ", " + "Phases:" + str(len(self.totals)) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
+
+
+# Shared by everything that has not been given a profiler
+DISABLED = Profiler(enabled=False)
@@ -0,0 +1,245 @@
+import json
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+SPIKE_DTYPE = np.dtype([('tick', np.int64), ('neuron', np.int64)])
+
+
+class _Stream:
+    # A preallocated ring of rows that is appended to a binary file whenever it
+    # fills up, so recording never grows a Python list or reallocates
+    def __init__(self, path, dtype, shape, capacity):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self.ring = np.zeros((capacity,) + self.shape, dtype=self.dtype)
+        self.fill = 0
+        self.count = 0
+        open(path, 'wb').close()
+
+    def reserve(self, rows):
+        # Returns a view of the next rows of the ring, flushing first if needed
+        if self.fill + rows > len(self.ring):
+            self.flush()
+            if rows > len(self.ring):
+                self.ring = np.zeros((rows,) + self.shape, dtype=self.dtype)
+        view = self.ring[self.fill:self.fill + rows]
+        self.fill += rows
+        return view
+
+    def flush(self):
+        if self.fill == 0:
+            return
+        offset = self.count*self.ring[0].nbytes
+        with open(self.path, 'r+b') as f:
+            f.truncate(offset + self.fill*self.ring[0].nbytes)
+        out = np.memmap(self.path, dtype=self.dtype, mode='r+', offset=offset,
+                        shape=(self.fill,) + self.shape)
+        out[:] = self.ring[:self.fill]
+        out.flush()
+        del out
+        self.count += self.fill
+        self.fill = 0
+
+
+class Recorder:
+    """
+    Records spike events, and optionally sampled curr and activation_time of chosen
+    neurons, from a Network into binary files in a directory
+
+    Every step writes into preallocated ring buffers that are appended to
+    memory-mapped files in chunks of capacity rows, so recording allocates
+    almost nothing per step. A neuron spikes on the tick its activation_time is
+    reset to 0. For an EnsembleNetwork, neuron indices run over the flattened
+    [copy, neuron] arrays. Recordings are read back lazily with Recording.
+
+    Attributes
+    ----------
+    network : Network
+        The network being recorded
+    path : str
+        The directory the recording is written to
+    neurons : ndarray
+        The indices of the neurons whose state is sampled
+    sample_every : int
+        The number of ticks between state samples
+    ticks : int
+        The number of ticks recorded so far
+
+    Methods
+    -------
+    record(network)
+        Records the current tick of the network
+    flush()
+        Writes every buffered row and the metadata to disk
+    close()
+        Flushes and detaches the recorder from the network
+    """
+
+    def __init__(self, network, path, neurons = None, sample_every = 1, capacity = 65536):
+        """
+        Parameters
+        ----------
+        network : Network
+            The network to record. The recorder attaches itself as a monitor.
+        path : str
+            The directory to write the recording to. It is created if needed.
+        neurons : array_like, optional
+            The indices of the neurons whose curr and activation_time are sampled.
+            If not given, only spikes are recorded.
+        sample_every : int, optional
+            The number of ticks between state samples
+        capacity : int, optional
+            The number of rows buffered in memory per file before flushing
+        """
+
+        os.makedirs(path, exist_ok=True)
+        self.network = network
+        self.path = path
+        self.neurons = np.asarray([] if neurons is None else neurons, dtype=np.intp)
+        self.sample_every = max(int(sample_every), 1)
+        self.ticks = 0
+        size = network.population.activation_time.size
+        self._spiked = np.zeros(size, dtype=bool)
+        self._times = _Stream(os.path.join(path, 'times.bin'), np.float64, (), capacity)
+        self._spikes = _Stream(os.path.join(path, 'spikes.bin'), SPIKE_DTYPE, (), capacity)
+        self._samples = None
+        if len(self.neurons):
+            k = len(self.neurons)
+            self._samples = (_Stream(os.path.join(path, 'sample_ticks.bin'), np.int64, (),
+                                     capacity),
+                             _Stream(os.path.join(path, 'curr.bin'), np.float64, (k,),
+                                     capacity),
+                             _Stream(os.path.join(path, 'activation_time.bin'), np.float64,
+                                     (k,), capacity))
+        network.monitors.append(self)
+
+    def record(self, network):
+        """
+        Records the current tick of the network. Called by Network.step.
+
+        Parameters
+        ----------
+        network : Network
+            The network that was stepped
+        """
+
+        population = network.population
+        tick = self.ticks
+        self._times.reserve(1)[0] = population.curr_time.flat[0] if len(population) else 0
+        np.equal(population.activation_time.reshape(-1), 0, out=self._spiked)
+        spiked = np.flatnonzero(self._spiked)
+        if len(spiked):
+            rows = self._spikes.reserve(len(spiked))
+            rows['tick'] = tick
+            rows['neuron'] = spiked
+        if self._samples is not None and tick % self.sample_every == 0:
+            ticks, curr, activation_time = self._samples
+            ticks.reserve(1)[0] = tick
+            np.take(population.curr.reshape(-1), self.neurons, out=curr.reserve(1)[0])
+            np.take(population.activation_time.reshape(-1), self.neurons,
+                    out=activation_time.reserve(1)[0])
+        self.ticks += 1
+
+    def _streams(self):
+        streams = [self._times, self._spikes]
+        if self._samples is not None:
+            streams.extend(self._samples)
+        return streams
+
+    def flush(self):
+        """
+        Writes every buffered row and the metadata to disk
+        """
+
+        for stream in self._streams():
+            stream.flush()
+        meta = {'ticks': self.ticks, 'spikes': self._spikes.count,
+                'neurons': self.neurons.tolist(), 'sample_every': self.sample_every,
+                'samples': self._samples[0].count if self._samples is not None else 0}
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+
+    def close(self):
+        """
+        Flushes the recording and detaches the recorder from the network
+        """
+
+        self.flush()
+        if self in self.network.monitors:
+            self.network.monitors.remove(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class Recording:
+    """
+    A recording written by Recorder, read back lazily through memory maps
+
+    Attributes
+    ----------
+    times : ndarray
+        The time of each recorded tick
+    spikes : ndarray
+        The spike events, a structured array with 'tick' and 'neuron' fields
+    neurons : ndarray
+        The indices of the sampled neurons
+    sample_ticks : ndarray
+        The tick of each state sample
+    curr : ndarray
+        The sampled currents, indexed [sample, neuron]
+    activation_time : ndarray
+        The sampled activation times, indexed [sample, neuron]
+    """
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            The directory of the recording
+        """
+
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        self.path = path
+        self.neurons = np.asarray(meta['neurons'], dtype=np.intp)
+        self.sample_every = meta['sample_every']
+        self.times = self._map('times.bin', np.float64, (meta['ticks'],))
+        self.spikes = self._map('spikes.bin', SPIKE_DTYPE, (meta['spikes'],))
+        k = len(self.neurons)
+        self.sample_ticks = self._map('sample_ticks.bin', np.int64, (meta['samples'],))
+        self.curr = self._map('curr.bin', np.float64, (meta['samples'], k))
+        self.activation_time = self._map('activation_time.bin', np.float64,
+                                         (meta['samples'], k))
+
+    def _map(self, name, dtype, shape):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=shape)
+
+    def spike_train(self, neuron):
+        """
+        Returns the ticks at which a neuron spiked
+
+        Parameters
+        ----------
+        neuron : int
+            The index of the neuron
+
+        Returns
+        -------
+        ndarray
+            The ticks of the neuron's spikes, in order
+        """
+
+        return self.spikes['tick'][self.spikes['neuron'] == neuron]
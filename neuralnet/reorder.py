@@ -0,0 +1,122 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+
+def _adjacency(size, origin, dest):
+    # The undirected neighbours of every neuron as compressed rows, without
+    # external inputs, outputs or self-connections
+    origin = np.asarray(origin, dtype=np.intp)
+    dest = np.asarray(dest, dtype=np.intp)
+    keep = (origin >= 0) & (dest >= 0) & (origin != dest)
+    rows = np.concatenate((origin[keep], dest[keep]))
+    columns = np.concatenate((dest[keep], origin[keep]))
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(size + 1, dtype=np.intp)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength=size))
+    return indptr, columns[order]
+
+def rcm_order(size, origin, dest):
+    """
+    Returns a reverse Cuthill-McKee ordering of the neurons of a network, which
+    numbers connected neurons close together so that the synapses of each row
+    gather from nearby memory
+
+    Synapses are treated as undirected edges. Each connected component is
+    walked breadth first from a neuron of lowest degree, visiting the unvisited
+    neighbours of each neuron in order of increasing degree, one level of the
+    walk at a time. The resulting order is reversed, with neurons without
+    synapses placed first.
+
+    Parameters
+    ----------
+    size : int
+        The number of neurons
+    origin : array_like
+        The index of the neuron connected to the input of each synapse, or -1
+    dest : array_like
+        The index of the neuron connected to the output of each synapse, or -1
+
+    Returns
+    -------
+    ndarray
+        The old index of the neuron placed at each new index
+    """
+
+    indptr, neighbours = _adjacency(size, origin, dest)
+    degree = np.diff(indptr)
+    visited = np.zeros(size, dtype=bool)
+    order = np.empty(size, dtype=np.intp)
+    isolated = np.flatnonzero(degree == 0)
+    visited[isolated] = True
+    count = 0
+    # Candidate starting neurons, lowest degree first
+    starts = np.argsort(degree, kind='stable')
+    start = 0
+    while count < size - len(isolated):
+        while visited[starts[start]]:
+            start += 1
+        frontier = starts[start:start+1]
+        visited[frontier] = True
+        order[count] = frontier[0]
+        count += 1
+        while len(frontier):
+            # The neighbours of the frontier, in frontier order and then by degree
+            lengths = indptr[frontier+1] - indptr[frontier]
+            parents = np.repeat(np.arange(len(frontier)), lengths)
+            offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths,
+                                                           lengths)
+            found = neighbours[np.repeat(indptr[frontier], lengths) + offsets]
+            found_degree = degree[found]
+            ranked = np.lexsort((found, found_degree, parents))
+            found = found[ranked]
+            found = found[~visited[found]]
+            # Each neuron joins the level once, at its first discovery
+            _, first = np.unique(found, return_index=True)
+            frontier = found[np.sort(first)]
+            visited[frontier] = True
+            order[count:count+len(frontier)] = frontier
+            count += len(frontier)
+    order[count:] = isolated
+    return order[::-1].copy()
+
+def edge_span(origin, dest, order = None):
+    """
+    Returns the mean distance in memory between the two neurons of each synapse,
+    a measure of how scattered the gather of presynaptic values is
+
+    Parameters
+    ----------
+    origin : array_like
+        The index of the neuron connected to the input of each synapse, or -1
+    dest : array_like
+        The index of the neuron connected to the output of each synapse, or -1
+    order : array_like, optional
+        The old index of the neuron placed at each new index, to measure the span
+        after reordering
+
+    Returns
+    -------
+    float
+        The mean absolute difference of the endpoints of the synapses between
+        two neurons
+    """
+
+    origin = np.asarray(origin, dtype=np.intp)
+    dest = np.asarray(dest, dtype=np.intp)
+    keep = (origin >= 0) & (dest >= 0)
+    origin = origin[keep]
+    dest = dest[keep]
+    if order is not None:
+        order = np.asarray(order, dtype=np.intp)
+        inverse = np.empty(len(order), dtype=np.intp)
+        inverse[order] = np.arange(len(order))
+        origin = inverse[origin]
+        dest = inverse[dest]
+    if len(origin) == 0:
+        return 0.0
+    return float(np.abs(origin - dest).mean())
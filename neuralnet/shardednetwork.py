@@ -0,0 +1,320 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import time
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.synapsematrix import SynapseMatrix
+
+# Commands written to the shared control block by the main process
+_STEP = 0
+_COLLECT = 1
+_STOP = 2
+
+# Columns of the shared timing block, accumulated by each worker
+_STEP_TIME = 0
+_EXCHANGE_TIME = 1
+_TICKS = 2
+
+
+def _attach(name, shape):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _worker(shard, lo, hi, population, synapses, params, inputs, names, size,
+            shards, barrier, results):
+    # Each worker steps neurons [lo, hi) and the synapses that end in them. The
+    # synapse matrix keeps global neuron indices so it can read the currents of
+    # every origin straight from the shared buffer.
+    blocks = []
+    block, control = _attach(names['control'], (2,))
+    blocks.append(block)
+    block, curr = _attach(names['curr'], (2, size))
+    blocks.append(block)
+    block, input_values = _attach(names['inputs'], (max(len(inputs[0]), 1),))
+    blocks.append(block)
+    block, timing = _attach(names['timing'], (shards, 3))
+    blocks.append(block)
+    input_slots, input_ids = inputs
+    input_positions = synapses.position[input_ids]
+    synapse_threshold, potential, learning_rate = params
+    learning = learning_rate.any()
+    tick = 0
+    try:
+        while True:
+            barrier.wait()
+            command = int(control[0])
+            if command == _STOP:
+                break
+            if command == _COLLECT:
+                results.put((shard, population.curr_time, population.activation_time,
+                             population.curr, population.curr_threshold,
+                             synapses.ids, synapses.value, synapses.weight))
+                continue
+            start = time.perf_counter()
+            synapses.value[input_positions] = input_values[input_slots]
+            s, p = synapses.aggregate()
+            population.step(control[1], s[lo:hi], p[lo:hi])
+            # Currents alternate between two buffers so that writing this tick's
+            # currents never races with a slower shard reading the last tick's
+            front = curr[tick % 2]
+            front[lo:hi] = population.curr
+            exchange = time.perf_counter()
+            barrier.wait()
+            transmit = time.perf_counter()
+            fired = synapses.transmit(front, synapse_threshold)
+            if learning:
+                synapses.learn(fired, front, potential, learning_rate)
+            end = time.perf_counter()
+            timing[shard, _STEP_TIME] += exchange - start + end - transmit
+            timing[shard, _EXCHANGE_TIME] += transmit - exchange
+            timing[shard, _TICKS] += 1
+            tick += 1
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class ShardedNetwork:
+    """
+    Runs a Network across several worker processes, one shard of neurons each
+
+    Each worker owns a contiguous range of neurons and every synapse that ends in
+    one of them. On every tick the workers update their neurons and publish the
+    neurons' currents to a shared memory buffer. Once every shard has published,
+    each worker transmits and learns on its own synapses, reading the currents of
+    origins in other shards from the buffer. Exchanging one current per neuron
+    carries all the information the boundary synapses need, so the workers never
+    share synapse arrays. The results match Network.step.
+
+    External inputs (synapses without an origin) are set with set_input. The
+    state of the workers is copied back into the original network by collect.
+
+    Attributes
+    ----------
+    network : Network
+        The network being run
+    bounds : list
+        The (lo, hi) range of neuron indices of each shard
+    ticks : int
+        The number of ticks run so far
+
+    Methods
+    -------
+    set_input(synapse, value)
+        Sets the value of an input synapse for the following ticks
+    step(curr_time)
+        Advances every shard to curr_time
+    curr()
+        Returns the currents of every neuron as of the last tick
+    report()
+        Returns the mean step and exchange time of each shard
+    collect()
+        Copies the state of every shard back into the network
+    close()
+        Stops the workers and frees the shared memory
+    """
+
+    def __init__(self, network, shards = None, context = None):
+        """
+        Parameters
+        ----------
+        network : Network
+            The network to run. Its arrays are copied into the workers.
+        shards : int, optional
+            The number of worker processes. Defaults to the number of CPUs.
+        context : str, optional
+            The multiprocessing start method, such as 'fork' or 'spawn'
+        """
+
+        if shards is None:
+            shards = os.cpu_count() or 1
+        self.network = network
+        population = network.population
+        synapses = network.synapses
+        if synapses.dirty:
+            synapses.compile()
+        size = len(population)
+        shards = max(1, min(shards, size))
+        edges = np.linspace(0, size, shards + 1).astype(np.intp)
+        self.bounds = [(int(edges[i]), int(edges[i + 1])) for i in range(shards)]
+        self.ticks = 0
+
+        # Input synapses keep a slot in a shared buffer written by the main process
+        self._input_ids = synapses.ids[synapses.origin < 0]
+        self._input_slots = {int(i): slot for slot, i in enumerate(self._input_ids)}
+
+        self._blocks = {}
+        self._control = self._allocate('control', (2,))
+        self._curr = self._allocate('curr', (2, size))
+        self._inputs = self._allocate('inputs', (max(len(self._input_ids), 1),))
+        self._timing = self._allocate('timing', (shards, 3))
+        self._inputs[:len(self._input_ids)] = synapses.value[synapses.position[self._input_ids]]
+        names = {name: block.name for name, block in self._blocks.items()}
+
+        ctx = mp.get_context(context)
+        self._barrier = ctx.Barrier(shards + 1)
+        self._results = ctx.Queue()
+        params = (population.synapse_threshold.copy(), population.potential.copy(),
+                  population.learning_rate.copy())
+        # A synapse belongs to the shard of its dest, or of its origin if it has none
+        owner = np.where(synapses.dest >= 0, synapses.dest, synapses.origin)
+        self._processes = []
+        for shard, (lo, hi) in enumerate(self.bounds):
+            mask = (owner >= lo) & (owner < hi)
+            if shard == 0:
+                mask |= owner < 0
+            shard_synapses = SynapseMatrix.from_arrays(size, synapses.origin[mask],
+                                                       synapses.dest[mask],
+                                                       synapses.value[mask],
+                                                       synapses.potential[mask],
+                                                       synapses.sign[mask],
+                                                       synapses.decode_weight(
+                                                           synapses.weight[mask]),
+                                                       synapses.ids[mask],
+                                                       synapses.delay[mask],
+                                                       synapses.dtype,
+                                                       synapses.weight_dtype,
+                                                       synapses.weight_scale)
+            shard_inputs = synapses.ids[mask & (synapses.origin < 0)]
+            inputs = (np.array([self._input_slots[int(i)] for i in shard_inputs],
+                               dtype=np.intp), shard_inputs)
+            process = ctx.Process(target=_worker,
+                                  args=(shard, lo, hi, population.take(range(lo, hi)),
+                                        shard_synapses, params, inputs, names, size,
+                                        shards, self._barrier, self._results),
+                                  daemon=True)
+            process.start()
+            self._processes.append(process)
+
+    def _allocate(self, name, shape):
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(int(np.prod(shape)), 1)*8)
+        self._blocks[name] = block
+        array = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        array[:] = 0
+        return array
+
+    def _command(self, command, curr_time = 0):
+        self._control[0] = command
+        self._control[1] = curr_time
+        self._barrier.wait()
+
+    def set_input(self, synapse, value):
+        """
+        Sets the value of an input synapse, such as one created with
+        connect(None, neuron, ...), for the following ticks
+
+        Parameters
+        ----------
+        synapse : Synapse or int
+            The input synapse or its id in the network's SynapseMatrix
+        value : float
+            The new value of the synapse
+        """
+
+        synapse_id = synapse if isinstance(synapse, (int, np.integer)) else synapse._id
+        self._inputs[self._input_slots[int(synapse_id)]] = value
+
+    def step(self, curr_time):
+        """
+        Advances every shard to curr_time. Returns once every shard has published
+        its currents, while the shards finish transmitting in the background.
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        """
+
+        self._command(_STEP, curr_time)
+        self._barrier.wait()
+        self.ticks += 1
+
+    def curr(self):
+        """
+        Returns the currents of every neuron as of the last tick
+
+        Returns
+        -------
+        ndarray
+            A copy of the shared current buffer
+        """
+
+        return self._curr[(self.ticks - 1) % 2].copy()
+
+    def report(self):
+        """
+        Returns the mean time per tick each shard spent updating its neurons and
+        synapses and waiting for the other shards at the exchange
+
+        Returns
+        -------
+        list
+            A dict per shard with its neurons, step_ms and exchange_ms
+        """
+
+        report = []
+        for shard, (lo, hi) in enumerate(self.bounds):
+            ticks = max(float(self._timing[shard, _TICKS]), 1)
+            report.append({'shard': shard, 'neurons': hi - lo,
+                           'step_ms': 1000*float(self._timing[shard, _STEP_TIME])/ticks,
+                           'exchange_ms': 1000*float(self._timing[shard, _EXCHANGE_TIME])/ticks})
+        return report
+
+    def collect(self):
+        """
+        Copies the neuron state, synapse values and weights of every shard back into
+        the network
+        """
+
+        self._command(_COLLECT)
+        population = self.network.population
+        synapses = self.network.synapses
+        for _ in self.bounds:
+            shard, curr_time, activation_time, curr, curr_threshold, ids, value, weight = \
+                self._results.get()
+            lo, hi = self.bounds[shard]
+            population.curr_time[lo:hi] = curr_time
+            population.activation_time[lo:hi] = activation_time
+            population.curr[lo:hi] = curr
+            population.curr_threshold[lo:hi] = curr_threshold
+            positions = synapses.position[ids]
+            synapses.value[positions] = value
+            synapses.weight[positions] = weight
+        synapses.update_amplitudes()
+
+    def close(self):
+        """
+        Stops the workers and frees the shared memory
+        """
+
+        if self._processes:
+            self._command(_STOP)
+            for process in self._processes:
+                process.join()
+            self._processes = []
+            for block in self._blocks.values():
+                block.close()
+                block.unlink()
+            self._blocks = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return ("ShardedNetwork(" + "Neurons:" + str(len(self.network)) +
+                ", " + "Shards:" + str(len(self.bounds)) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
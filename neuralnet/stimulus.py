@@ -0,0 +1,183 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+
+class Stimulus:
+    """
+    Feeds external input into the input synapses of a Network, one row of values
+    per tick
+
+    The source holds one row per tick with one value per channel, where channel i
+    drives the i-th synapse given. It may be an array (including an np.memmap or
+    an .npy file opened with mmap_mode), an iterator or generator yielding rows,
+    or a callable returning the row for a tick. Before every step of the network
+    the row is written into every input synapse with a single vectorized
+    assignment, so no per-synapse Python code runs. For an EnsembleNetwork a row
+    is given to every copy, or may hold one row per copy.
+
+    Attributes
+    ----------
+    network : Network
+        The network being driven
+    ids : ndarray
+        The id of the synapse driven by each channel
+    tick : int
+        The number of rows applied so far
+    done : bool
+        Whether the source has run out. The inputs are then held at 0.
+
+    Methods
+    -------
+    from_file(network, synapses, path, dtype, **kwargs)
+        Creates a stimulus that streams a binary or .npy file through a memory map
+    apply(network, curr_time)
+        Writes the next row into the input synapses
+    close()
+        Detaches the stimulus from the network
+    """
+
+    def __init__(self, network, synapses, source, scale = 1.0, loop = False):
+        """
+        Parameters
+        ----------
+        network : Network
+            The network to drive. The stimulus attaches itself to the network's
+            stimuli, which are applied at the start of every step.
+        synapses : list
+            The input synapses, as Synapse objects bound to the network or as ids
+            in its SynapseMatrix. They must have no origin neuron.
+        source : array_like, iterable or callable
+            An array of shape (ticks, channels), an iterator of rows, or a function
+            called as source(tick, curr_time) that returns a row, or None once it
+            has run out
+        scale : float or array_like, optional
+            Multiplies every row, for example by the potential of each input
+        loop : bool, optional
+            Whether an array source starts over once every row has been applied
+        """
+
+        ids = [synapse if isinstance(synapse, (int, np.integer)) else synapse._id
+               for synapse in synapses]
+        for synapse in synapses:
+            if not isinstance(synapse, (int, np.integer)) and \
+                    synapse.matrix is not network.synapses:
+                raise ValueError("Synapse is not bound to this network")
+        self.network = network
+        self.ids = np.asarray(ids, dtype=np.intp)
+        matrix = network.synapses
+        if matrix.dirty:
+            matrix.compile()
+        if (matrix.origin[matrix.position[self.ids]] >= 0).any():
+            raise ValueError("Only synapses without an origin can be driven by a stimulus")
+        self.scale = scale
+        self._scaled = np.ndim(scale) > 0 or scale != 1
+        self.loop = loop
+        self.tick = 0
+        self.done = False
+        self._array = None
+        self._iterator = None
+        self._function = None
+        if callable(source) and not hasattr(source, '__next__'):
+            self._function = source
+        elif hasattr(source, 'shape'):
+            self._array = source
+        else:
+            self._iterator = iter(source)
+        self._position = None
+        self._positions = None
+        self._zeros = np.zeros(len(self.ids))
+        network.stimuli.append(self)
+
+    @classmethod
+    def from_file(cls, network, synapses, path, dtype = np.float64, **kwargs):
+        """
+        Creates a stimulus that streams its rows from a file through a memory map,
+        so the file is never loaded into memory as a whole
+
+        Parameters
+        ----------
+        network : Network
+            The network to drive
+        synapses : list
+            The input synapses, or their ids
+        path : str
+            An .npy file of shape (ticks, channels), or a raw binary file of dtype
+            values with one value per channel per tick
+        dtype : data-type, optional
+            The type of the values of a raw binary file
+        **kwargs
+            The scale and loop parameters of Stimulus
+
+        Returns
+        -------
+        Stimulus
+            The new stimulus
+        """
+
+        if path.endswith('.npy'):
+            source = np.load(path, mmap_mode='r')
+        else:
+            source = np.memmap(path, dtype=dtype, mode='r').reshape(-1, len(synapses))
+        return cls(network, synapses, source, **kwargs)
+
+    def _next_row(self, curr_time):
+        if self._function is not None:
+            return self._function(self.tick, curr_time)
+        if self._array is not None:
+            if self.tick >= len(self._array):
+                if not self.loop or len(self._array) == 0:
+                    return None
+                return self._array[self.tick % len(self._array)]
+            return self._array[self.tick]
+        return next(self._iterator, None)
+
+    def apply(self, network, curr_time):
+        """
+        Writes the row of the current tick into the input synapses. Called by
+        Network.step before the network is updated.
+
+        Parameters
+        ----------
+        network : Network
+            The network being stepped
+        curr_time : float
+            The time of the step
+        """
+
+        row = None if self.done else self._next_row(curr_time)
+        if row is None:
+            self.done = True
+            row = self._zeros
+        elif self._scaled:
+            row = np.multiply(row, self.scale)
+        matrix = network.synapses
+        if matrix.dirty:
+            matrix.compile()
+        # Positions only move when the matrix is recompiled, which replaces its
+        # position array
+        if self._position is not matrix.position:
+            self._position = matrix.position
+            self._positions = matrix.position[self.ids]
+        matrix.value[..., self._positions] = row
+        self.tick += 1
+
+    def close(self):
+        """
+        Detaches the stimulus from the network
+        """
+
+        if self in self.network.stimuli:
+            self.network.stimuli.remove(self)
+
+    def __repr__(self):
+        return ("Stimulus(" + "Channels:" + str(len(self.ids)) +
+                ", " + "Tick:" + str(self.tick) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
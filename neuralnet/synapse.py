@@ -16,7 +16,16 @@ class Synapse:
         Whether the synapse is inhibitory (-1) or excitory (+1)
     weight : float
         The value that weights the synaptic output.
+    matrix : SynapseMatrix
+        The matrix that stores value, potential, sign and weight for this synapse,
+        or None if the synapse stores them itself.
+    delay : int
+        The number of ticks the synapse's output takes to reach its dest. Only a
+        synapse bound to a Network can have a delay other than 1.
     """
+
+    __slots__ = ('_id', '_decay_mark', '_in_slot', '_out_slot', '_value', '_potential',
+                 'origin', 'dest', '_sign', '_weight')
     
     def __init__(self,value,potential,origin,dest = None,**kwargs):
         """
@@ -36,6 +45,17 @@ class Synapse:
             The value that weights the synaptic output.
         """
         
+        # A synapse owns its state until it is bound to a Network, after which value,
+        # potential, sign and weight are views into row _id of the network's
+        # SynapseMatrix, found through the synapse's neurons
+        self._id = -1
+        # The silent tick count of a lazily decaying origin neuron when this
+        # synapse's weight was last brought up to date, or -1 if the origin's
+        # Synapse_Model is not tracking it
+        self._decay_mark = -1
+        # The synapse's index in dest.sin and origin.sout, or -1
+        self._in_slot = -1
+        self._out_slot = -1
         self.value = value
         self.potential = potential
         self.origin = origin
@@ -44,6 +64,99 @@ class Synapse:
         self.sign = kwargs.get('sign',1)
         self.weight = kwargs.get('weight',1)
 
+    def _get(self, field):
+        return self.matrix.get(self._id, field)
+
+    def _set(self, field, value):
+        self.matrix.set(self._id, field, value)
+
+    @property
+    def value(self):
+        if self._id < 0:
+            return self._value
+        return self._get('value')
+
+    @value.setter
+    def value(self, value):
+        if self._id < 0:
+            # Only the inputs of an incremental dest, whose _inputs holds its sums,
+            # push their changes, so other writes skip the call
+            if (self._in_slot >= 0 and self.dest.synapse_model._inputs is not None and
+                    value != self._value):
+                self.dest.synapse_model.push(self._value, value)
+            self._value = value
+        else:
+            self._set('value', value)
+
+    @property
+    def potential(self):
+        if self._id < 0:
+            return self._potential
+        return self._get('potential')
+
+    @potential.setter
+    def potential(self, potential):
+        if self._id < 0:
+            if self._in_slot >= 0 and self.dest.synapse_model._inputs is not None:
+                self.dest.synapse_model.invalidate()
+            self._potential = potential
+        else:
+            self._set('potential', potential)
+
+    @property
+    def sign(self):
+        if self._id < 0:
+            return self._sign
+        return self._get('sign')
+
+    @sign.setter
+    def sign(self, sign):
+        if self._id < 0:
+            self._sign = sign
+        else:
+            self._set('sign', sign)
+
+    @property
+    def weight(self):
+        if self._decay_mark >= 0:
+            self.origin.synapse_model.catch_up(self)
+        if self._id < 0:
+            return self._weight
+        return self._get('weight')
+
+    @weight.setter
+    def weight(self, weight):
+        if self._decay_mark >= 0:
+            self._decay_mark = self.origin.synapse_model.silent_ticks
+        if self._id < 0:
+            self._weight = weight
+        else:
+            self._set('weight', weight)
+
+    @property
+    def delay(self):
+        if self._id < 0:
+            return 1
+        return int(self._get('delay'))
+
+    @delay.setter
+    def delay(self, delay):
+        if self._id < 0:
+            if delay != 1:
+                raise ValueError("Only synapses bound to a Network can have delays")
+        elif delay < 1:
+            raise ValueError("Synapse delays must be at least 1 tick")
+        else:
+            self._set('delay', delay)
+
+    @property
+    def matrix(self):
+        if self._id < 0:
+            return None
+        # A network binds only synapses whose neurons all belong to it
+        end = self.dest if self.dest is not None else self.origin
+        return end.population.network.synapses
+
     def __str__(self):
         ret = ""
         ret = ret + "(Origin = " + str(self.origin) + '\n'
@@ -0,0 +1,808 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+# The types sign, potential and value can be stored as, and the types weight can
+# be stored as. int8 weights are quantized, see SynapseMatrix.
+STATE_DTYPES = (np.dtype(np.float64), np.dtype(np.float32))
+WEIGHT_DTYPES = STATE_DTYPES + (np.dtype(np.float16), np.dtype(np.int8))
+
+# The index of each field within a pending synapse
+_FIELD_INDEX = {'origin': 0, 'dest': 1, 'sign': 2, 'weight': 3, 'potential': 4,
+                'value': 5, 'ids': 6, 'delay': 7}
+
+
+class SynapseMatrix:
+    """
+    The synapses of a network stored as compressed sparse rows, one row per
+    destination neuron
+
+    Synapses are identified by a stable id handed out by add. Their storage
+    position changes whenever the matrix is recompiled, so position maps ids to
+    the current index into the edge arrays. Synapses without a destination
+    neuron are stored ahead of the first row and synapses without an origin
+    neuron (external inputs) have an origin of -1.
+
+    A synapse with a delay of d ticks outputs, on each transmit, what it would
+    have output d-1 transmits earlier, weighted by its current weight, so its
+    dest reads it on the d-th update after its origin fired. A delay of 1 is the
+    usual behaviour. Whether each neuron fired is kept for the last max(delay)
+    transmits in a circular buffer shared by every synapse, so delays cost
+    memory proportional to the maximum delay times the number of neurons.
+
+    sign, potential and value are stored as dtype, float64 or float32, and weight
+    as weight_dtype, float64, float32, float16 or int8, while rows are always
+    summed in float64. The float64 matrix matches the Synapse objects exactly.
+    Against it, a float32 weight is off by at most 2**-24 (6e-8) of the weight,
+    a float16 weight by at most 2**-11 (4.9e-4) of the weight, and an int8
+    weight by at most weight_scale/2. Weights too small for a normal float16,
+    |weight| < 2**-14 (6.1e-5), are stored as subnormals with a fixed spacing,
+    so they are off by at most 2**-25 (3e-8) rather than a fraction of the
+    weight. int8 weights are stored as weight_scale
+    times a code in [-127, 127], and weight_scale defaults to
+    max(1, max|weight|)/127, so int8 weights in [-1, 1] are off by at most 1/254
+    (3.9e-3). Each synapse value is its potential times its weight, so the
+    normalized input s/p of a neuron, and the current it computes from it, are
+    off by at most the largest weight error of its row, plus about 2**-22
+    relative for float32 values and potentials. Learning rounds every weight it
+    updates, so weights can drift by one rounding per update, and int8 weights
+    lose updates smaller than weight_scale/2; learning networks should use float
+    weights or a learning rate of at least weight_scale.
+
+    Attributes
+    ----------
+    size : int
+        The number of neurons (rows) of the matrix
+    origin : ndarray
+        The index of the neuron connected to the input of each synapse, or -1
+    dest : ndarray
+        The index of the neuron connected to the output of each synapse, or -1
+    sign : ndarray
+        Whether each synapse is inhibitory (-1) or excitory (+1)
+    weight : ndarray
+        The stored weight of each synapse, which weights its output. For int8
+        weights these are the codes, see decode_weight.
+    potential : ndarray
+        The highest possible value (in magnitude) of each synapse
+    value : ndarray
+        The current value of each synapse
+    ids : ndarray
+        The id of the synapse stored at each position
+    delay : ndarray
+        The transmission delay of each synapse in ticks, at least 1
+    position : ndarray
+        The position of each synapse id in the edge arrays, or -1 if removed
+    indptr : ndarray
+        The edges of row i are stored in [indptr[i], indptr[i+1])
+    dtype : numpy.dtype
+        The type sign, potential and value are stored as
+    weight_dtype : numpy.dtype
+        The type weight is stored as
+    weight_scale : float
+        The weight of an int8 code of 1, or None for float weights
+
+    Methods
+    -------
+    from_arrays(size, origin, dest, value, potential, sign, weight, ids, delay, ...)
+        Creates a compiled matrix from arrays of synapses
+    add(origin, dest, value, potential, sign, weight, delay)
+        Adds a synapse and returns its id
+    remove(ids)
+        Removes synapses by id
+    prune(max_weight)
+        Removes every synapse with an origin whose weight has decayed to max_weight
+    compile(size)
+        Sorts pending synapses into the compressed rows
+    permute(order)
+        Renumbers the neurons and re-sorts the rows to match
+    get(synapse_id, field)
+        Returns one field of a synapse without compiling
+    set(synapse_id, field, value)
+        Writes one field of a synapse without compiling
+    resize(size)
+        Adds empty rows for new neurons without compiling
+    update_amplitudes()
+        Refreshes the cached outputs after sign, potential or weight were written
+    encode_weight(weight)
+        Converts weights to the type of the weight array
+    decode_weight(stored)
+        Converts stored weights back to weights
+    aggregate()
+        Returns the aggregated synapse values and potentials of every row
+    transmit(curr, synapse_threshold)
+        Updates the value of every synapse with an origin from its origin's current
+    learn(fired, curr, potential, learning_rate)
+        Applies the Hebbian learning rule to every synapse with an origin
+    replicate(copies)
+        Returns a matrix sharing this topology with a value and weight per copy
+    state()
+        Returns the matrix's edge arrays by field name
+    load_state(state)
+        Overwrites the matrix's edge arrays with saved ones
+    """
+
+    _FIELDS = (('origin', np.intp), ('dest', np.intp), ('sign', np.float64),
+               ('weight', np.float64), ('potential', np.float64),
+               ('value', np.float64), ('ids', np.intp), ('delay', np.int32))
+
+    def __init__(self, size = 0, dtype = np.float64, weight_dtype = None, weight_scale = None):
+        """
+        Parameters
+        ----------
+        size : int, optional
+            The number of neurons (rows) of the matrix
+        dtype : numpy.dtype, optional
+            The type to store sign, potential and value as, float64 or float32
+        weight_dtype : numpy.dtype, optional
+            The type to store weight as, float64, float32, float16 or int8.
+            Defaults to dtype.
+        weight_scale : float, optional
+            The weight of an int8 code of 1. Defaults to 1/127, so that int8
+            weights cover the [0, 1] range of Hebbian weights.
+        """
+
+        self.dtype = np.dtype(dtype)
+        if self.dtype not in STATE_DTYPES:
+            raise ValueError("dtype must be float64 or float32")
+        self.weight_dtype = np.dtype(self.dtype if weight_dtype is None else weight_dtype)
+        if self.weight_dtype not in WEIGHT_DTYPES:
+            raise ValueError("weight_dtype must be float64, float32, float16 or int8")
+        self.weight_scale = None
+        if self.weight_dtype == np.int8:
+            self.weight_scale = float(1/127 if weight_scale is None else weight_scale)
+            if not self.weight_scale > 0:
+                raise ValueError("weight_scale must be positive")
+        types = {'sign': self.dtype, 'potential': self.dtype, 'value': self.dtype,
+                 'weight': self.weight_dtype}
+        self._fields = tuple((field, types.get(field, dtype))
+                             for field, dtype in self._FIELDS)
+        self.size = size
+        for field, dtype in self._fields:
+            setattr(self, field, np.zeros(0, dtype=dtype))
+        self.position = np.zeros(0, dtype=np.intp)
+        self.indptr = np.zeros(size + 1, dtype=np.intp)
+        self._index_rows()
+        self._pending = []
+        self._removed = set()
+        self._next_id = 0
+        self._potential_sum = np.zeros(size)
+        self._wired = np.zeros(0, dtype=np.intp)
+        self._wired_origin = np.zeros(0, dtype=np.intp)
+        # sign*potential of each synapse with an origin, and the output
+        # sign*potential*weight it transmits when it fires
+        self._gain = np.zeros(0, dtype=self.dtype)
+        self._amplitude = np.zeros(0, dtype=self.dtype)
+        # Reused between transmits for the outputs of the synapses with an origin
+        self._output = None
+        # The fired flag of every neuron on each of the last max_delay transmits,
+        # indexed [tick % max_delay, ..., neuron], or None while every delay is 1
+        self.max_delay = 1
+        self._ring = None
+        self._tick = 0
+        self._delayed = np.zeros(0, dtype=np.intp)
+        self._lag = np.zeros(0, dtype=np.intp)
+
+    @classmethod
+    def from_arrays(cls, size, origin, dest, value = 0, potential = 1, sign = 1, weight = 1,
+                    ids = None, delay = 1, dtype = np.float64, weight_dtype = None,
+                    weight_scale = None):
+        """
+        Creates a compiled matrix from arrays holding one entry per synapse. Scalars
+        are broadcast to every synapse.
+
+        Parameters
+        ----------
+        size : int
+            The number of neurons (rows) of the matrix
+        origin : array_like
+            The index of the neuron connected to the input of each synapse, or -1
+        dest : array_like
+            The index of the neuron connected to the output of each synapse, or -1
+        value : array_like, optional
+            The current value of each synapse
+        potential : array_like, optional
+            The highest possible value (in magnitude) of each synapse
+        sign : array_like, optional
+            Whether each synapse is inhibitory (-1) or excitory (+1)
+        weight : array_like, optional
+            The value that weights the output of each synapse
+        ids : array_like, optional
+            The id of each synapse. Defaults to the synapses' order.
+        delay : array_like, optional
+            The transmission delay of each synapse in ticks
+        dtype : numpy.dtype, optional
+            The type to store sign, potential and value as
+        weight_dtype : numpy.dtype, optional
+            The type to store weight as
+        weight_scale : float, optional
+            The weight of an int8 code of 1. Defaults to max(1, max|weight|)/127.
+
+        Returns
+        -------
+        SynapseMatrix
+            The new matrix
+        """
+
+        origin = np.asarray(origin, dtype=np.intp)
+        count = len(origin)
+        weight = np.asarray(weight, dtype=np.float64)
+        if np.dtype(weight_dtype or dtype) == np.int8 and weight_scale is None:
+            weight_scale = max(1, float(np.abs(weight).max()) if weight.size else 0)/127
+        matrix = cls(size, dtype, weight_dtype, weight_scale)
+        if ids is None:
+            ids = np.arange(count)
+        if np.any(np.asarray(delay) < 1):
+            raise ValueError("Synapse delays must be at least 1 tick")
+        columns = {'origin': origin, 'dest': dest, 'sign': sign,
+                   'weight': matrix.encode_weight(weight), 'potential': potential,
+                   'value': value, 'ids': ids, 'delay': delay}
+        for field, dtype in matrix._fields:
+            column = np.empty(count, dtype=dtype)
+            column[:] = columns[field]
+            setattr(matrix, field, column)
+        matrix._next_id = int(matrix.ids.max()) + 1 if count else 0
+        matrix.compile()
+        return matrix
+
+    def __len__(self):
+        return len(self.ids) + len(self._pending) - len(self._removed)
+
+    def add(self, origin, dest, value, potential, sign = 1, weight = 1, delay = 1):
+        """
+        Adds a synapse to the matrix. It is placed in its row on the next compile.
+
+        Parameters
+        ----------
+        origin : int
+            The index of the neuron connected to the synaptic input, or -1
+        dest : int
+            The index of the neuron connected to the synaptic output, or -1
+        value : float
+            The current value of the synapse
+        potential : float
+            The highest possible synaptic value (in magnitude)
+        sign : int, optional
+            Whether the synapse is inhibitory (-1) or excitory (+1)
+        weight : float, optional
+            The value that weights the synaptic output
+        delay : int, optional
+            The transmission delay of the synapse in ticks
+
+        Returns
+        -------
+        int
+            The id of the new synapse
+        """
+
+        if delay < 1:
+            raise ValueError("Synapse delays must be at least 1 tick")
+        weight = self.encode_weight(weight)
+        synapse_id = self._next_id
+        self._next_id += 1
+        self._pending.append([origin, dest, sign, weight, potential, value, synapse_id,
+                              delay])
+        return synapse_id
+
+    def remove(self, ids):
+        """
+        Removes synapses from the matrix. They are dropped from their rows on the
+        next compile, so removing synapses one at a time costs O(1) each. Their ids
+        are never handed out again.
+
+        Parameters
+        ----------
+        ids : array_like
+            The ids of synapses in the matrix
+        """
+
+        self._removed.update(np.atleast_1d(ids).tolist())
+
+    def prune(self, max_weight = 0):
+        """
+        Removes every synapse with an origin whose weight is at or below max_weight,
+        such as the synapses whose Hebbian weight has decayed to 0. A synapse of a
+        replicated matrix is only removed if it is dead in every copy. Synapses
+        without an origin are external inputs and are kept.
+
+        Parameters
+        ----------
+        max_weight : float, optional
+            The weight at or below which a synapse is removed
+
+        Returns
+        -------
+        ndarray
+            The ids of the removed synapses
+        """
+
+        if self.dirty:
+            self.compile()
+        wired = self._wired
+        weight = self.decode_weight(self.weight[..., wired])
+        dead = (weight <= max_weight).reshape(-1, len(wired)).all(axis=0)
+        ids = self.ids[wired[dead]]
+        self.remove(ids)
+        return ids
+
+    def compile(self, size = None):
+        """
+        Sorts any pending synapses into their rows and rebuilds the row pointers
+
+        Parameters
+        ----------
+        size : int, optional
+            The new number of rows, if neurons have been added
+        """
+
+        if size is not None:
+            self.size = size
+        if self._pending:
+            pending = list(zip(*self._pending))
+            for (field, dtype), column in zip(self._fields, pending):
+                setattr(self, field, np.concatenate((getattr(self, field),
+                                                     np.array(column, dtype=dtype))))
+            self._pending = []
+        if self._removed:
+            removed = np.fromiter(self._removed, dtype=np.intp, count=len(self._removed))
+            keep = ~np.isin(self.ids, removed)
+            for field, dtype in self._fields:
+                setattr(self, field, getattr(self, field)[..., keep])
+            self._removed = set()
+        # A stable sort keeps the synapses of a row in the order they were added,
+        # which is the order Synapse_Model.get_synapses_in sums them in
+        order = np.argsort(self.dest, kind='stable')
+        for field, dtype in self._fields:
+            setattr(self, field, getattr(self, field)[..., order])
+        self.position = np.full(self._next_id, -1, dtype=np.intp)
+        self.position[self.ids] = np.arange(len(self.ids))
+        rows = self.dest[self.dest >= 0]
+        self.indptr = np.full(self.size + 1, len(self.dest) - len(rows), dtype=np.intp)
+        self.indptr[1:] += np.cumsum(np.bincount(rows, minlength=self.size))
+        self._index_rows()
+        self._potential_sum = self._row_sum(self.potential)
+        self._wired = np.flatnonzero(self.origin >= 0)
+        self._wired_origin = self.origin[self._wired]
+        self.update_amplitudes()
+        lag = self.delay[self._wired].astype(np.intp) - 1
+        self._delayed = np.flatnonzero(lag > 0)
+        self._lag = lag[self._delayed]
+        self._resize_ring(int(self.delay.max()) if len(self.delay) else 1)
+
+    def resize(self, size):
+        """
+        Adds empty rows to the end of the matrix for neurons added to the network,
+        without sorting the synapses
+
+        Parameters
+        ----------
+        size : int
+            The new number of rows, at least the current number
+        """
+
+        added = size - self.size
+        if added < 0:
+            raise ValueError("A matrix can only grow by adding rows")
+        self.indptr = np.concatenate((self.indptr,
+                                      np.full(added, self.indptr[-1], dtype=np.intp)))
+        self._index_rows()
+        self._potential_sum = np.concatenate(
+            (self._potential_sum, np.zeros(self._potential_sum.shape[:-1] + (added,))),
+            axis=-1)
+        self.size = size
+        self._resize_ring(self.max_delay)
+
+    def _locate(self, synapse_id):
+        # Pending synapses hold the ids handed out since the last compile, in order
+        first = self._next_id - len(self._pending)
+        if synapse_id >= first:
+            return self._pending[synapse_id - first], -1
+        return None, self.position[synapse_id]
+
+    def get(self, synapse_id, field):
+        """
+        Returns one field of a synapse, reading pending synapses from the queue so
+        that the matrix is not compiled
+
+        Parameters
+        ----------
+        synapse_id : int
+            The id of the synapse
+        field : str
+            'value', 'potential', 'sign', 'weight' or 'delay'
+
+        Returns
+        -------
+        float
+            The value of the field, with int8 weights decoded
+        """
+
+        entry, position = self._locate(synapse_id)
+        if entry is not None:
+            value = entry[_FIELD_INDEX[field]]
+        else:
+            value = getattr(self, field)[..., position]
+        if field == 'weight':
+            value = self.decode_weight(np.asarray(value))
+        return float(value)
+
+    def set(self, synapse_id, field, value):
+        """
+        Writes one field of a synapse in place. The cached potential sum of its row
+        and the delay lags are updated for that synapse alone, so that only adding
+        and removing synapses requires a compile.
+
+        Parameters
+        ----------
+        synapse_id : int
+            The id of the synapse
+        field : str
+            'value', 'potential', 'sign', 'weight' or 'delay'
+        value : float
+            The new value of the field
+        """
+
+        if field == 'weight':
+            value = self.encode_weight(value)
+        entry, position = self._locate(synapse_id)
+        if entry is not None:
+            entry[_FIELD_INDEX[field]] = value
+            return
+        getattr(self, field)[..., position] = value
+        if field in ('sign', 'potential', 'weight') and self.origin[position] >= 0:
+            wired = np.searchsorted(self._wired, position)
+            self._gain[wired] = self.sign[position]*self.potential[position]
+            self._amplitude[..., wired] = self._gain[wired]*self.decode_weight(
+                self.weight[..., position])
+        if field == 'potential':
+            row = self.dest[position]
+            if row >= 0:
+                start, end = self.indptr[row], self.indptr[row + 1]
+                # Summed like _row_sum so that the sum matches a compile exactly
+                self._potential_sum[..., row] = np.add.reduceat(
+                    self.potential[start:end], [0], dtype=np.float64)[0]
+        elif field == 'delay' and self.origin[position] >= 0:
+            self._set_lag(np.searchsorted(self._wired, position), int(value) - 1)
+
+    def update_amplitudes(self):
+        """
+        Recomputes the cached output sign*potential*weight of every synapse with an
+        origin. Compiling, learning and set keep it up to date; call this after
+        writing the sign, potential or weight arrays directly.
+        """
+
+        wired = self._wired
+        self._gain = self.sign[wired]*self.potential[wired]
+        self._amplitude = self._gain*self.decode_weight(self.weight[..., wired])
+
+    def _set_lag(self, wired, lag):
+        # Keeps _delayed, the sorted indices into _wired of the delayed synapses,
+        # and their _lag up to date for one synapse
+        slot = np.searchsorted(self._delayed, wired)
+        present = slot < len(self._delayed) and self._delayed[slot] == wired
+        if present and lag > 0:
+            self._lag[slot] = lag
+        elif present:
+            self._delayed = np.delete(self._delayed, slot)
+            self._lag = np.delete(self._lag, slot)
+        elif lag > 0:
+            self._delayed = np.insert(self._delayed, slot, wired)
+            self._lag = np.insert(self._lag, slot, lag)
+        if lag + 1 > self.max_delay:
+            self._resize_ring(lag + 1)
+
+    def permute(self, order):
+        """
+        Renumbers the neurons so that the neuron at index order[i] becomes index i,
+        as after NeuronPopulation.permute, and re-sorts the rows. Synapse ids and
+        the order of the synapses within each row are kept.
+
+        Parameters
+        ----------
+        order : array_like
+            The old index of the neuron placed at each new index
+        """
+
+        order = np.asarray(order, dtype=np.intp)
+        if order.shape != (self.size,):
+            raise ValueError("order must hold one index per neuron")
+        if self.dirty:
+            self.compile()
+        inverse = np.empty(self.size, dtype=np.intp)
+        inverse[order] = np.arange(self.size)
+        self.origin = np.where(self.origin >= 0, inverse[self.origin], -1)
+        self.dest = np.where(self.dest >= 0, inverse[self.dest], -1)
+        if self._ring is not None:
+            self._ring = self._ring[..., order]
+        self.compile()
+
+    def encode_weight(self, weight):
+        """
+        Converts weights to the type of the weight array, rounding int8 weights to
+        the nearest multiple of weight_scale
+
+        Parameters
+        ----------
+        weight : array_like
+            The weights
+
+        Returns
+        -------
+        ndarray
+            The weights as stored
+        """
+
+        if self.weight_scale is None:
+            return np.asarray(weight, dtype=self.weight_dtype)
+        codes = np.rint(np.asarray(weight, dtype=np.float64)/self.weight_scale)
+        if np.any(np.abs(codes) > 127):
+            raise ValueError("int8 weights must lie within 127*weight_scale of 0")
+        return codes.astype(np.int8)
+
+    def decode_weight(self, stored):
+        """
+        Converts stored weights back to weights
+
+        Parameters
+        ----------
+        stored : ndarray
+            Weights as stored in the weight array
+
+        Returns
+        -------
+        ndarray
+            The weights, as floats
+        """
+
+        if self.weight_scale is None:
+            return stored
+        return stored.astype(self.dtype)*self.weight_scale
+
+    def _resize_ring(self, max_delay):
+        # Keeps as much of the recorded history as fits the new depth and size
+        ring = self._ring
+        self.max_delay = max_delay
+        if max_delay == 1:
+            self._ring = None
+            return
+        if ring is None or (ring.shape[0] == max_delay and ring.shape[-1] == self.size):
+            return
+        resized = np.zeros((max_delay,) + ring.shape[1:-1] + (self.size,), dtype=bool)
+        columns = min(ring.shape[-1], self.size)
+        for tick in range(max(self._tick - min(ring.shape[0], max_delay), 0), self._tick):
+            resized[tick % max_delay, ..., :columns] = ring[tick % ring.shape[0], ..., :columns]
+        self._ring = resized
+
+    @property
+    def dirty(self):
+        """
+        Whether synapses have been added or removed since the matrix was last compiled
+        """
+
+        return len(self._pending) > 0 or len(self._removed) > 0
+
+    def _index_rows(self):
+        # The start of every nonempty row, and which rows are nonempty, or None
+        # when they all are and the sums need no scattering
+        starts = self.indptr[:-1]
+        nonempty = self.indptr[1:] > starts
+        self._starts = starts[nonempty]
+        self._nonempty = None if nonempty.all() else nonempty
+
+    def _row_sum(self, edges):
+        if self._nonempty is None and len(self._starts):
+            return np.add.reduceat(edges, self._starts, axis=-1, dtype=np.float64)
+        sums = np.zeros(edges.shape[:-1] + (self.size,))
+        if len(self._starts):
+            sums[..., self._nonempty] = np.add.reduceat(edges, self._starts, axis=-1,
+                                                        dtype=np.float64)
+        return sums
+
+    def aggregate(self):
+        """
+        Aggregates the synaptic input of every neuron, equivalent to calling
+        Synapse_Model.get_synapses_in for each of them
+
+        Returns
+        -------
+        tuple
+            Arrays of the aggregated synapse values and the aggregated synapse potentials
+        """
+
+        if self.dirty:
+            self.compile()
+        return (self._row_sum(self.value), self._potential_sum)
+
+    def transmit(self, curr, synapse_threshold):
+        """
+        Updates the value of every synapse that has an origin neuron. A synapse
+        outputs sign*potential*weight while its origin's current is at or above
+        the origin's synapse threshold and 0 otherwise. A synapse with a delay of
+        d uses whether its origin was at or above threshold d-1 transmits ago.
+
+        Parameters
+        ----------
+        curr : ndarray
+            The neuronal current of each origin neuron
+        synapse_threshold : ndarray
+            The synapse threshold of each origin neuron
+
+        Returns
+        -------
+        ndarray
+            Whether the origin of each synapse with an origin fired on this transmit,
+            regardless of delays, in the order of their positions
+        """
+
+        if self.dirty:
+            self.compile()
+        wired = self._wired
+        origin = self._wired_origin
+        # Neurons are compared once and the flags gathered, which reads one byte
+        # per synapse from the origins instead of two floats
+        above = curr >= synapse_threshold
+        fired = np.take(above, origin, axis=-1)
+        output = fired
+        if self.max_delay > 1:
+            if self._ring is None or self._ring.shape[1:] != curr.shape:
+                self._ring = np.zeros((self.max_delay,) + curr.shape, dtype=bool)
+            slot = self._tick % self.max_delay
+            self._ring[slot] = above
+            if len(self._delayed):
+                delayed = self._ring[(slot - self._lag) % self.max_delay, ...,
+                                     origin[self._delayed]]
+                output = fired.copy()
+                output[..., self._delayed] = np.moveaxis(delayed, 0, -1)
+        self._tick += 1
+        shape = np.broadcast_shapes(self._amplitude.shape, output.shape)
+        if len(wired) == self.value.shape[-1] and self.value.shape == shape:
+            # Every synapse has an origin, so the outputs are written in place
+            values = self.value
+        else:
+            if self._output is None or self._output.shape != shape:
+                self._output = np.empty(shape, dtype=self.dtype)
+            values = self._output
+        np.multiply(self._amplitude, output, out=values)
+        # Turns the -0.0 of silent inhibitory synapses into 0
+        np.add(values, 0, out=values)
+        if values is self._output:
+            # Fancy indexing after an Ellipsis is much slower, so it is only used
+            # for replicated matrices
+            if self.value.ndim == 1:
+                self.value[wired] = values
+            else:
+                self.value[..., wired] = values
+        return fired
+
+    def state(self):
+        """
+        Returns the matrix's edge arrays by field name, in storage order
+
+        Returns
+        -------
+        dict
+            The array of every field, along with 'size', 'next_id', the
+            'weight_scale' of int8 weights (nan for float weights), and the 'tick'
+            and 'ring' of recent firing used by delayed synapses
+        """
+
+        if self.dirty:
+            self.compile()
+        state = {field: getattr(self, field) for field, dtype in self._fields}
+        state['size'] = np.array(self.size)
+        state['weight_scale'] = np.array(np.nan if self.weight_scale is None
+                                         else self.weight_scale)
+        state['next_id'] = np.array(self._next_id)
+        state['tick'] = np.array(self._tick)
+        state['ring'] = self._ring if self._ring is not None else np.zeros(0, dtype=bool)
+        return state
+
+    def load_state(self, state):
+        """
+        Overwrites the matrix's edge arrays with arrays returned by state(). Synapse
+        objects bound to the matrix stay bound through their ids. The arrays are
+        converted to this matrix's types, and an int8 matrix loading int8 weights
+        takes over their weight_scale.
+
+        Parameters
+        ----------
+        state : dict
+            The array of every field, along with 'size' and 'next_id', and
+            optionally 'delay', 'weight_scale', 'tick' and 'ring'
+        """
+
+        self._pending = []
+        self._removed = set()
+        for field, dtype in self._fields:
+            if field == 'delay' and field not in state:
+                # Saved before synapses had delays
+                self.delay = np.ones(len(self.ids), dtype=dtype)
+                continue
+            if field == 'weight':
+                self.weight = self._load_weight(state)
+                continue
+            setattr(self, field, np.array(state[field], dtype=dtype))
+        self._next_id = int(state['next_id'])
+        self._tick = int(state['tick']) if 'tick' in state else 0
+        ring = np.asarray(state['ring'], dtype=bool) if 'ring' in state else np.zeros(0)
+        self._ring = ring.copy() if ring.ndim > 1 else None
+        self.compile(int(state['size']))
+
+    def _load_weight(self, state):
+        weight = np.asarray(state['weight'])
+        if weight.dtype != np.int8:
+            return self.encode_weight(weight)
+        scale = float(state['weight_scale'])
+        if self.weight_scale is None:
+            return self.encode_weight(weight*scale)
+        self.weight_scale = scale
+        return weight.copy()
+
+    def replicate(self, copies):
+        """
+        Returns a matrix that shares this matrix's topology, signs and potentials
+        but holds an independent value and weight for each of copies copies, with
+        the copy as the leading axis. Synapses cannot be added to it.
+
+        Parameters
+        ----------
+        copies : int
+            The number of copies
+
+        Returns
+        -------
+        SynapseMatrix
+            The new matrix
+        """
+
+        if self.dirty:
+            self.compile()
+        matrix = type(self)(self.size)
+        matrix.__dict__.update(self.__dict__)
+        matrix._pending = []
+        matrix._removed = set()
+        matrix._ring = None
+        matrix._output = None
+        matrix.value = np.repeat(self.value[np.newaxis], copies, axis=0)
+        matrix.weight = np.repeat(self.weight[np.newaxis], copies, axis=0)
+        matrix.update_amplitudes()
+        return matrix
+
+    def learn(self, fired, curr, potential, learning_rate):
+        """
+        Applies the Hebbian learning rule of Synapse_Model.update_synapses_out to every
+        synapse with an origin in one pass. A synapse that fired is strengthened by
+        its origin's learning rate times the correlation of its origin's and dest's
+        currents and clamped at 1, and one that did not is weakened by the learning
+        rate and clamped at 0. Synapses without a dest have no correlation.
+
+        Parameters
+        ----------
+        fired : ndarray
+            Whether each synapse with an origin fired, as returned by transmit
+        curr : ndarray
+            The neuronal current of each neuron
+        potential : ndarray
+            The maximum neuronal current of each neuron
+        learning_rate : ndarray
+            The learning rate of each neuron
+        """
+
+        wired = self._wired
+        origin = self._wired_origin
+        dest = self.dest[wired]
+        lr = learning_rate[..., origin]
+        weight = self.decode_weight(self.weight[..., wired])
+        has_dest = dest >= 0
+        dest = np.where(has_dest, dest, 0)
+        # Same operation order as the object rule so the weights match it exactly
+        firing_correlation = np.where(has_dest, curr[..., origin]/potential[..., origin]*
+                                      curr[..., dest]/potential[..., dest], 0)
+        weight = self.encode_weight(np.where(fired,
+                                             np.minimum(weight + lr*firing_correlation, 1),
+                                             np.maximum(weight - lr, 0)))
+        self.weight[..., wired] = weight
+        self._amplitude = self._gain*self.decode_weight(weight)
@@ -0,0 +1,134 @@
+import sys,os
+from concurrent.futures import ThreadPoolExecutor
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+
+class SynchronousNetwork:
+    """
+    Steps a list of Neuron objects synchronously with double-buffered synapse values
+
+    During a step every neuron reads its inputs from the synapses' values (the
+    front buffer) and writes its outputs as (synapse, value) pairs to a list (the
+    back buffer). The written values are swapped in only once every neuron has
+    been updated, so the result no longer depends on the order of the neurons and
+    matches Network.step. The neurons are split into partitions that are updated by
+    separate workers. Each partition writes only the synapses and weights of its
+    own neurons, so partitions never race with each other.
+
+    Without learning, each partition updates its inputs and outputs in one pass,
+    since outputs never touch the front buffer. With learning, the Hebbian rule
+    reads the current of each synapse's dest, so every partition finishes its
+    inputs before any partition updates its outputs.
+
+    Attributes
+    ----------
+    neurons : list
+        The neurons being stepped
+    partitions : list
+        The lists of neurons updated by each worker
+
+    Methods
+    -------
+    step(curr_time)
+        Updates every neuron to curr_time and swaps in the new synapse values
+    close()
+        Shuts down the worker threads
+    """
+
+    def __init__(self, neurons, workers = 1, partitions = None):
+        """
+        Parameters
+        ----------
+        neurons : list
+            The neurons to be stepped
+        workers : int, optional
+            The number of worker threads, and of partitions if none are given
+        partitions : list, optional
+            Lists of neurons to be updated together, covering every neuron once
+        """
+
+        self.neurons = list(neurons)
+        if partitions is None:
+            size = -(-len(self.neurons)//max(workers, 1))
+            partitions = [self.neurons[i:i + size]
+                          for i in range(0, len(self.neurons), max(size, 1))]
+        self.partitions = [list(partition) for partition in partitions]
+        self._buffers = []
+        for partition in self.partitions:
+            buffer = []
+            for neuron in partition:
+                neuron.synapse_model.buffer = buffer
+                if workers > 1:
+                    # Workers swapping in values would push into the same input sums
+                    neuron.synapse_model.incremental = False
+            self._buffers.append(buffer)
+        self._executor = None
+        if workers > 1:
+            self._executor = ThreadPoolExecutor(workers)
+
+    def _map(self, function, *args):
+        if self._executor is None:
+            return list(map(function, *args))
+        return list(self._executor.map(function, *args))
+
+    @staticmethod
+    def _update_inputs(partition, curr_time):
+        for neuron in partition:
+            neuron.update_inputs(curr_time)
+
+    @staticmethod
+    def _update_outputs(partition):
+        for neuron in partition:
+            neuron.update_outputs()
+
+    @staticmethod
+    def _update(partition, curr_time):
+        for neuron in partition:
+            neuron.update_inputs(curr_time)
+            neuron.update_outputs()
+
+    @staticmethod
+    def _swap(buffer):
+        for synapse, value in buffer:
+            synapse.value = value
+        buffer.clear()
+
+    def step(self, curr_time):
+        """
+        Updates every neuron to curr_time and swaps in the new synapse values
+
+        Parameters
+        ----------
+        curr_time : float
+            The new current time.
+        """
+
+        times = [curr_time]*len(self.partitions)
+        if any(neuron.synapse_model.lr != 0 for neuron in self.neurons):
+            self._map(self._update_inputs, self.partitions, times)
+            self._map(self._update_outputs, self.partitions)
+        else:
+            self._map(self._update, self.partitions, times)
+        self._map(self._swap, self._buffers)
+
+    def close(self):
+        """
+        Shuts down the worker threads and returns the neurons to unbuffered updates
+        """
+
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for neuron in self.neurons:
+            neuron.synapse_model.buffer = None
+
+    def __repr__(self):
+        return ("SynchronousNetwork(" + "Neurons:" + str(len(self.neurons)) +
+                ", " + "Partitions:" + str(len(self.partitions)) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
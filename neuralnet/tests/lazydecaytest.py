@@ -0,0 +1,65 @@
+import sys,os
+import math
+import random
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import Neuron, connect, _decayed
+
+# Checks that lazy weight decay gives the weights of eager decay bit for bit: first
+# the closed form against the eager rule replayed one tick at a time, on weights at
+# binade edges and learning rates that round halfway or not at all, then lazy
+# neurons against eager ones in the same network.
+CASES = 20000
+N = 60
+TICKS = 2000
+DT = 0.075
+
+def eager(weight, lr, ticks):
+    for _ in range(ticks):
+        weight = weight - lr
+        if weight < 0:
+            weight = 0
+    return weight
+
+random.seed(0)
+for _ in range(CASES):
+    weight = random.choice([random.random(), random.uniform(0, 8), 1, 0.0,
+                            math.ldexp(1, random.randint(-8, 3)) + random.randint(-2, 2)*2.0**-52])
+    lr = random.choice([0.01, 0.001, 1/3, 2.0**-60 + 2.0**-112,
+                        math.ldexp(random.randint(1, 2**20), random.randint(-60, -20)),
+                        random.random()*math.ldexp(1, random.randint(-30, 0))])
+    ticks = random.choice([1, 9, 100, random.randint(1, 5000)])
+    expected = eager(weight, lr, ticks)
+    actual = _decayed(weight, lr, ticks)
+    assert repr(actual) == repr(expected), (weight, lr, ticks, actual, expected)
+
+def build(lazy):
+    random.seed(1)
+    neurons = [Neuron(random.choice([0.1, 0.3, 0.6]), fire=2, refract=4, dt=DT,
+                      learning_rate=random.choice([0.001, 0.01, 1/3*0.01]), lazy_decay=lazy)
+               for _ in range(N)]
+    for _ in range(8*N):
+        connect(neurons[random.randrange(N)], neurons[random.randrange(N)], 0, 1,
+                sign=random.choice([1, 1, 1, -1]), weight=random.random())
+    return neurons, connect(None, neurons[0], 0, 1)
+
+eager_neurons, eager_control = build(False)
+lazy_neurons, lazy_control = build(True)
+t = 0
+for tick in range(TICKS):
+    # Bursts of drive separated by long silent runs
+    eager_control.value = lazy_control.value = 1 if tick % 500 < 20 else 0
+    t += DT
+    for neurons in (eager_neurons, lazy_neurons):
+        for neuron in neurons:
+            neuron.update_inputs(t)
+        for neuron in neurons:
+            neuron.update_outputs()
+    if tick % 50 == 49:
+        for a, b in zip(eager_neurons, lazy_neurons):
+            assert a.curr == b.curr
+            for x, y in zip(a.sout, b.sout):
+                assert x.value == y.value and x.weight == y.weight, (tick, x.weight, y.weight)
@@ -0,0 +1,37 @@
+import random
+import sys,os
+import tracemalloc
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import Neuron, connect
+
+# Object-mode memory targets, measured with tracemalloc over freshly built networks.
+# Each synapse also costs one slot in the sout list of its origin and in the sin
+# list of its dest, and remembers both slots for O(1) removal. State that only some
+# modes use, such as network bindings and double-buffered values, is kept outside
+# the Synapse.
+NEURON_BYTES = 400
+SYNAPSE_BYTES = 140
+
+N = 20000
+FAN_OUT = 10
+
+random.seed(0)
+tracemalloc.start()
+start = tracemalloc.get_traced_memory()[0]
+neurons = [Neuron(0.3, fire=2, refract=4) for _ in range(N)]
+built = tracemalloc.get_traced_memory()[0]
+for _ in range(N*FAN_OUT):
+    connect(neurons[random.randrange(N)], neurons[random.randrange(N)], 0, 1)
+wired = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+neuron_bytes = (built - start)/N
+synapse_bytes = (wired - built)/(N*FAN_OUT)
+print("bytes per neuron: " + str(round(neuron_bytes)) + " (target " + str(NEURON_BYTES) + ")")
+print("bytes per synapse: " + str(round(synapse_bytes)) + " (target " + str(SYNAPSE_BYTES) + ")")
+assert neuron_bytes <= NEURON_BYTES
+assert synapse_bytes <= SYNAPSE_BYTES
@@ -0,0 +1,93 @@
+import sys,os
+
+import numpy as np
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.neuron import Neuron, connect
+from AML.neuralnet.network import Network
+
+# Checks the reduced precision storage modes against float64 Neuron objects. Each
+# tick the reduced network is set to the reference state before transmitting, so
+# the errors measured are those of a single step, which are what SynapseMatrix and
+# NeuronPopulation document: the error of the normalized input each neuron compares
+# against its threshold, and of the current it stores. Neurons that cross their
+# threshold in only one of the two networks are counted as flips.
+N = 400
+FAN_IN = 10
+TICKS = 200
+DT = 0.075
+MODES = ((np.float32, np.float32, 2.0**-24),
+         (np.float32, np.float16, 2.0**-11),
+         (np.float32, np.int8, None),
+         (np.float64, np.int8, None))
+
+rng = np.random.default_rng(0)
+neurons = [Neuron(0.3, fire=2, refract=4, dt=DT) for _ in range(N)]
+origin = rng.integers(0, N, N*FAN_IN)
+dest = np.repeat(np.arange(N), FAN_IN)
+for i, j in zip(origin.tolist(), dest.tolist()):
+    connect(neurons[i], neurons[j], 0, 1, sign=-1 if rng.random() < 0.2 else 1,
+            weight=rng.random())
+drives = [connect(None, neuron, 0, FAN_IN) for neuron in neurons]
+reference = Network.from_neurons(neurons, DT)
+matrix = reference.synapses
+inputs = matrix.position[[synapse._id for synapse in drives]]
+drive = rng.random((TICKS, N)) < 0.05
+
+def normalized_input(network):
+    s, p = network.synapses.aggregate()
+    population = network.population
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(population.activation_time < 0, np.where(p == 0, 0, s/p),
+                        (population.curr + s)/(population.potential + p))
+
+# float16 weights below 2**-14 are subnormal, with an absolute rather than a
+# relative bound
+small = np.array([2.0**-14, 6e-5, 1e-5, 3e-7, 2.0**-26, 0.0])
+network = Network.from_edges(2, np.zeros(len(small), dtype=int), np.ones(len(small), dtype=int),
+                             0.3, weight=small, weight_dtype=np.float16)
+error = np.abs(network.synapses.decode_weight(network.synapses.weight) - small)
+assert np.all(error <= np.maximum(2.0**-11*small, 2.0**-25))
+
+for dtype, weight_dtype, relative in MODES:
+    network = Network.from_edges(N, matrix.origin, matrix.dest, 0.3, matrix.sign,
+                                 matrix.weight, matrix.potential, fire=2, refract=4,
+                                 dt=DT, dtype=dtype, weight_dtype=weight_dtype)
+    synapses = network.synapses
+    weight_error = np.abs(synapses.decode_weight(synapses.weight) - matrix.weight).max()
+    if relative is None:
+        bound = synapses.weight_scale/2
+    else:
+        bound = relative*np.abs(matrix.weight).max()
+    assert weight_error <= bound
+    input_bound = bound + 2.0**-22
+    input_error = 0.0
+    curr_error = 0.0
+    flips = 0
+    for tick in range(TICKS):
+        matrix.value[inputs] = drive[tick]*FAN_IN
+        synapses.value[inputs] = drive[tick]*FAN_IN
+        expected = normalized_input(reference)
+        reference.step(tick*DT)
+        if tick > 0:
+            error = np.abs(normalized_input(network) - expected)
+            input_error = max(input_error, float(error.max()))
+            network.update_inputs(tick*DT)
+            same = ((network.population.activation_time >= 0) ==
+                    (reference.population.activation_time >= 0))
+            flips += int((~same).sum())
+            error = np.abs(network.population.curr - reference.population.curr)[same]
+            curr_error = max(curr_error, float(error.max()))
+        for field in ('curr_time', 'activation_time', 'curr', 'curr_threshold'):
+            getattr(network.population, field)[:] = getattr(reference.population, field)
+        network.update_outputs()
+    print(np.dtype(dtype).name + " state, " + np.dtype(weight_dtype).name + " weights: " +
+          "weight error " + "%.3g" % weight_error + " (bound " + "%.3g" % bound + "), " +
+          "input error " + "%.3g" % input_error + " (bound " + "%.3g" % input_bound + "), " +
+          "current error " + "%.3g" % curr_error + " (bound " + "%.3g" % 2.0**-22 + "), " +
+          str(flips) + " flips in " + str(N*TICKS) + " neuron steps")
+    assert input_error <= input_bound
+    assert curr_error <= 2.0**-22
@@ -1,4 +1,11 @@
 import time
+import sys,os
+
+p = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not (p in sys.path):
+    sys.path.insert(0,p)
+
+from AML.neuralnet.profiling import DISABLED
 
 class Clock:
     def __init__(self):
@@ -20,3 +27,255 @@ class Clock:
     def get_true_time():
         return time.clock()
     '''
+
+
+class _Task:
+    __slots__ = ('name', 'callback', 'every', 'calls')
+
+    def __init__(self, name, callback, every):
+        self.name = name
+        self.callback = callback
+        self.every = every
+        self.calls = 0
+
+
+class Scheduler:
+    """
+    Runs several tasks, such as the neural network, physics and rendering, at
+    independent rates on one simulated clock
+
+    Time advances in ticks of dt ms. Every task runs once every `every` ticks,
+    so a task with every=20 gets one step for each 20 steps of a task with
+    every=1, and one with every=20*N runs once every N of those. Within a tick
+    the due tasks run in the order they were added, at the time of the tick,
+    after which the clock advances by dt. Each callback is called as
+    callback(curr_time, deltatime), where deltatime is the task's own period.
+
+    The scheduler can be paced against real time through an accumulator, either
+    by run(realtime=True) or by calling advance with the elapsed time from an
+    external event loop, or run as fast as possible for headless runs.
+
+    Attributes
+    ----------
+    dt : float
+        The duration of one tick in ms
+    clock : Clock
+        The simulated clock advanced by every tick
+    ticks : int
+        The number of ticks run so far
+    speed : float
+        The simulated ms run per real ms when paced against real time
+    max_ticks : int
+        The most ticks a single advance may run. Real time beyond it is dropped
+        so that a slow simulation falls behind instead of never catching up.
+    dropped : float
+        The total real time in simulated ms dropped because of max_ticks
+    profiler : Profiler
+        Times every task as a phase named after the task. Disabled unless set.
+
+    Methods
+    -------
+    add(callback, every, name)
+        Adds a task that runs every `every` ticks
+    remove(name)
+        Removes a task
+    calls(name)
+        Returns the number of times a task has run
+    step()
+        Runs one tick
+    advance(elapsed)
+        Runs every tick that fits into elapsed real ms plus the leftover time
+    run(duration, realtime)
+        Runs for duration simulated ms, paced against real time or as fast as possible
+    stop()
+        Makes run return after the current tick
+    """
+
+    def __init__(self, dt, clock = None, speed = 1.0, max_ticks = None):
+        """
+        Parameters
+        ----------
+        dt : float
+            The duration of one tick in ms, usually the neural timestep
+        clock : Clock, optional
+            The clock to advance. A new Clock is created if not given.
+        speed : float, optional
+            The simulated ms run per real ms when paced against real time
+        max_ticks : int, optional
+            The most ticks a single advance may run. Unlimited if not given.
+        """
+
+        if dt <= 0:
+            raise ValueError("Timestep must be positive")
+        self.dt = dt
+        self.clock = clock if clock is not None else Clock()
+        self.ticks = 0
+        self.speed = speed
+        self.max_ticks = max_ticks
+        self.dropped = 0.0
+        self.profiler = DISABLED
+        self._tasks = []
+        self._accumulator = 0.0
+        self._running = False
+
+    def add(self, callback, every = 1, name = None):
+        """
+        Adds a task that runs every `every` ticks, starting with the next tick
+        whose count is a multiple of every
+
+        Parameters
+        ----------
+        callback : callable
+            Called as callback(curr_time, deltatime)
+        every : int, optional
+            The number of ticks between calls
+        name : str, optional
+            The name of the task. Defaults to the callback's name.
+
+        Returns
+        -------
+        str
+            The name of the task
+        """
+
+        every = int(every)
+        if every < 1:
+            raise ValueError("A task must run at least every 1 tick")
+        if name is None:
+            name = getattr(callback, '__name__', 'task' + str(len(self._tasks)))
+        if any(task.name == name for task in self._tasks):
+            raise ValueError("A task named '" + name + "' already exists")
+        self._tasks.append(_Task(name, callback, every))
+        return name
+
+    def remove(self, name):
+        """
+        Removes a task
+
+        Parameters
+        ----------
+        name : str
+            The name of the task
+        """
+
+        self._tasks = [task for task in self._tasks if task.name != name]
+
+    def calls(self, name):
+        """
+        Returns the number of times a task has run
+
+        Parameters
+        ----------
+        name : str
+            The name of the task
+
+        Returns
+        -------
+        int
+            The number of calls so far
+        """
+
+        for task in self._tasks:
+            if task.name == name:
+                return task.calls
+        raise ValueError("Unknown task '" + str(name) + "'")
+
+    def step(self):
+        """
+        Runs every task due on the current tick, then advances the clock by dt
+        """
+
+        curr_time = self.clock.get_time()
+        tick = self.ticks
+        profiler = self.profiler
+        for task in self._tasks:
+            if tick % task.every == 0:
+                with profiler.phase(task.name):
+                    task.callback(curr_time, task.every*self.dt)
+                task.calls += 1
+        self.clock.tick(self.dt)
+        self.ticks += 1
+
+    def advance(self, elapsed):
+        """
+        Adds elapsed real time to the accumulator and runs every whole tick it
+        holds. The remainder carries over to the next call, so calling advance
+        from an event loop at any frame rate keeps the simulation in step with
+        real time.
+
+        Parameters
+        ----------
+        elapsed : float
+            The real time in ms since the last call
+
+        Returns
+        -------
+        int
+            The number of ticks run
+        """
+
+        self._accumulator += elapsed*self.speed
+        ticks = int(self._accumulator/self.dt)
+        if self.max_ticks is not None and ticks > self.max_ticks:
+            self.dropped += (ticks - self.max_ticks)*self.dt
+            self._accumulator -= (ticks - self.max_ticks)*self.dt
+            ticks = self.max_ticks
+        for _ in range(ticks):
+            self.step()
+        self._accumulator -= ticks*self.dt
+        return ticks
+
+    def run(self, duration = None, realtime = False):
+        """
+        Runs the tasks for duration simulated ms, or until stop is called
+
+        Parameters
+        ----------
+        duration : float, optional
+            The simulated time to run for. Runs until stop() if not given.
+        realtime : bool, optional
+            Whether to pace the ticks against real time with the accumulator. If
+            False, ticks run back to back as fast as possible.
+
+        Returns
+        -------
+        int
+            The number of ticks run
+        """
+
+        end = None if duration is None else self.ticks + int(round(duration/self.dt))
+        start = self.ticks
+        self._running = True
+        last = time.perf_counter()
+        while self._running and (end is None or self.ticks < end):
+            if not realtime:
+                self.step()
+                continue
+            now = time.perf_counter()
+            self._accumulator += (now - last)*1000*self.speed
+            last = now
+            if self.max_ticks is not None and self._accumulator > self.max_ticks*self.dt:
+                self.dropped += self._accumulator - self.max_ticks*self.dt
+                self._accumulator = self.max_ticks*self.dt
+            if self._accumulator < self.dt:
+                time.sleep((self.dt - self._accumulator)/(1000*self.speed))
+                continue
+            self._accumulator -= self.dt
+            self.step()
+        self._running = False
+        return self.ticks - start
+
+    def stop(self):
+        """
+        Makes run return once the current tick has finished
+        """
+
+        self._running = False
+
+    def __repr__(self):
+        return ("Scheduler(" + "Ticks:" + str(self.ticks) +
+                ", " + "Tasks:" + str([task.name for task in self._tasks]) +
+                ")")
+
+    def __str__(self):
+        return self.__repr__()
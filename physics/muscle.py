@@ -0,0 +1,154 @@
+import pymunk
+
+class Muscle:
+    """
+    A muscle between two pymunk bodies that pulls them together while contracting
+    and pushes them apart while relaxed
+
+    The muscle is a damped spring limited by a slide joint to between 5/7 of its
+    rest length and slightly more than its rest length.
+
+    Attributes
+    ----------
+    body1 : pymunk.Body
+        The body at the first end of the muscle
+    body2 : pymunk.Body
+        The body at the second end of the muscle
+    force : float
+        The magnitude of the force applied to each body
+    contract_len : float
+        The distance between the anchors at or below which the muscle is contracted
+    is_contracting : bool
+        Whether the muscle is pulling its bodies together
+    is_contracted : bool
+        Whether the muscle was fully contracted at the last update
+
+    Methods
+    -------
+    contract()
+        Starts pulling the bodies together
+    relax()
+        Starts pushing the bodies apart
+    endpoints()
+        Returns the world positions of the two anchors
+    """
+
+    def __init__(self, body1, body2, anchor1, anchor2, restlen, force, space):
+        contract_len_const = 5/7
+        self.contract_len = restlen*contract_len_const + restlen/20
+        self.mc = pymunk.constraint.DampedSpring(body1, body2, anchor1, anchor2,
+                                                 restlen + restlen/20, 0.2, 0.2)
+        self.ml = pymunk.constraint.SlideJoint(body1, body2, anchor1, anchor2,
+                                               restlen*contract_len_const,
+                                               restlen + restlen/20)
+        space.add(self.mc)
+        space.add(self.ml)
+        self.is_contracting = False
+        self.is_contracted = False
+        self.body1 = body1
+        self.body2 = body2
+        self.force = force
+    def contract(self):
+        self.is_contracting = True
+    def relax(self):
+        self.is_contracting = False
+    def endpoints(self):
+        b1posvec = (pymunk.vec2d.Vec2d(self.mc.anchor_a) +
+                    pymunk.vec2d.Vec2d(self.body1.position))
+        b2posvec = (pymunk.vec2d.Vec2d(self.mc.anchor_b) +
+                    pymunk.vec2d.Vec2d(self.body2.position))
+        return b1posvec, b2posvec
+    def _update(self):
+        b1posvec, b2posvec = self.endpoints()
+        bdist = b1posvec.get_distance(b2posvec)
+        if bdist <= self.contract_len:
+            self.is_contracted = True
+        else:
+            self.is_contracted = False
+        b1forcevec = (b2posvec - b1posvec).normalized()*self.force
+        if not self.is_contracting:
+            b1forcevec = -b1forcevec
+        b2forcevec = -b1forcevec
+
+        self.body1.apply_force_at_local_point(b1forcevec, self.mc.anchor_a)
+        self.body2.apply_force_at_local_point(b2forcevec, self.mc.anchor_b)
+
+
+def build_worm(space, size, numbodies = 9, mass = 6, moment = 200, force = 1000):
+    """
+    Adds a chain of circular bodies to space, pinned together and walled in by the
+    bounds of a size[0] x size[1] frame, with a pair of opposing muscles across
+    every other body
+
+    Parameters
+    ----------
+    space : pymunk.Space
+        The space to add the bodies, joints and muscles to
+    size : tuple
+        The width and height of the frame
+    numbodies : int, optional
+        The number of bodies in the chain
+    mass : float, optional
+        The mass of each body
+    moment : float, optional
+        The moment of inertia of each body
+    force : float, optional
+        The force of each muscle
+
+    Returns
+    -------
+    tuple
+        The bodies, their shapes and the muscles. Muscles 2*i and 2*i+1 are the
+        left and right muscles of the i-th segment.
+    """
+
+    framel = pymunk.Body(body_type=pymunk.Body.STATIC)
+    framelshape = pymunk.Segment(framel, (0,0), (0,size[1]), 1)
+    frameu = pymunk.Body(body_type=pymunk.Body.STATIC)
+    frameushape = pymunk.Segment(frameu, (0,size[1]), size, 1)
+    framer = pymunk.Body(body_type=pymunk.Body.STATIC)
+    framershape = pymunk.Segment(framer, size, (size[0],0), 1)
+    frameb = pymunk.Body(body_type=pymunk.Body.STATIC)
+    framebshape = pymunk.Segment(frameb, (size[0],0), (0,0), 1)
+    space.add(framel, framelshape, frameu, frameushape, framer, framershape, frameb, framebshape)
+
+    bodies = [pymunk.Body(mass,moment) for _ in range(numbodies)]
+    bodyposvecs = []
+    shapes = []
+    for i, body in enumerate(bodies):
+        body.position = (100 + i*100), 500
+        bodyposvecs.append(pymunk.vec2d.Vec2d(body.position))
+        shapes.append(pymunk.Circle(body, 20))
+
+    muscles = []
+    for i in range(0, numbodies-2, 2):
+        dist = bodyposvecs[i].get_distance(bodyposvecs[i+2])
+        muscles.append(Muscle(bodies[i], bodies[i+2], (0, shapes[i].radius),
+                        (0, shapes[i+2].radius), dist, force, space))
+        muscles.append(Muscle(bodies[i], bodies[i+2], (0, -shapes[i].radius),
+                        (0, -shapes[i+2].radius), dist, force, space))
+    flip = False
+    for i, muscle in enumerate(muscles):
+        if i%2 == 0:
+            muscle.is_contracting = True
+            flip = not flip
+        if flip:
+            muscle.is_contracting = not muscle.is_contracting
+
+    for body in bodies:
+        space.add(body)
+
+    for shape in shapes:
+        space.add(shape)
+
+    for i in range(0, numbodies-1):
+        cb = pymunk.PinJoint(bodies[i], bodies[i+1])
+        space.add(cb)
+    for i in range(0, numbodies-2, 2):
+        cb1l = pymunk.PinJoint(bodies[i], bodies[i+1], (0, shapes[i].radius))
+        cb1r = pymunk.PinJoint(bodies[i], bodies[i+1], (0, -shapes[i].radius))
+        cb3l = pymunk.PinJoint(bodies[i+2], bodies[i+1], (0, shapes[i+2].radius))
+        cb3r = pymunk.PinJoint(bodies[i+2], bodies[i+1], (0, -shapes[i+2].radius))
+        space.add(cb1l, cb1r, cb3l, cb3r)
+
+    return bodies, shapes, muscles